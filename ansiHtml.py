@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+#
+# ansiHtml.py: Convert ANSI-colored text to compact HTML, as a stream.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import re
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "ansiHtml",
+    "description"  : "Convert ANSI-colored text to compact HTML, as a stream.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from ansiHtml import HtmlConverter
+    conv = HtmlConverter(sys.stdout, title="build.log")
+    with open("build.log", encoding="utf-8") as ifh:
+        conv.feedStream(ifh)
+    conv.finish()
+
+Support for `uncolorize --oformat html`: turn text with ANSI color (SGR)
+escapes into an HTML page (one `pre`), quickly, and with less markup than
+converting each line on its own (where the escapes are a big part of the
+input; where text dominates, the page is about the size of the input).
+
+* The current colors and effects carry over from line to line (and from
+one call to `feed()` to the next), as they would in a terminal; so a span
+can go on for many lines.
+
+* A span only starts where the style actually changes and there's text to
+show, so escapes that don't change anything, or that are undone before
+any text, cost nothing; and runs in the same style are one span, even
+with nothing but line-ends between them (as for `diff` or test output,
+which colors each line and resets at its end).
+
+* Styles are written as short CSS classes, one for each part, so they
+combine: `class="f1 b4 B"` is red (color 1) on blue (4), bold. There are
+classes for the 256 xterm foreground colors ("f0" to "f255") and
+backgrounds ("b0" to "b255"), for the page's own colors when inverse
+swaps in a default ("fd" and "bd"), and for each effect ("B"old, "D"im,
+"I"talic, "U"nderline, "S"trikethrough, "H"idden); that's a fixed set, so
+they're all defined once, in the page header, before any text. Only 24-bit
+colors, which can't all have classes, are inline CSS (`style=color:#123456`).
+
+* Output is written at the end of each `feed()`, and nothing is kept but
+the current style and the caches, so memory doesn't grow with the input.
+`feedStream()` reads whole lines, about `blockSize` characters at a time.
+
+Handled: bold, dim, italic, underline (any kind), inverse, hidden,
+strikethrough, the 8 basic and 8 bright colors, xterm-256 colors
+(`38;5;n`), and 24-bit colors (`38;2;r;g;b`), for foreground and
+background, with ";" or ":" separators. Other escapes (cursor movement,
+titles, etc.) are removed. `&`, `<`, and `>` are escaped.
+
+A `rewrite` function, if given, is applied to the text before it's
+converted (`uncolorize --remap` and `--drop` use this; see `sgrRemap.py`
+and `vtTokenizer.py`).
+
+The 16 basic colors use the xterm values (see `colorCharts.systemRGB`).
+By default the page has the browser's colors; `fg` and `bg` set them (for
+example to `darkColors`, light text on black, like most terminals).
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+# SGR escapes (params are the group); and any other complete escape.
+sgrSplitRegex = re.compile(r"\x1b\[([0-9;:]*)m")
+otherEscapeRegex = re.compile(
+    r"\x1b(?:\[[\x30-\x3f]*[\x20-\x2f]*[\x40-\x7e]"
+    r"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|[PX^_][^\x1b]*\x1b\\"
+    r"|[\x20-\x2f]*[\x30-\x7e])")
+overstrikeRegex = re.compile(r".\x08")
+
+# A style is (fg, bg, flags). Colors are -1 for the default, 0-255 for
+# xterm-256 (0-15 being the basic and bright colors), or
+# rgbBase + 0xRRGGBB for 24-bit.
+rgbBase = 256
+BOLD, DIM, ITALIC, UNDERLINE, BLINK, INVERSE, HIDDEN, STRIKE = (
+    1, 2, 4, 8, 16, 32, 64, 128)
+defaultStyle = (-1, -1, 0)
+
+darkColors = ("#e5e5e5", "#000")  # fg, bg like a terminal's
+
+flagOn = { 1: BOLD, 2: DIM, 3: ITALIC, 4: UNDERLINE, 5: BLINK, 6: BLINK,
+    7: INVERSE, 8: HIDDEN, 9: STRIKE, 21: UNDERLINE }
+flagOff = { 22: BOLD | DIM, 23: ITALIC, 24: UNDERLINE, 25: BLINK,
+    27: INVERSE, 28: HIDDEN, 29: STRIKE }
+
+# CSS classes for the effects (blink and inverse have none; see startTag()).
+effectClasses = ((BOLD, "B"), (DIM, "D"), (ITALIC, "I"), (UNDERLINE, "U"),
+    (STRIKE, "S"), (HIDDEN, "H"))
+effectRules = (".B{font-weight:bold}\n.D{opacity:.7}\n.I{font-style:italic}\n"
+    ".U{text-decoration:underline}\n.S{text-decoration:line-through}\n"
+    ".U.S{text-decoration:underline line-through}\n.H{visibility:hidden}\n")
+pageColor = -2  # The page's other color, when inverse swaps in a default
+
+
+###############################################################################
+#
+def applySGR(style:tuple, params:str) -> tuple:
+    """Return the style after an SGR escape with `params` (the part between
+    "[" and "m").
+    """
+    if (":" not in params):
+        return applyCodes(*style, params.split(";") if params else [ "0" ])
+    ps = []
+    for sub in params.split(";"):
+        if (":" not in sub):  # ITU form: 4:3, 38:5:n, 38:2::r:g:b, 38:2:r:g:b
+            ps.append(sub)
+            continue
+        fields = sub.split(":")
+        if (fields[0] == "4"):
+            ps.append("24" if (fields[1] == "0") else "4")
+        elif (fields[0] in ("38", "48", "58") and len(fields) > 2):
+            ps.append(fields[0])
+            ps.append(fields[1])
+            ps.extend(fields[-3:] if (fields[1] == "2") else fields[2:3])
+        else:
+            ps.append(fields[0])
+    return applyCodes(*style, ps)
+
+def applyCodes(fg:int, bg:int, flags:int, ps:list) -> tuple:
+    i = 0
+    n = len(ps)
+    while (i < n):
+        try:
+            p = int(ps[i] or 0)
+        except ValueError:
+            i += 1
+            continue
+        i += 1
+        if (p == 0): fg, bg, flags = defaultStyle
+        elif (30 <= p <= 37): fg = p - 30
+        elif (40 <= p <= 47): bg = p - 40
+        elif (90 <= p <= 97): fg = p - 82
+        elif (100 <= p <= 107): bg = p - 92
+        elif (p == 39): fg = -1
+        elif (p == 49): bg = -1
+        elif (p in flagOn): flags |= flagOn[p]
+        elif (p in flagOff): flags &= ~flagOff[p]
+        elif (p in (38, 48, 58) and i < n):
+            color = None
+            try:
+                if (ps[i] == "5" and i + 1 < n):
+                    color = min(255, int(ps[i+1] or 0))
+                    i += 2
+                elif (ps[i] == "2" and i + 3 < n):
+                    color = rgbBase + (min(255, int(ps[i+1] or 0)) << 16 |
+                        min(255, int(ps[i+2] or 0)) << 8 | min(255, int(ps[i+3] or 0)))
+                    i += 4
+                else:
+                    i += 1
+            except ValueError:
+                i += 1
+            if (color is None): continue
+            if (p == 38): fg = color
+            elif (p == 48): bg = color
+    return fg, bg, flags
+
+def cssColor(color:int) -> str:
+    """CSS for a color number (see above), as short as it can be.
+    """
+    if (color >= rgbBase):
+        c = color - rgbBase
+        r, g, b = c >> 16, (c >> 8) & 255, c & 255
+    else:
+        from colorCharts import xterm256RGB
+        r, g, b = xterm256RGB(color)
+    if (r % 17 == 0 and g % 17 == 0 and b % 17 == 0):
+        return "#%x%x%x" % (r // 17, g // 17, b // 17)
+    return "#%02x%02x%02x" % (r, g, b)
+
+def attribute(name:str, value:str) -> str:
+    """An attribute (quoted only if it has to be).
+    """
+    if (" " in value): return ' %s="%s"' % (name, value)
+    return " %s=%s" % (name, value)
+
+###############################################################################
+#
+class HtmlConverter:
+    """Write ANSI-colored text to `ofh` (a text stream) as HTML.
+    """
+    def __init__(self, ofh, title:str="", fg:str=None, bg:str=None,
+        unman:bool=False, rewrite=None):
+        self.ofh = ofh
+        self.title = title
+        self.rewrite = rewrite  # Applied to the text first, if given
+        self.fg = fg
+        self.bg = bg
+        self.unman = unman
+        self.style = defaultStyle
+        self.openTag = ""         # Start-tag of the open span, if any
+        self.tags = {}            # style -> start-tag ("" for none)
+        self.transitions = {}     # (style, params) -> style
+        self.started = False
+        self.nChars = 0
+
+    def styleCSS(self, style:tuple) -> str:
+        fg, bg, flags = style
+        fgCSS = cssColor(fg) if (fg >= 0) else ""
+        bgCSS = cssColor(bg) if (bg >= 0) else ""
+        if (flags & INVERSE):  # (Canvas and CanvasText are the page's colors.)
+            fgCSS, bgCSS = (bgCSS or self.bg or "Canvas"), (fgCSS or self.fg or "CanvasText")
+        decls = []
+        if (fgCSS): decls.append("color:" + fgCSS)
+        if (bgCSS): decls.append("background:" + bgCSS)
+        if (flags & BOLD): decls.append("font-weight:bold")
+        if (flags & DIM): decls.append("opacity:.7")
+        if (flags & ITALIC): decls.append("font-style:italic")
+        if (flags & (UNDERLINE | STRIKE)):
+            decls.append("text-decoration:" + " ".join(
+                x for f, x in ((UNDERLINE, "underline"), (STRIKE, "line-through"))
+                if (flags & f)))
+        if (flags & HIDDEN): decls.append("visibility:hidden")
+        return ";".join(decls)
+
+    def startTag(self, style:tuple) -> str:
+        """Get (and remember) the span start-tag for a style: its classes
+        (see above), and inline CSS for any 24-bit colors.
+        """
+        fg, bg, flags = style
+        if (flags & INVERSE):
+            fg, bg = (bg if (bg >= 0) else pageColor), (fg if (fg >= 0) else pageColor)
+        classes = []
+        decls = []
+        for prefix, prop, color in (("f", "color", fg), ("b", "background", bg)):
+            if (color == pageColor): classes.append(prefix + "d")
+            elif (color >= rgbBase): decls.append("%s:%s" % (prop, cssColor(color)))
+            elif (color >= 0): classes.append("%s%d" % (prefix, color))
+        for flag, name in effectClasses:
+            if (flags & flag): classes.append(name)
+        tag = ""
+        if (classes or decls):
+            tag = "<span%s%s>" % (
+                attribute("class", " ".join(classes)) if (classes) else "",
+                attribute("style", ";".join(decls)) if (decls) else "")
+        self.tags[style] = tag
+        return tag
+
+    def reset(self) -> None:
+        """Go back to the default style (say, at the start of another file).
+        """
+        self.style = defaultStyle
+
+    def feed(self, text:str) -> None:
+        """Convert some text and write it out. Escapes must not be split
+        between calls (feeding whole lines is easiest).
+        """
+        import html
+        self.nChars += len(text)
+        if (self.unman and "\x08" in text):
+            text = overstrikeRegex.sub("", text)
+        if (self.rewrite is not None):
+            text = self.rewrite(text)
+        # Escaping can't touch SGRs, so it's done all at once.
+        text = html.escape(text, quote=False)
+        parts = sgrSplitRegex.split(text)
+        if (text.count("\x1b") > len(parts) >> 1):
+            parts[0::2] = [ otherEscapeRegex.sub("", p).replace("\x1b", "")
+                for p in parts[0::2] ]
+        pieces = []
+        style = self.style
+        openTag = self.openTag
+        tags = self.tags
+        transitions = self.transitions
+        if (len(transitions) > 100000): transitions.clear()
+        if (len(tags) > 100000): tags.clear()
+        for i in range(0, len(parts), 2):
+            if (i):
+                key = (style, parts[i-1])
+                newStyle = transitions.get(key)
+                if (newStyle is None):
+                    newStyle = transitions[key] = applySGR(style, parts[i-1])
+                style = newStyle
+            t = parts[i]
+            if (not t): continue
+            tag = tags.get(style)
+            if (tag is None): tag = self.startTag(style)
+            # (Line-ends alone don't show, so they needn't end a span.)
+            if (tag != openTag and t.strip("\n")):
+                if (openTag): pieces.append("</span>")
+                if (tag): pieces.append(tag)
+                openTag = tag
+            pieces.append(t)
+        self.style = style
+        self.openTag = openTag
+        self.flush(pieces)
+
+    def feedStream(self, ifh, blockSize:int=1 << 20) -> None:
+        """Convert everything from a text stream, some whole lines at a time.
+        """
+        while (True):
+            lines = ifh.readlines(blockSize)
+            if (not lines): break
+            self.feed("".join(lines))
+
+    def flush(self, pieces:list) -> None:
+        out = []
+        if (not self.started):
+            out.append(self.header())
+            self.started = True
+        out.extend(pieces)
+        self.ofh.write("".join(out))
+
+    def header(self) -> str:
+        import html
+        colors = "".join(("%s:%s;" % (prop, value)) for prop, value in
+            (("color", self.fg), ("background", self.bg)) if value)
+        return ("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            "<title>%s</title>\n<style>\n"
+            "pre{%smargin:0;padding:4px}\n"
+            "%s</style>\n</head>\n<body>\n<pre>" % (
+            html.escape(self.title), colors, self.classRules()))
+
+    def classRules(self) -> str:
+        """CSS for all the classes startTag() uses (see above).
+        """
+        rules = []
+        for n in range(256):
+            rules.append(".f%d{color:%s}" % (n, cssColor(n)))
+        rules.append("\n")
+        for n in range(256):
+            rules.append(".b%d{background:%s}" % (n, cssColor(n)))
+        rules.append("\n.fd{color:%s}.bd{background:%s}\n" % (
+            self.bg or "Canvas", self.fg or "CanvasText"))
+        rules.append(effectRules)
+        return "".join(rules)
+
+    def finish(self) -> None:
+        """Close any open span, and the page.
+        """
+        pieces = [ "</span>" ] if (self.openTag) else []
+        self.openTag = ""
+        pieces.append("</pre>\n</body>\n</html>\n")
+        self.flush(pieces)
+        self.ofh.flush()
@@ -0,0 +1,680 @@
+#!/usr/bin/env python3
+#
+# colorBatch.py: Convert big batches of color specs at once, with NumPy.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import re
+import logging
+
+import numpy as np
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "colorBatch",
+    "description"  : "Convert big batches of color specs at once, with NumPy.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    import colorBatch as cb
+    rgb, bad = cb.parseColors([ "#ff8000", "red", "hsv(0.5, 1.0, 1.0)" ])
+    print(cb.formatColors(rgb, "hls", bad), end="")
+    cb.convertStream(sys.stdin, sys.stdout, "rgb6")
+
+Support for `colorConvert.py --batch`: convert colors a block of lines at
+a time (`blockLines`, default 64K), instead of one line at a time.
+
+* Parsing: the block is joined into one array of bytes, and NumPy finds
+the line boundaries and the commas and parentheses. All the `#` forms of
+each length are decoded at once, through a hex-digit lookup table. The
+function forms (`rgb(...)`, `hsv(...)`, etc.) with 3 numbers are cut up
+at their punctuation, and their fields (which repeat a lot) are looked up in a
+hash table of NumPy arrays (`TokenTable`); only strings not seen before
+are converted in Python. Color names (see `colorNameDB.py`) are
+one dict lookup each. Anything else (say, with an alpha number) is matched
+by a regex, one line at a time.
+
+* Conversion: the result is an (N, 3) float array of r, g, b (0 to 1);
+HSV, HLS, and YIQ are converted to and from it with array arithmetic
+(the same formulas as Python's `colorsys`, so the results match).
+
+* Output: each line is built as an array record, by copying each number
+(already formatted, along with the text after it) from a table, so all
+the lines are made at once. Numbers that might round differently than
+"%" formatting would (or don't fit the table) are done with "%" instead.
+
+The forms and output formats are those of `colorConvert.py`, with the
+same output; except that a line that can't be parsed gives an empty output
+line (so output lines still match input lines), and is reported as a warning.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose. Get names from colorNameDB.py.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+defaultBlockLines = 1 << 16
+
+# One line: a "#" form (its digits as group 1); a function form (the
+# function name, then its 3 or 4 numbers); or anything else (no groups).
+# (The same forms as `colorConvert.functionExpr`.)
+token = r"\s*((?:0x)?[\da-fA-F.]+%?)\s*"
+lineRegex = re.compile(r"^(?:#([\da-fA-F]*)|(\w+)\(%s,%s,%s(?:,%s)?\)|.*)$" % (
+    token, token, token, token), re.MULTILINE)
+
+numberRegex = re.compile(token + r"$")
+hexRegex = re.compile(r"[\da-fA-F]*")
+maxHexDigits = 13  # Per channel, to fit a float exactly
+NL = ord("\n")
+
+functionCodes = { "rgb": 1, "rgba": 1, "hsv": 2, "hsva": 2, "hls": 3, "yiq": 4 }
+
+# name -> (before, field format, between, after, decimals) for one line
+# (for the non-hex forms). decimals is None for integer fields.
+outputFormats = {
+    "rgbdec": ("rgb(", "%3d",   ", ",  ")\n",  None),
+    "rgb%"  : ("rgb(", "%5.1f", "%, ", "%)\n", 1),
+    "hsv"   : ("hsv(", "%5.3f", "%, ", "%)\n", 3),
+    "hls"   : ("hls(", "%5.1f", "%, ", "%)\n", 1),
+    "yiq"   : ("yiq(", "%5.1f", "%, ", "%)\n", 1),
+}
+formatAliases = { "rgdDec": "rgbdec", "hsl": "hls" }
+hexDigits = { "rgb3": 1, "rgb6": 2, "rgb9": 3 }
+
+ONE_THIRD = 1.0 / 3.0
+ONE_SIXTH = 1.0 / 6.0
+TWO_THIRD = 2.0 / 3.0
+
+
+###############################################################################
+#
+def hexLookup() -> np.ndarray:
+    """Byte value -> hex digit value (-1 for non-hex-digits).
+    """
+    lut = np.full(256, -1, dtype=np.int16)
+    for i, c in enumerate("0123456789abcdef"):
+        lut[ord(c)] = i
+        lut[ord(c.upper())] = i
+    return lut
+
+hexLUT = hexLookup()
+
+simpleMarks = np.frombuffer(b"(,,)", dtype=np.uint32)[0]
+
+_nameColors = None
+
+def getNameColors() -> tuple:
+    """@return (dict of every color name that can be looked up (see
+    `colorNameDB.py`) -> row number, (K, 3) float array of their r, g, b).
+    """
+    global _nameColors
+    if (_nameColors is None):
+        from colorNameDB import getDB
+        db = getDB()
+        _, rgb = db.arrays()
+        _nameColors = (dict(db.keys()), rgb / 255.0)
+    return _nameColors
+
+_namePalettes = {}
+
+def getNamePalette(metric:str="rgb"):
+    """@return a `paletteIndex.Palette` of the HTML/CSS colors, to find the
+    nearest name by `metric` (see `colorDistance.py`).
+    """
+    if (metric not in _namePalettes):
+        from colorNameDB import getDB
+        from paletteIndex import Palette
+        names, rgb = getDB().arrays("css")
+        _namePalettes[metric] = Palette(rgb / 255.0, names, metric=metric)
+    return _namePalettes[metric]
+
+def convertNumber(s:str) -> float:
+    """The same as `colorConvert.convertNumber()`: "50%", "0x80", "0200"
+    (octal), "0.5" or ".5", or "128" -> 0 to 1.
+    @raise ValueError if it's none of those.
+    """
+    if (s.endswith("%")): return float(s[0:-1]) / 100
+    if (s.startswith("0x")): return int(s[2:], 16) / 255.0
+    if ("." in s): return float(s)
+    if (s.startswith("0")): return int(s, 8) / 255.0
+    return int(s) / 255.0
+
+class FieldCache(dict):
+    """Field of a function form -> value: for function names, minus their
+    code (see `functionCodes`); for numbers, their value (0 to 1, or so);
+    for anything else, NaN. Each string is converted only the first time
+    it's seen (they repeat a lot).
+    """
+    def __init__(self):
+        super().__init__({ name: float(-code) for name, code in functionCodes.items() })
+
+    def __missing__(self, s:str) -> float:
+        mat = numberRegex.match(s)
+        try:
+            v = convertNumber(mat.group(1))
+        except (AttributeError, ValueError):
+            v = float("nan")
+        if (len(self) < 100000): self[s] = v
+        return v
+
+_fieldCache = FieldCache()
+
+class TokenTable:
+    """Look up many short strings (fields of function forms) at once, in
+    `_fieldCache`. Each string of up to 8 bytes is packed into a uint64 key,
+    and looked up in a hash table made of NumPy arrays (each key has two
+    possible slots; a key whose slots are both taken just isn't kept). Only
+    new strings (or longer ones, or ones whose slots are taken) go to Python.
+    """
+    hashBits = 16
+    multiplier = np.uint64(0x9E3779B97F4A7C15)
+    lowBytes = np.array([ (1 << (8 * k)) - 1 for k in range(8) ] + [ (1 << 64) - 1 ],
+        dtype=np.uint64)
+
+    def __init__(self):
+        self.slotKeys = np.zeros(1 << self.hashBits, dtype=np.uint64)
+        self.slotValues = np.full(1 << self.hashBits, np.nan)  # (key 0 is "")
+
+    def hashes(self, keys:np.ndarray) -> tuple:
+        product = keys * self.multiplier
+        mask = np.uint64((1 << self.hashBits) - 1)
+        return ((product >> np.uint64(64 - self.hashBits)).astype(np.intp),
+            ((product >> np.uint64(24)) & mask).astype(np.intp))
+
+    def lookup(self, buf:np.ndarray, starts:np.ndarray, lens:np.ndarray) -> np.ndarray:
+        """@return the value of each string buf[starts[i]:starts[i]+lens[i]].
+        """
+        from numpy.lib.stride_tricks import as_strided
+        padded = np.concatenate([ buf, np.zeros(8, dtype=np.uint8) ])
+        windows = as_strided(padded, shape=(len(buf), 8), strides=(1, 1))
+        keys = windows[starts].view("<u8").reshape(len(starts))
+        keys &= self.lowBytes[np.minimum(lens, 8)]
+        short = (lens <= 8)
+        slots, slots2 = self.hashes(keys)
+        found = (self.slotKeys[slots] == keys) & short
+        vals = self.slotValues[slots]
+        if (found.all()): return vals
+        other = np.flatnonzero(~found)
+        slots[other] = slots2[other]
+        found[other] = (self.slotKeys[slots[other]] == keys[other]) & short[other]
+        vals[other] = self.slotValues[slots[other]]
+        if (found.all()): return vals
+        missing = np.flatnonzero(~found)
+        for i in missing.tolist():
+            vals[i] = self.convert(buf, starts[i], lens[i])
+        missing = missing[short[missing] & (keys[missing] != 0)]
+        placed = np.zeros(len(missing), dtype=bool)
+        for slotList in self.hashes(keys[missing]):
+            ok = ~placed & (self.slotKeys[slotList] == 0)
+            self.slotKeys[slotList[ok]] = keys[missing[ok]]
+            self.slotValues[slotList[ok]] = vals[missing[ok]]
+            placed |= ok
+        return vals
+
+    @staticmethod
+    def convert(buf:np.ndarray, start:int, length:int) -> float:
+        return _fieldCache[buf[start:start+length].tobytes().decode("utf-8", "replace")]
+
+_tokenTable = TokenTable()
+
+
+###############################################################################
+# Color space conversions, on (N, 3) arrays (as in colorsys).
+#
+def rgbToHsv(rgb:np.ndarray) -> np.ndarray:
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    rangec = maxc - minc
+    grey = (rangec == 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(grey, 0.0, rangec / maxc)
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+        h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+        h = np.where(grey, 0.0, (h / 6.0) % 1.0)
+    return np.stack([ h, s, maxc ], axis=1)
+
+def hsvToRgb(hsv:np.ndarray) -> np.ndarray:
+    h, s, v = hsv[:, 0], hsv[:, 1], hsv[:, 2]
+    i = (h * 6.0).astype(np.int64)
+    f = (h * 6.0) - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i % 6
+    r = np.choose(i, [ v, q, p, p, t, v ])
+    g = np.choose(i, [ t, v, v, q, p, p ])
+    b = np.choose(i, [ p, p, t, v, v, q ])
+    grey = (s == 0.0)
+    return np.stack([ np.where(grey, v, r), np.where(grey, v, g), np.where(grey, v, b) ], axis=1)
+
+def rgbToHls(rgb:np.ndarray) -> np.ndarray:
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+    grey = (rangec == 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(l <= 0.5, rangec / sumc, rangec / (2.0 - maxc - minc))
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+        h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+        h = (h / 6.0) % 1.0
+    return np.stack([ np.where(grey, 0.0, h), l, np.where(grey, 0.0, s) ], axis=1)
+
+def hlsToRgb(hls:np.ndarray) -> np.ndarray:
+    h, l, s = hls[:, 0], hls[:, 1], hls[:, 2]
+    m2 = np.where(l <= 0.5, l * (1.0 + s), l + s - (l * s))
+    m1 = 2.0 * l - m2
+    def channel(hue):
+        hue = hue % 1.0
+        return np.select([ hue < ONE_SIXTH, hue < 0.5, hue < TWO_THIRD ],
+            [ m1 + (m2 - m1) * hue * 6.0, m2, m1 + (m2 - m1) * (TWO_THIRD - hue) * 6.0 ], m1)
+    grey = (s == 0.0)
+    return np.stack([ np.where(grey, l, channel(h + ONE_THIRD)),
+        np.where(grey, l, channel(h)), np.where(grey, l, channel(h - ONE_THIRD)) ], axis=1)
+
+def rgbToYiq(rgb:np.ndarray) -> np.ndarray:
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    y = 0.30 * r + 0.59 * g + 0.11 * b
+    i = 0.74 * (r - y) - 0.27 * (b - y)
+    q = 0.48 * (r - y) + 0.41 * (b - y)
+    return np.stack([ y, i, q ], axis=1)
+
+def yiqToRgb(yiq:np.ndarray) -> np.ndarray:
+    y, i, q = yiq[:, 0], yiq[:, 1], yiq[:, 2]
+    r = y + 0.9468822170900693 * i + 0.6235565819861433 * q
+    g = y - 0.27478764629897834 * i - 0.6356910791873801 * q
+    b = y - 1.1085450346420322 * i + 1.7090069284064666 * q
+    return np.clip(np.stack([ r, g, b ], axis=1), 0.0, 1.0)
+
+
+
+###############################################################################
+#
+def lineBounds(buf:np.ndarray) -> tuple:
+    """@return the (start, end) offsets of each newline-terminated line in
+    `buf` (a uint8 array), as two arrays; end is the newline's offset.
+    """
+    ends = np.flatnonzero(buf == NL)
+    starts = np.empty_like(ends)
+    starts[0:1] = 0
+    starts[1:] = ends[:-1] + 1
+    return starts, ends
+
+def findPunctuation(buf:np.ndarray, ends:np.ndarray) -> tuple:
+    """Find the commas and parentheses.
+    @return (their offsets; for each line, the index (in that) of its first
+    one, and how many it has).
+    """
+    where = np.flatnonzero((buf == ord(",")) | (buf == ord("(")) | (buf == ord(")")))
+    upTo = np.searchsorted(where, ends)
+    firstMark = np.empty_like(upTo)
+    firstMark[0:1] = 0
+    firstMark[1:] = upTo[:-1]
+    return where, firstMark, upTo - firstMark
+
+def selectLines(buf:np.ndarray, starts:np.ndarray, ends:np.ndarray, which:np.ndarray) -> str:
+    """@return the lines picked out by bool array `which`, each with its newline.
+    """
+    keep = np.repeat(which, ends - starts + 1)
+    return buf[keep].tobytes().decode("utf-8")
+
+def parseHex(buf:np.ndarray, starts:np.ndarray, per:int) -> tuple:
+    """Decode the "#" forms (each with 3 * `per` hex digits) starting at
+    each offset in `starts`.
+    @return (an (N, 3) float array, an (N,) bool array of which were bad).
+    """
+    offsets = starts[:, None] + 1 + np.arange(3 * per)
+    nibbles = hexLUT[buf[offsets]].reshape(-1, 3, per).astype(np.int64)
+    bad = (nibbles.reshape(len(nibbles), -1) < 0) @ np.ones(3 * per, dtype=bool)
+    value = np.zeros(nibbles.shape[0:2], dtype=np.int64)
+    for k in range(per):
+        value = value * 16 + nibbles[:, :, k]
+    if (per == 1):
+        value *= 17  # "f" means "ff"
+        per = 2
+    return value / float(16 ** per - 1), bad
+
+def parseLongHex(s:str, per:int) -> tuple:
+    """Decode one "#" form with more than `maxHexDigits` per channel, as
+    `colorConvert.cconvert()` does.
+    @return ((r, g, b), whether it was bad).
+    """
+    if (not hexRegex.fullmatch(s, 1)): return (0.0, 0.0, 0.0), True
+    scale = float(16 ** per - 1)
+    return tuple(int(s[1+k*per:1+(k+1)*per], 16) / scale for k in range(3)), False
+
+def parseSimpleFunctions(buf:np.ndarray, starts:np.ndarray, marks:np.ndarray) -> tuple:
+    """Decode lines like "hsv(.5, 1, 50%)" that start at `starts`, given
+    the offsets of each one's "(", ",", ",", and ")" (`marks`, N x 4).
+    @return (an (N, 3) float array of r, g, b, an (N,) bool array of which were bad).
+    """
+    fieldStarts = np.concatenate([ starts[:, None], marks[:, 0:3] + 1 ], axis=1)
+    fieldLens = marks - fieldStarts
+    table = _tokenTable.lookup(buf, fieldStarts.ravel(), fieldLens.ravel())
+    return convertFields(table.reshape(-1, 4))
+
+def parseColors(lines:list) -> tuple:
+    """Parse color specs (one per item, as for `colorConvert.py`).
+    @return (an (N, 3) float array of r, g, b in 0 to 1; an (N,) bool array
+    saying which couldn't be parsed, whose rgb is 0).
+
+    The block is joined and handled as one array of bytes: the line
+    boundaries, and where the commas and parentheses are, come from NumPy.
+    The "#" forms are decoded from there; function forms with 3 numbers are
+    cut up at their punctuation, and their fields looked up (see
+    `TokenTable`); and names are looked up. Only other lines (say, with an
+    alpha number) are matched one at a time, by `lineRegex`.
+    """
+    from itertools import repeat
+    n = len(lines)
+    rgb = np.zeros((n, 3), dtype=np.float64)
+    bad = np.zeros(n, dtype=bool)
+    if (n == 0): return rgb, bad
+    text = "".join(lines)
+    if (not text.endswith("\n")): text += "\n"
+    if (text.count("\n") != n):  # Lines without newlines (or with extras)
+        text = "\n".join(s.strip().replace("\n", " ") for s in lines) + "\n"
+    buf = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    starts, ends = lineBounds(buf)
+    first = buf[starts]  # (For an empty line, these are both a newline.)
+    last = buf[ends - 1]
+    if ((((first <= 32) | (last <= 32)) & (ends > starts)).any()):
+        text = "\n".join(s.strip() for s in lines) + "\n"  # Spaces to trim
+        buf = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        starts, ends = lineBounds(buf)
+        first = buf[starts]
+        last = buf[ends - 1]
+    lens = ends - starts
+    marks, firstMark, nMarks = findPunctuation(buf, ends)
+    done = (lens == 0)
+    bad |= done
+
+    # "#" forms, by length.
+    isHex = (first == ord("#"))
+    for hexLen in np.unique(lens[isHex & (lens > 1) & (lens % 3 == 1)]).tolist():
+        per = (hexLen - 1) // 3
+        idx = np.flatnonzero(isHex & (lens == hexLen))
+        if (per <= maxHexDigits):
+            rgb[idx], bad[idx] = parseHex(buf, starts[idx], per)
+        else:
+            for i in idx.tolist():
+                rgb[i], bad[i] = parseLongHex(buf[starts[i]:ends[i]].tobytes().decode("utf-8"), per)
+        done[idx] = True
+    bad |= isHex & ~done
+    done |= isHex
+
+    # Names (anything else without punctuation).
+    isName = ~done & (nMarks == 0)
+    idx = np.flatnonzero(isName)
+    if (len(idx)):
+        rows, nameRGB = getNameColors()
+        found = np.fromiter(map(rows.get, selectLines(buf, starts, ends, isName).split("\n"),
+            repeat(-1)), dtype=np.int64, count=len(idx) + 1)[0:-1]
+        rgb[idx] = nameRGB[found]
+        bad[idx] = (found < 0)
+        done |= isName
+
+    # Function forms, with 3 numbers (the usual case), all together.
+    simple = ~done & (last == ord(")")) & (nMarks == 4)
+    if (simple.any()):
+        idx = np.flatnonzero(simple)
+        marks = marks[firstMark[idx, None] + np.arange(4)]
+        inOrder = (buf[marks].view(np.uint32).ravel() == simpleMarks)
+        simple[idx[~inOrder]] = False
+        idx = idx[inOrder]
+        rgb[idx], bad[idx] = parseSimpleFunctions(buf, starts[idx], marks[inOrder])
+        done |= simple
+
+    # Anything else, a line at a time.
+    idx = np.flatnonzero(~done)
+    if (len(idx)):
+        matches = lineRegex.findall(selectLines(buf, starts, ends, ~done)[0:-1])
+        fields = [ field for m in matches for field in m[1:5] ]
+        rgb[idx], bad[idx] = convertFunctions(fields)
+    rgb[bad] = 0.0
+    return rgb, bad
+
+def convertFunctions(fields:list) -> tuple:
+    """Convert function forms, given a list of their fields, 4 per line
+    (the name and 3 numbers).
+    @return (an (N, 3) float array of r, g, b, an (N,) bool array of which were bad).
+    """
+    n = len(fields) // 4
+    return convertFields(np.fromiter(map(_fieldCache.__getitem__, fields),
+        dtype=np.float64, count=4 * n).reshape(n, 4))
+
+def convertFields(table:np.ndarray) -> tuple:
+    """Convert function forms, given an (N, 4) array of their fields' values
+    (see `FieldCache`).
+    @return (an (N, 3) float array of r, g, b, an (N,) bool array of which were bad).
+    """
+    n = len(table)
+    codes = -table[:, 0]
+    vals = table[:, 1:]
+    with np.errstate(invalid="ignore"):
+        bad = ~(codes > 0) | ~(vals[:, 0] >= 0) | ~(vals[:, 1] >= 0) | ~(vals[:, 2] >= 0)
+    rgb = np.zeros((n, 3), dtype=np.float64)
+    for code, conv in ((1, None), (2, hsvToRgb), (3, hlsToRgb), (4, yiqToRgb)):
+        mask = (codes == code) & ~bad
+        if (not mask.any()): continue
+        rgb[mask] = vals[mask] if (conv is None) else conv(vals[mask])
+    return rgb, bad
+
+def formatColors(rgb:np.ndarray, fmt:str, bad:np.ndarray=None,
+    metric:str="rgb") -> str:
+    """Format each row of `rgb` as `colorConvert.serialize()` would, one per
+    line; rows marked in `bad` come out as empty lines. For `fmt` "name",
+    that's the nearest color name by `metric`.
+    """
+    fmt = formatAliases.get(fmt, fmt)
+    n = len(rgb)
+    if (n == 0): return ""
+    redo = {}  # line number -> replacement
+    lineLen = None  # If all the lines are the same length
+    if (fmt in hexDigits):
+        per = hexDigits[fmt]
+        maxVal = 16 ** per - 1
+        ints = (rgb * maxVal).astype(np.int64)
+        if (ints.min() >= 0 and ints.max() <= maxVal):
+            text = formatHex(ints, per)
+            lineLen = 2 + 3 * per
+        else:
+            lineFmt = "#" + ("%%0%dx" % (per)) * 3 + "\n"
+            text = (lineFmt * n) % tuple(ints.ravel().tolist())
+    elif (fmt == "name"):
+        pal = getNamePalette(metric)
+        which = pal.nearest(np.where(bad[:, None], 0.0, rgb) if (bad is not None) else rgb)
+        labels = pal.labels
+        text = "\n".join([ labels[i] for i in which.tolist() ]) + "\n"
+    elif (fmt in outputFormats):
+        if (fmt == "rgbdec"): vals = (rgb * 255).astype(np.int64)
+        elif (fmt == "hsv"): vals = rgbToHsv(rgb)
+        elif (fmt == "hls"): vals = rgbToHls(rgb)
+        elif (fmt == "yiq"): vals = rgbToYiq(rgb)
+        else: vals = rgb
+        text, slow = formatFields(vals, fmt)
+        lineLen = len(text) // n
+        lineFmt = lineFormat(fmt)
+        for i in np.flatnonzero(slow).tolist():
+            redo[i] = lineFmt % tuple(vals[i].tolist())
+    else:
+        raise ValueError('Unknown output format "%s".' % (fmt))
+    if (bad is not None):
+        for i in np.flatnonzero(bad).tolist(): redo[i] = "\n"
+    if (not redo): return text
+    if (lineLen is None):
+        outLines = text.split("\n")
+        for i, line in redo.items():
+            outLines[i] = line[0:-1]
+        return "\n".join(outLines)
+    pieces = []
+    pos = 0
+    for i in sorted(redo):
+        pieces.append(text[pos:i * lineLen])
+        pieces.append(redo[i])
+        pos = (i + 1) * lineLen
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+def lineFormat(fmt:str) -> str:
+    """@return a %-format for a whole line of `fmt` (one of `outputFormats`).
+    """
+    before, field, between, after, _ = outputFormats[fmt]
+    between = between.replace("%", "%%")
+    return before + field + between + field + between + field + after.replace("%", "%%")
+
+_fieldTables = {}
+
+def fieldTable(field:str, decimals:int) -> tuple:
+    """@return (lowest, highest, (K, width) uint8 array): every value
+    `field` can format at its minimum width, as (integer) value * 10**decimals.
+    If negative numbers fit, the last row is "-0.0" (or the like).
+    """
+    key = (field, decimals)
+    if (key in _fieldTables): return _fieldTables[key]
+    width = int(re.match(r"%(\d+)", field).group(1))
+    d = decimals or 0
+    digits = width - (1 if decimals else 0)
+    hi = 10 ** digits - 1
+    lo = -(10 ** (digits - 1) - 1) if (digits - 1 >= d + 1) else 0
+    if (decimals is None):
+        strings = [ field % (k) for k in range(lo, hi + 1) ]
+    else:
+        strings = [ field % (k / 10 ** d) for k in range(lo, hi + 1) ]
+        if (lo < 0): strings.append(field % (-0.0))
+    table = np.frombuffer("".join(strings).encode("ascii"), dtype=np.uint8).reshape(-1, width)
+    _fieldTables[key] = (lo, hi, table)
+    return _fieldTables[key]
+
+def formatFields(vals:np.ndarray, fmt:str) -> tuple:
+    """Format an (N, 3) array as `fmt` (one of `outputFormats`), building all
+    the bytes at once from a table of formatted numbers. Each line is an
+    array record: the text before the first number; then each number,
+    along with the text after it, copied in one piece from a table.
+    @return (text, an (N,) bool array of rows that need formatting the
+    slow way: values that are too big, or that might round differently).
+    """
+    before, field, between, after, decimals = outputFormats[fmt]
+    lo, hi, table = fieldTable(field, decimals)
+    width = table.shape[1]
+    if (decimals is None):
+        k = vals
+        slow = np.zeros(vals.shape, dtype=bool)
+    else:
+        with np.errstate(invalid="ignore"):
+            scaled = vals * 10 ** decimals
+            k = np.rint(scaled)
+            slow = ~np.isfinite(scaled)
+            slow |= (np.abs(np.abs(scaled - k) - 0.5) < 1e-6)  # Ties
+            k = np.where(slow, 0, k).astype(np.int64)
+    slow |= (k < lo) | (k > hi)
+    k = np.clip(k, lo, hi) - lo
+    if (decimals is not None):
+        negZero = (k == -lo) & np.signbit(vals)  # Like "-0.0"
+        if (lo < 0): k[negZero] = len(table) - 1
+        else: slow |= negZero
+
+    def withText(text:str) -> np.ndarray:
+        tail = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+        chunks = np.concatenate([ table, np.tile(tail, (len(table), 1)) ], axis=1)
+        return np.ascontiguousarray(chunks).view("V%d" % (width + len(tail))).ravel()
+    mid = withText(between)
+    end = withText(after)
+    midLen = width + len(between)
+    record = np.dtype({ "names": [ "before", "a", "b", "c" ],
+        "formats": [ "V%d" % (len(before)), mid.dtype, mid.dtype, end.dtype ],
+        "offsets": [ 0, len(before), len(before) + midLen, len(before) + 2 * midLen ],
+        "itemsize": len(before) + 2 * midLen + width + len(after) })
+    out = np.empty(len(vals), dtype=record)
+    out["before"] = np.frombuffer(before.encode("ascii"), dtype="V%d" % (len(before)))[0]
+    out["a"] = mid[k[:, 0]]
+    out["b"] = mid[k[:, 1]]
+    out["c"] = end[k[:, 2]]
+    return out.tobytes().decode("ascii"), slow[:, 0] | slow[:, 1] | slow[:, 2]
+
+def formatHex(ints:np.ndarray, per:int) -> str:
+    """Format (N, 3) ints (in range) as "#" + `per` hex digits each + newline,
+    by building all the bytes at once.
+    """
+    n = len(ints)
+    digits = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+    out = np.empty((n, 2 + 3 * per), dtype=np.uint8)
+    out[:, 0] = ord("#")
+    out[:, -1] = ord("\n")
+    for c in range(3):
+        for k in range(per):
+            shift = 4 * (per - 1 - k)
+            out[:, 1 + c * per + k] = digits[(ints[:, c] >> shift) & 15]
+    return out.tobytes().decode("ascii")
+
+def convertBlock(lines:list, fmt:str, palette=None, metric:str="rgb") -> tuple:
+    """Convert a list of color specs to `fmt`. With `palette` (a
+    `paletteIndex.Palette`), add the nearest palette color to each line.
+    @return (output text, list of indexes of lines that couldn't be parsed).
+    """
+    rgb, bad = parseColors(lines)
+    text = formatColors(rgb, fmt, bad, metric=metric)
+    if (palette is not None): text = addNearest(text, rgb, bad, palette)
+    return text, np.flatnonzero(bad).tolist()
+
+def addNearest(text:str, rgb:np.ndarray, bad:np.ndarray, palette) -> str:
+    """Append "\t Nearest: " and the nearest palette color's label to each
+    (parsed) line of `text`, as `colorConvert.py --palette` does.
+    """
+    which = palette.nearest(np.where(bad[:, None], 0.0, rgb)).tolist()
+    labels = palette.labels
+    outLines = text.split("\n")
+    for i, isBad in enumerate(bad.tolist()):
+        if (not isBad): outLines[i] += "\t Nearest: " + labels[which[i]]
+    return "\n".join(outLines)
+
+def convertStream(ifh, ofh, fmt:str, blockLines:int=defaultBlockLines,
+    path:str="", palette=None, metric:str="rgb") -> int:
+    """Convert each line of text stream `ifh`, writing to `ofh`, a block at a time.
+    @return the number of lines read.
+    """
+    from itertools import islice
+    recnum = 0
+    readError = None
+    while (readError is None):
+        lines = []
+        try:
+            lines.extend(islice(ifh, blockLines))
+        except Exception as e:  # Convert the lines before it, then re-raise.
+            readError = e
+        if (not lines): break
+        text, badLines = convertBlock(lines, fmt, palette=palette, metric=metric)
+        for i in badLines:
+            lg.warning("%s:%d: Can't parse color '%s'.", path, recnum + i + 1,
+                lines[i].strip())
+        ofh.write(text)
+        recnum += len(lines)
+    if (readError is not None): raise readError
+    return recnum
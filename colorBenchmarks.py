@@ -0,0 +1,1187 @@
+#!/usr/bin/env python3
+#
+# colorBenchmarks.py: Timing tests for the Color utilities.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import sys
+import time
+import random
+import logging
+
+lg = logging.getLogger()
+args = None
+failures = []  # Benchmarks that missed a budget (see `checkBudget()`)
+
+__metadata__ = {
+    "title"        : "colorBenchmarks",
+    "description"  : "Timing tests for the Color utilities.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    colorBenchmarks.py [options] [names]
+
+Run timing tests on synthetic data, for the faster paths in these
+utilities. With no `names`, run them all. Use `--list` to see the names.
+
+Results go to stdout, one line per case, with throughput where that makes
+sense. Use `--size` to scale the amount of data up or down.
+
+Some benchmarks also have a time budget; if any is missed, that's reported
+and the exit status is 1 (so this can be run from `make` or a git hook).
+
+=Benchmarks=
+
+* ''compressed'' -- `compressedIO.py`: stripping gzip'd and xz'd colored log
+lines (as `uncolorize` does for compressed files), with decompression in a
+reader thread and without, compared to just decompressing, and to stripping
+the uncompressed data. A truncated file must still give all the data before
+the damage.
+
+* ''convert'' -- `colorBatch.py`: converting a mix of color specs (hex,
+names, rgb(), hsv(), and hls()) to #RRGGBB and to hsv(), a block at a time
+with NumPy (as `colorConvert.py --batch` does), compared to the per-line
+way (`cconvert()` and `serialize()` on each line); the output must match
+(including for numbers like "0.5", ".5", "0x80", and octal "0200"), and
+be at least 10 times faster. Also checks that both ways accept (and agree
+on) the same odd cases (extra spaces, `hsva()`, long "#" forms) and reject
+the same ones (say, text after the ")"), and times parsing and formatting
+on their own.
+
+* ''downsample'' -- `colorQuantize.py`: building the quantization tables,
+loading them from the cache, and rewriting escape-heavy text (every word
+in its own 24-bit color) for 256 and 16 colors, compared to finding the
+nearest color by searching (which must give the same colors), and to just
+finding the escapes. Also `uncolorize --oformat 256` on a file, whose
+output must have the same lines as the input; and the same with `--jobs 2`
+(there are 2 or more chunks unless `--size` is small), which must match.
+
+* ''findname'' -- `findColorName.py`: finding the nearest rgb.txt name
+for a million random #RRGGBB colors (Euclidean, Manhattan, and OKLab), and
+checking that the brute-force and grid-index searches agree; compared to
+the Perl `findColorName`, which does one color per process.
+
+* ''html'' -- `ansiHtml.py`: converting colored log lines, `diff`-style
+lines, and lines with every word in its own 24-bit color, to HTML (as
+`uncolorize --oformat html` does), compared to the usual per-line way (each
+line on its own, and every colored run its own span with inline CSS).
+Reports speed and output size.
+
+* ''lsdir'' -- `lsColorsIndex.py`: listing a directory of synthetic files
+(made in a temporary directory), colored, with `os.scandir()` and only the
+needed stat()s, with 1 and 8 stat threads, compared to stat()ing every entry.
+
+* ''lsfilter'' -- `lsColorsIndex.py`: classifying and coloring a
+million synthetic paths with the compiled LS_COLORS index, compared to
+trying each LS_COLORS entry in turn.
+
+* ''metrics'' -- `colorDistance.py`: checks CIEDE2000 against the
+published reference pairs (Sharma et al. 2005), then times converting
+random colors to CIELAB and OKLab, the difference kernels (Euclidean,
+Delta E 1976, CIEDE2000, OKLab), and finding the nearest CSS color name
+by each.
+
+* ''namedb'' -- `colorNameDB.py`: building and loading the compiled
+color-name table, looking up names (directly and via `cconvert()`) and
+exact colors, and the startup time of a process that looks up one name,
+compared to importing `webcolors`.
+
+* ''palette'' -- `paletteIndex.py`: finding the nearest of 100K palette
+colors (as `colorConvert.py --palette` does) for a million random colors
+with the grid index, compared to brute force (every distance) on a sample;
+the answers must match, and there must be at least a million per minute.
+Also building the index, and loading it from the cache. Then the same for
+two palettes that don't fill their box (a tight cluster, and a gray ramp),
+where the index must not take much longer than brute force.
+
+* ''remap'' -- `sgrRemap.py`: rewriting the escapes in colored log lines
+by a remap table (keep some colors, drop the rest; and changing colors for a
+light background), a block at a time as `uncolorize --remap` does, compared
+to just removing them, and to working out each escape without the cache.
+
+* ''rules'' -- `colorRules.py`: highlighting throughput as the number of
+rules grows, compared to just copying the data. Also checks a rule that
+starts with a global flag like `(?i)`, and that `colorstring.py --rules`
+turns off effects (bold, underline) as well as colors after each match.
+
+* ''stats'' -- `escapeStats.py`: counting escapes by kind, SGR code, and
+foreground/background (as `uncolorize --stats` does), on colored log lines
+with 1 line in 1 and 1 in 10 colored, and on lines that also have other
+escapes; compared to just reading the file, and to just counting ESCs.
+
+* ''startup'' -- `colorstring.py`: wall time to run `colorstring.py -c red x`
+(best of `--size` runs, default 20), compared to starting Python at all and
+to just importing `colorstringCore.py`; plus the slowest imports, as
+reported by `python -X importtime`. Budget: `--budget` milliseconds for the
+`colorstring.py` run (default 150).
+
+* ''tokenizer'' -- `vtTokenizer.py`: removing all escapes from colored
+log lines with the VT parser, compared to removing just SGR escapes with a
+regex (as `uncolorize` does by default); and on text that also has
+titles, hyperlinks, and cursor movement (which the regex misses). First,
+checks that the regex shortcuts give the same tokens as the table alone,
+on random strings fed in random pieces. Also `uncolorize --drop` on a
+file, whose output must be what `stripEscapes()` gives (and then
+downsampled, with `--oformat 16`).
+
+* ''uncolorize'' -- `uncolorizeEngine.py`: removing color escapes and
+`man`-style overstrikes from colored log lines (as bytes), a block at a time,
+compared to the old way (decode, `readline()`, two `re.sub()`s, and
+`print()` per line), and to plain `bytes.replace()` of ESC; with every line
+colored, and with 1 line in 10 colored. Also from a memory-mapped file, and
+rewriting a file in place.
+
+* ''uncolorizeFiles'' -- `uncolorizeEngine.py` and `parallelChunks.py`:
+stripping many files (each to its own output file), with 1, 2, 4, ... up to
+the number of CPUs worker processes, as for `uncolorize --jobs N --outputDir D`.
+`--size` is the number of lines per file (there are 4 files per CPU). Also
+checks that `uncolorize --in-place` and `--outputSuffix` (with and without
+`--oformat 256` or `--drop`) leave text with no escapes exactly as it was.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+
+=Options=
+"""
+
+
+###############################################################################
+#
+def timeIt(fn, *fargs, reps:int=3):
+    """Run `fn(*fargs)` `reps` times. @return (best seconds, last result).
+    """
+    best = None
+    result = None
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        result = fn(*fargs)
+        elapsed = time.perf_counter() - t0
+        if (best is None or elapsed < best): best = elapsed
+    return best, result
+
+def report(label:str, secs:float, nBytes:int=0, nItems:int=0) -> None:
+    buf = "  %-40s %9.4fs" % (label, secs)
+    if (nBytes): buf += "  %9.1f MB/s" % (nBytes / secs / 1e6)
+    if (nItems): buf += "  %12.0f items/s" % (nItems / secs)
+    print(buf)
+
+def checkBudget(label:str, secs:float, budget:float) -> None:
+    if (secs <= budget):
+        print("  %-40s OK (budget %.4fs)" % (label, budget))
+    else:
+        print("  %-40s OVER BUDGET (%.4fs > %.4fs)" % (label, secs, budget))
+        failures.append(label)
+
+def checkSame(label:str, got, expected) -> None:
+    """Check that a result is exactly what it should be.
+    """
+    if (got == expected):
+        print("  %-40s OK" % (label))
+    else:
+        print("  %-40s DIFFERS" % (label))
+        failures.append(label)
+
+def makeWords(n:int, seed:int=1) -> list:
+    rnd = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [ "".join(rnd.choice(letters) for _ in range(rnd.randint(4, 10)))
+        for _ in range(n) ]
+
+def makeLogLines(n:int, seed:int=1) -> list:
+    """Make `n` fake log lines (bytes, without newlines).
+    """
+    rnd = random.Random(seed)
+    levels = [ "INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR" ]
+    vocab = makeWords(500, seed)
+    lines = []
+    for i in range(n):
+        words = " ".join(rnd.choice(vocab) for _ in range(rnd.randint(5, 15)))
+        lines.append(("2026-10-17 12:%02d:%02d.%03d [%s] 10.0.%d.%d %s" % (
+            (i // 60) % 60, i % 60, i % 1000, rnd.choice(levels),
+            rnd.randint(0, 255), rnd.randint(0, 255), words)).encode("utf-8"))
+    return lines
+
+
+###############################################################################
+#
+def benchRules() -> None:
+    import re
+    from colorRules import ColorRules
+    lines = makeLogLines(args.size or 100000)
+    nBytes = sum(len(rec) + 1 for rec in lines)
+    secs, _ = timeIt(lambda: b"\n".join(lines) + b"\n")
+    report("copy only (baseline)", secs, nBytes)
+
+    vocab = makeWords(5000, seed=2)
+    seqs = [ "\x1b[%dm" % (c) for c in range(31, 37) ]
+    for nRules in (1, 10, 100, 1000):
+        for kind in ("regex", "words"):
+            cr = ColorRules(seqFor=lambda name: seqs[int(name)])
+            cr.addRule("0", r"\bERROR\b")
+            for i in range(1, nRules):
+                if (kind == "regex"):
+                    cr.addRule(str(i % 6), r"\b%s\d*\b" % (vocab[i]))
+                else:
+                    cr.addWords(str(i % 6), vocab[i*3:i*3+3])
+            cr.compile()
+            secs, _ = timeIt(cr.highlightLines, lines)
+            report("%4d %s rules" % (nRules, kind), secs, nBytes)
+
+    # A rule starting with a global flag, after others (so not at the start).
+    cr = ColorRules(seqFor=lambda name: seqs[int(name)])
+    cr.addRule("0", r"\bWARN\b")
+    cr.addRule("1", r"(?i)\berror\b")
+    cr.compile()
+    sample = b"\n".join(lines[0:1000]) + b"\n"
+    checkSame("rule with (?i), not first", cr.highlightLines(lines[0:1000]),
+        re.sub(rb"\b(WARN|ERROR)\b", lambda mat: seqs[mat.group(1) == b"ERROR"].encode()
+        + mat.group(1) + cr.reset.encode(), sample))
+    checkRulesReset()
+
+def checkRulesReset() -> None:
+    """Check that `colorstring.py --rules` turns effects (not just colors)
+    off after each match: text after a bold or underlined match, and on the
+    next line, must be in the default style.
+    """
+    import os
+    import sys
+    import tempfile
+    import subprocess
+    import ansiHtml as ah
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tdir:
+        path = os.path.join(tdir, "rules.txt")
+        with open(path, "w", encoding="utf-8") as ofh:
+            ofh.write("red/bold \\bERROR\\b\nblue/underline \\bWARN\\b\n")
+        out = subprocess.run([ sys.executable, os.path.join(here, "colorstring.py"),
+            "--rules", path ], input=b"an ERROR here and a WARN there\nnext line\n",
+            stdout=subprocess.PIPE, check=False).stdout.decode("utf-8")
+    styles = []  # The style of each piece of text
+    style = ah.defaultStyle
+    parts = ah.sgrSplitRegex.split(out)
+    for i in range(0, len(parts), 2):
+        if (i): style = ah.applySGR(style, parts[i-1])
+        if (parts[i]): styles.append((parts[i], style))
+    after = [ st for text, st in styles if (text.startswith((" here", " there", "\n"))) ]
+    checkSame("rules: no effects after a match", (len(after) >= 2 and
+        all(st == ah.defaultStyle for st in after)), True)
+
+def benchFindName() -> None:
+    import os
+    import shutil
+    import subprocess
+    import numpy as np
+    import findColorName as fcn
+    import colorNameDB as cn
+    rgbFile = cn.findRgbFile()
+    if (rgbFile is None):
+        print("  No rgb.txt found; skipped.")
+        return
+    table = fcn.ColorNameTable.fromFile(rgbFile)
+    rng = np.random.default_rng(17)
+    n = args.size or 1000000
+    lines = [ "#%06x\n" % (x) for x in rng.integers(0, 1 << 24, n).tolist() ]
+    print("  %d names (%s), %d queries." % (len(table), rgbFile, n))
+    for metric in ("euclidean", "manhattan", "oklab"):
+        secs, _ = timeIt(fcn.findNames, table, lines, metric, reps=1)
+        report("find names, %s" % (metric), secs, 0, n)
+
+    # The brute-force and grid-index searches must agree.
+    from paletteIndex import GridIndex
+    rgb, _ = fcn.parseQueries(lines[0:20000])
+    grid = GridIndex(table.rgb)
+    for manhattan in (False, True):
+        if (not np.array_equal(table.nearestBrute(rgb, manhattan),
+            grid.nearest(rgb, manhattan=manhattan)[0])):
+            lg.error("findColorName brute force and grid index differ.")
+            failures.append("findname exactness")
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "findColorName")
+    if (shutil.which("perl") and os.path.isfile(script)):
+        def perlOnce():
+            subprocess.run([ "perl", script, "--file", rgbFile, "fa", "80", "72" ],
+                stdout=subprocess.DEVNULL, check=False)
+        secs, _ = timeIt(perlOnce)
+        report("Perl findColorName, 1 color per process", secs, 0, 1)
+        print("  %-40s %9.1fs" % ("(so %d colors would take)" % (n), secs * n))
+
+def benchLsFilter() -> None:
+    import re
+    import fnmatch
+    from lsColorsIndex import LSColorsIndex
+    entries = getLSColorsEntries()
+    lci = LSColorsIndex(entries)
+    nPaths = args.size or 1000000
+    rnd = random.Random(3)
+    exts = [ e.split("=")[0][1:] for e in entries if e.startswith("*") ]
+    exts += [ ".c", ".h", ".py", ".txt", ".md", "", ".o", ".json" ] * (len(exts) // 8 + 1)
+    dirs = [ "/".join(makeWords(rnd.randint(1, 4), seed=i)) for i in range(1000) ]
+    names = makeWords(5000, seed=4)
+    paths = [ ("./%s/%s%s" % (rnd.choice(dirs), rnd.choice(names), rnd.choice(exts))
+        ).encode("utf-8") for _ in range(nPaths) ]
+    nBytes = sum(len(p) + 1 for p in paths)
+    print("  %d LS_COLORS entries, %d paths." % (len(entries), nPaths))
+
+    secs, _ = timeIt(lambda: b"\n".join(paths) + b"\n")
+    report("copy only (baseline)", secs, nBytes, nPaths)
+    secs, _ = timeIt(lambda: [ lci.classify(p[p.rfind(b"/")+1:]) for p in paths ])
+    report("classify (index)", secs, nBytes, nPaths)
+    secs, _ = timeIt(lci.colorizeLines, paths)
+    report("colorizeLines (index)", secs, nBytes, nPaths)
+
+    # The old way: try every entry as a regex (on a sample; it's slow).
+    regexes = [ (re.compile(fnmatch.translate(e.split("=")[0]).encode("utf-8")),
+        e.split("=")[1]) for e in entries ]
+    def naive(sample):
+        for p in sample:
+            name = p[p.rfind(b"/")+1:]
+            for rx, code in regexes:
+                if (rx.match(name)): break
+    sample = paths[0:max(1, nPaths // 100)]
+    secs, _ = timeIt(naive, sample, reps=1)
+    report("try each entry (1% sample)", secs, 0, len(sample))
+
+def makeTruecolorLines(n:int, seed:int=5) -> list:
+    """Make `n` lines (str, without newlines) with each word in a 24-bit color.
+    """
+    rnd = random.Random(seed)
+    vocab = makeWords(500, seed)
+    lines = []
+    for _ in range(n):
+        words = []
+        for _ in range(rnd.randint(5, 15)):
+            words.append("\x1b[38;2;%d;%d;%dm%s" % (rnd.randrange(256),
+                rnd.randrange(256), rnd.randrange(256), rnd.choice(vocab)))
+        lines.append(" ".join(words) + "\x1b[0m")
+    return lines
+
+def makeColorSpecs(n:int, seed:int=9) -> list:
+    """Make `n` color specs (str, without newlines) in a mix of the forms
+    `colorConvert.py` reads: #RRGGBB, #RGB (and #RRRGGGBBB and
+    #RRRRGGGGBBBB), names, rgb(), hsv(), and hls().
+    Fractions are written with and without the leading "0", and rgb() has
+    a hex, a percent, and an octal number.
+    """
+    rnd = random.Random(seed)
+    names = [ "red", "navy", "aliceblue", "white", "black", "teal" ]
+    def frac():
+        f = "%.3f" % (rnd.random())
+        return f if rnd.randrange(2) else f[1:]
+    specs = []
+    for _ in range(n):
+        k = rnd.randrange(6)
+        if (k == 0): specs.append("#%06x" % (rnd.randrange(1 << 24)))
+        elif (k == 1):
+            width = rnd.choice((3, 9, 12))
+            specs.append("#%0*x" % (width, rnd.randrange(16 ** width)))
+        elif (k == 2): specs.append(rnd.choice(names))
+        elif (k == 3): specs.append("rgb(0x%02x, %d%%, 0%o)" % (
+            rnd.randrange(256), rnd.randrange(101), rnd.randrange(256)))
+        elif (k == 4): specs.append("hsv(%s, %s, %s)" % (frac(), frac(), frac()))
+        else: specs.append("hls(%s, %s, %s)" % (frac(), frac(), frac()))
+    return specs
+
+def benchConvert() -> None:
+    import io
+    import colorConvert as cc
+    import colorBatch as cb
+    specs = makeColorSpecs(args.size or 200000)
+    text = "\n".join(specs) + "\n"
+    print("  %d color specs, %d bytes." % (len(specs), len(text)))
+    def byLines(fmt):
+        ofh = io.StringIO()
+        for rec in io.StringIO(text):
+            print(cc.serialize(cc.cconvert(rec.strip()), fmt), file=ofh)
+        return ofh.getvalue()
+    def batch(fmt):
+        ofh = io.StringIO()
+        cb.convertStream(io.StringIO(text), ofh, fmt)
+        return ofh.getvalue()
+    for fmt in ("rgb6", "hsv"):
+        oldSecs, old = timeIt(byLines, fmt, reps=1)
+        report("per line, to %s (old)" % (fmt), oldSecs, len(text), len(specs))
+        secs, new = timeIt(batch, fmt)
+        report("batch, to %s" % (fmt), secs, len(text), len(specs))
+        print("  %-40s %9.1fx" % ("speedup", oldSecs / secs))
+        if (new != old):
+            lg.error("Batch output differs from per-line output (%s).", fmt)
+            failures.append("convert output")
+        if (oldSecs / secs < 10):
+            failures.append("convert speedup (%s)" % (fmt))
+    checkConvertEdges()
+    rgb, _ = cb.parseColors(specs)
+    secs, _ = timeIt(cb.parseColors, specs)
+    report("batch, parse only", secs, len(text), len(specs))
+    secs, _ = timeIt(cb.formatColors, rgb, "rgb6")
+    report("batch, format rgb6 only", secs, 0, len(specs))
+
+# Specs that both ways of converting must accept (and agree on), or reject.
+convertEdgeSpecs = [ " #fff ", "  red", "hsva(.5, 1, 1, .5)", "rgb(1 ,2,3)",
+    "rgb( 1 , 2 , 3 )", "rgba(1 ,2 ,3 ,4 )", "rgb(1,2,3)\t", "#" + "f" * 15,
+    "#" + "1234567890abcd" * 3 ]
+convertBadSpecs = [ "rgb(1,2,3)x", "rgb(1,2,3) x", "hsv(1,2,3", "#+f+f+f",
+    "#ff", "nosuchcolor" ]
+
+def checkConvertEdges() -> None:
+    import colorConvert as cc
+    import colorBatch as cb
+    for fmt in ("rgb6", "hsv"):
+        old = "".join(cc.serialize(cc.cconvert(s), fmt) + "\n" for s in convertEdgeSpecs)
+        new, badLines = cb.convertBlock(convertEdgeSpecs, fmt)
+        checkSame("edge cases accepted, to %s" % (fmt), (new, badLines), (old, []))
+    rejected = []
+    for s in convertBadSpecs:
+        try:
+            cc.cconvert(s)
+        except ValueError:
+            rejected.append(s)
+    _, bad = cb.parseColors(convertBadSpecs)
+    checkSame("edge cases rejected", (rejected, bad.tolist()),
+        (convertBadSpecs, [ True ] * len(convertBadSpecs)))
+
+def benchMetrics() -> None:
+    import numpy as np
+    import colorDistance as cd
+    import colorBatch as cb
+    misses = cd.checkCIEDE2000()
+    print("  CIEDE2000 reference pairs: %d of %d match." %
+        (len(cd.ciede2000Pairs) - len(misses), len(cd.ciede2000Pairs)))
+    for pairNum, expected, got in misses:
+        lg.error("CIEDE2000 pair %d: expected %.4f, got %.4f.", pairNum, expected, got)
+    if (misses):
+        failures.append("CIEDE2000 reference pairs")
+
+    n = args.size or 1000000
+    rng = np.random.default_rng(13)
+    rgb1 = rng.random((n, 3))
+    rgb2 = rng.random((n, 3))
+    for space, fn in (("lab", cd.rgbToLab), ("oklab", cd.rgbToOklab)):
+        secs, _ = timeIt(fn, rgb1)
+        report("convert to %s" % (space), secs, 0, n)
+    for metric in cd.metrics:
+        c1 = cd.convert(rgb1, metric)
+        c2 = cd.convert(rgb2, metric)
+        secs, _ = timeIt(cd.difference, c1, c2, metric)
+        report("difference, %s" % (metric), secs, 0, n)
+
+    # Nearest CSS color name (as `colorConvert.py --oformat name`).
+    queries = rgb1[0:max(1, n // 10)]
+    for metric in cd.metrics:
+        pal = cb.getNamePalette(metric)
+        secs, _ = timeIt(pal.nearest, queries)
+        report("nearest of %d names, %s" % (len(pal), metric), secs, 0, len(queries))
+
+def benchNameDB() -> None:
+    import os
+    import sys
+    import tempfile
+    import subprocess
+    import colorNameDB as cn
+    import colorConvert as cc
+    with tempfile.TemporaryDirectory() as tdir:
+        path = os.path.join(tdir, "colornames.bin")
+        secs, _ = timeIt(cn.build, path)
+        report("build (webcolors, rgb.txt, ANSI)", secs)
+        db = cn.ColorNameDB(path)
+        print("  %d colors, %d names, %d bytes." % (len(db), db.nKeys, os.path.getsize(path)))
+        secs, _ = timeIt(cn.ColorNameDB, path)
+        report("load (mmap)", secs)
+
+        keys = [ k for k, _ in db.keys() ]
+        names = (keys * (200000 // len(keys) + 1))[0:200000]
+        secs, _ = timeIt(lambda: [ db.lookup(n) for n in names ])
+        report("name -> rgb", secs, 0, len(names))
+        secs, _ = timeIt(lambda: [ cc.cconvert(n) for n in names ])
+        report("colorConvert.cconvert(name)", secs, 0, len(names))
+        colors = [ db.lookup(n) for n in names ]
+        secs, _ = timeIt(lambda: [ db.nameFor(c) for c in colors ])
+        report("rgb -> name (exact)", secs, 0, len(colors))
+
+        # Startup: a new process looking up one name, vs. importing webcolors
+        # (all with `logging`, which every script here loads anyway).
+        here = os.path.dirname(os.path.abspath(__file__))
+        def run(code):
+            subprocess.run([ sys.executable, "-c", "import logging; " + code ],
+                cwd=here, check=False)
+        secs, _ = timeIt(run, "import colorNameDB as c; c.ColorNameDB(%r).lookup('salmon')" % (path))
+        report("startup + lookup, colorNameDB", secs)
+        secs, _ = timeIt(run, "import webcolors; webcolors.name_to_hex('salmon')")
+        report("startup + lookup, webcolors", secs)
+        secs, _ = timeIt(run, "pass")
+        report("startup, Python and logging alone", secs)
+
+def benchPalette() -> None:
+    import os
+    import tempfile
+    import numpy as np
+    import paletteIndex as pi
+    rng = np.random.default_rng(11)
+    palRGB = rng.random((100000, 3))
+    nQueries = args.size or 1000000
+    queries = rng.random((nQueries, 3))
+    print("  %d palette colors, %d queries." % (len(palRGB), nQueries))
+    secs, index = timeIt(pi.GridIndex, palRGB)
+    report("build index (grid %d^3)" % (index.gridSize), secs, 0, len(palRGB))
+
+    with tempfile.TemporaryDirectory() as tdir:
+        path = os.path.join(tdir, "palette.txt")
+        with open(path, "w", encoding="utf-8") as ofh:
+            for r, g, b in np.round(palRGB * 255).astype(int).tolist():
+                ofh.write("#%02x%02x%02x\n" % (r, g, b))
+        secs, _ = timeIt(pi.Palette.fromFile, path, reps=1)
+        report("read palette file and build", secs, 0, len(palRGB))
+        pi.Palette.fromFile(path, useCache=True)
+        secs, _ = timeIt(pi.Palette.fromFile, path, "utf-8", True)
+        report("load palette from cache", secs, 0, len(palRGB))
+
+    secs, (which, dist2) = timeIt(index.nearest, queries)
+    report("nearest, with index", secs, 0, nQueries)
+    perMinute = nQueries / secs * 60
+    print("  %-40s %9.1fM" % ("queries per minute", perMinute / 1e6))
+    if (perMinute < 1e6):
+        failures.append("palette queries per minute")
+
+    # Brute force (every distance, but still NumPy) on a sample, to check.
+    sample = queries[0:2000]
+    bsecs, brute = timeIt(bruteForceNearest, palRGB, sample, reps=1)
+    report("nearest, brute force (sample)", bsecs, 0, len(sample))
+    print("  %-40s %9.1fx" % ("speedup", (bsecs / len(sample)) / (secs / nQueries)))
+    checkNearest("palette exactness", palRGB, sample, dist2[0:len(sample)], brute)
+
+    # Palettes that don't fill their box: the index should fall back to
+    # about what brute force costs, not far more.
+    shapes = {
+        "clustered": 0.45 + 0.1 * rng.random((100000, 3)),
+        "gray ramp": np.repeat(rng.random((100000, 1)), 3, axis=1),
+    }
+    for shape, pal in shapes.items():
+        index = pi.GridIndex(pal)
+        secs, (_, dist2) = timeIt(index.nearest, sample, reps=1)
+        report("nearest, %s, with index" % (shape), secs, 0, len(sample))
+        bsecs, brute = timeIt(bruteForceNearest, pal, sample, reps=1)
+        report("nearest, %s, brute force" % (shape), bsecs, 0, len(sample))
+        checkNearest("palette exactness (%s)" % (shape), pal, sample, dist2, brute)
+        if (secs > 2 * bsecs + 0.1):
+            failures.append("palette time (%s)" % (shape))
+
+def bruteForceNearest(pal, q):
+    d2 = ((q * q).sum(axis=1)[:, None] - 2 * (q @ pal.T)
+        + (pal * pal).sum(axis=1)[None, :])
+    return d2.argmin(axis=1)
+
+def checkNearest(label:str, pal, q, dist2, brute) -> None:
+    """Check the index's squared distances against brute force's choices.
+    """
+    import numpy as np
+    diff = q - pal[brute]
+    if (not np.allclose(dist2, (diff * diff).sum(axis=1), rtol=0, atol=1e-12)):
+        lg.error("Index and brute-force nearest colors differ (%s).", label)
+        failures.append(label)
+
+def benchDownsample() -> None:
+    import os
+    import tempfile
+    import colorQuantize as cq
+    lines = makeTruecolorLines(args.size or 20000)
+    text = "\n".join(lines) + "\n"
+    nEscapes = text.count("\x1b[38;2;")
+    print("  %d lines, %d truecolor escapes." % (len(lines), nEscapes))
+
+    oldCache = os.environ.get("XDG_CACHE_HOME")
+    with tempfile.TemporaryDirectory() as tdir:
+        os.environ["XDG_CACHE_HOME"] = tdir
+        try:
+            for target in ("256", "16"):
+                secs, _ = timeIt(cq.buildTable, target, reps=1)
+                report("build %s table" % (target), secs)
+                cq.SGRDownsampler(target)
+                secs, _ = timeIt(cq.SGRDownsampler, target)
+                report("load %s table (mmap from cache)" % (target), secs)
+        finally:
+            if (oldCache is None): del os.environ["XDG_CACHE_HOME"]
+            else: os.environ["XDG_CACHE_HOME"] = oldCache
+
+    secs, _ = timeIt(lambda: cq.sgrRegex.sub(lambda mat: mat.group(0), text))
+    report("find escapes only (baseline)", secs, len(text), nEscapes)
+    for target in ("256", "16"):
+        ds = cq.SGRDownsampler(target, useCache=False)
+        secs, _ = timeIt(ds.rewrite, text)
+        report("rewrite for %s (table)" % (target), secs, len(text), nEscapes)
+        sample = text[0:len(text) // 20]
+        expected = ds.rewrite(sample)
+
+        # The same, but searching for each nearest color (on a sample).
+        cands = cq.candidates(target)
+        def search(r, g, b):
+            return min(cands, key=lambda c: (c[1][0]-r)**2 + (c[1][1]-g)**2 + (c[1][2]-b)**2)[0]
+        ds.lookup = search
+        secs, out = timeIt(ds.rewrite, sample, reps=1)
+        report("rewrite for %s (search, 5%% sample)" % (target), secs, len(sample),
+            sample.count("\x1b[38;2;"))
+        if (out != expected):
+            print("  Table and search give different colors!")
+            failures.append("downsample %s exactness" % (target))
+
+    # Colon (ITU) forms, mixed with ";" ones, and components over 255.
+    ds = cq.SGRDownsampler("16", useCache=False)
+    checkSame("colon forms for 16", ds.rewrite(
+        "\x1b[1;38;2;255;0;0;48:2::0:0:255mX\x1b[38:2:0:0:255;4:3mY"),
+        "\x1b[1;91;44mX\x1b[34;4:3mY")
+    checkSame("components over 255 for 16", ds.rewrite(
+        "\x1b[38;2;999;0;256mX\x1b[48;5;300mY"), ds.rewrite(
+        "\x1b[38;2;255;0;255mX\x1b[48;5;255mY"))
+
+    # The whole program, which must keep the lines as they were (even
+    # CRLFs, and a last line with no newline).
+    mixed = text[:-1].replace("\n", "\r\n", len(lines) // 2)
+    data = mixed.encode("utf-8")
+    secs, out = runUncolorize([ "--oformat", "256" ], data)
+    report("uncolorize --oformat 256", secs, len(data))
+    checkSame("uncolorize --oformat 256 output", out,
+        cq.SGRDownsampler("256", useCache=False).rewrite(mixed).encode("utf-8"))
+    secs, jobsOut = runUncolorize([ "--oformat", "256", "--jobs", "2" ], data)
+    report("uncolorize --oformat 256 --jobs 2", secs, len(data))
+    checkSame("uncolorize --jobs 2 output", jobsOut, out)
+
+def makeColoredLogData(n:int, every:int=1) -> bytes:
+    """Log lines with the level colored on every `every`th line, and
+    `man`-style bold and underline on every 50th.
+    """
+    levelColors = { b"[INFO]": b"32", b"[DEBUG]": b"2", b"[WARN]": b"1;33",
+        b"[ERROR]": b"1;31" }
+    lines = []
+    for i, rec in enumerate(makeLogLines(n)):
+        if (i % every == 0):
+            for level, code in levelColors.items():
+                rec = rec.replace(level, b"\x1b[" + code + b"m" + level + b"\x1b[0m")
+        if (i % 50 == 0):
+            rec = b"N\bNA\bAM\bME\bE _\bf_\bi_\bl_\be " + rec
+        lines.append(rec)
+    return b"\n".join(lines) + b"\n"
+
+def runUncolorize(options:list, data:bytes) -> tuple:
+    """Run the `uncolorize` script with `options`, on a file of `data`.
+    @return (seconds, what it wrote to stdout).
+    """
+    import os
+    import subprocess
+    import tempfile
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tdir:
+        path = os.path.join(tdir, "input.txt")
+        with open(path, "wb") as fh:
+            fh.write(data)
+        t0 = time.perf_counter()
+        res = subprocess.run([ sys.executable, os.path.join(here, "uncolorize") ] +
+            options + [ path ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        secs = time.perf_counter() - t0
+    if (res.returncode):
+        print("  uncolorize %s failed: %s" % (" ".join(options),
+            res.stderr.decode("utf-8", "replace").strip()))
+    return secs, res.stdout
+
+def benchUncolorize() -> None:
+    import io
+    import os
+    import re
+    import tempfile
+    import uncolorizeEngine as ue
+
+    def byLines(data):
+        sgr = re.compile(r"\x1b\[[0-9;:]*m")
+        ifh = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+        ofh = io.StringIO()
+        while (True):
+            rec = ifh.readline()
+            if (not rec): break
+            rec = re.sub(r".\x08", "", rec)
+            print(sgr.sub("", rec), end="", file=ofh)
+        return ofh.getvalue().encode("utf-8")
+
+    for every in (1, 10):
+        data = makeColoredLogData(args.size or 500000, every)
+        print("  Colored 1 line in %d: %d bytes, %d escapes." % (
+            every, len(data), data.count(b"\x1b")))
+        lineSecs, expected = timeIt(byLines, data, reps=1)
+        report("line at a time (old)", lineSecs, len(data))
+        secs, _ = timeIt(lambda: data.replace(b"\x1b", b""))
+        report("just delete ESCs (baseline)", secs, len(data))
+
+        ofh = io.BytesIO()
+        for blockSize in (1 << 16, 1 << 20):
+            def byBlocks():
+                ofh.seek(0)
+                ofh.truncate()
+                ue.uncolorizeStream(io.BytesIO(data), ofh, unman=True, blockSize=blockSize)
+            secs, _ = timeIt(byBlocks)
+            report("block engine, %dK blocks" % (blockSize >> 10), secs, len(data))
+            if (ofh.getvalue() != expected):
+                print("  Output differs from the line-at-a-time output!")
+                failures.append("uncolorize output")
+        print("  %-40s %9.1fx (target 10x)" % ("speedup", lineSecs / secs))
+
+        with tempfile.TemporaryDirectory() as tdir:
+            path = os.path.join(tdir, "colored.log")
+            with open(path, "wb") as fh:
+                fh.write(data)
+            with open(os.devnull, "wb") as ofh:
+                secs, _ = timeIt(ue.uncolorizeMapped, path, ofh, True)
+            report("memory-mapped file to /dev/null", secs, len(data))
+            secs, _ = timeIt(ue.uncolorizeInPlace, path, True, reps=1)
+            report("in place", secs, len(data))
+            with open(path, "rb") as fh:
+                if (fh.read() != expected):
+                    print("  In-place output differs from the line-at-a-time output!")
+                    failures.append("uncolorize in place")
+
+def tokenizeInPieces(tk, s:str, cuts:list) -> list:
+    """Tokenize `s` in pieces (split at `cuts`), with `tk`; and join runs
+    of text tokens.
+    """
+    tokens = []
+    for start, end in zip([ 0 ] + cuts, cuts + [ len(s) ]):
+        for tok in tk.tokenize(s[start:end]):
+            if (tok[0] == "text" and tokens and tokens[-1][0] == "text"):
+                tokens[-1] = ("text", "", tokens[-1][2] + tok[2])
+            else:
+                tokens.append(tok)
+    tokens.extend(tk.finish())
+    return tokens
+
+def checkTokenizerShortcuts(n:int, seed:int=11) -> None:
+    """Check that the tokenizer's regex shortcuts give the same tokens as
+    the table alone, on `n` random strings, each fed in random pieces.
+    """
+    import vtTokenizer as vt
+    rnd = random.Random(seed)
+    alphabet = ("ab \t\n\r" * 3 + "\x1b" * 6 + "[]\\" * 2 +
+        "PX^_()#;:0123456789m?<=>!\"$ABHJKlq~\x07\x18\x1a\x00\x08\x7f" +
+        "\x90\x98\x9b\x9c\x9d\u00e9\u4e2d")
+    nBad = 0
+    for c1 in (False, True):
+        fast = vt.VTTokenizer(c1=c1)
+        slow = vt.VTTokenizer(c1=c1, shortcuts=False)
+        for _ in range(n):
+            s = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 60)))
+            cuts = sorted(rnd.sample(range(1, len(s) + 1), min(len(s), rnd.randint(0, 3))))
+            if (tokenizeInPieces(fast, s, cuts) != tokenizeInPieces(slow, s, [])):
+                nBad += 1
+                if (nBad <= 3): print("    Tokens differ for %r (cut at %s)." % (s, cuts))
+    checkSame("regex shortcuts = table (%d random)" % (2 * n), nBad, 0)
+
+def benchTokenizer() -> None:
+    import re
+    import vtTokenizer as vt
+    checkTokenizerShortcuts(20000)
+    sgr = re.compile(r"\x1b\[[0-9;:]*m")
+    plain = makeColoredLogData(args.size or 100000).decode("utf-8")
+    lines = plain.split("\n")
+    for i in range(0, len(lines), 5):
+        lines[i] = ("\x1b]0;job %d\x07\x1b[2K\x1b[1G\x1b]8;;http://example.com/%d\x1b\\"
+            "link\x1b]8;;\x1b\\ \x1b(0q\x1b(B" % (i, i)) + lines[i]
+    mixed = "\n".join(lines)
+    for label, text in (("colored logs", plain), ("with other escapes", mixed)):
+        print("  %s: %d chars, %d ESCs." % (label, len(text), text.count("\x1b")))
+        secs, out = timeIt(lambda: sgr.sub("", text))
+        report("SGR regex", secs, len(text))
+        print("    (%d ESCs left)" % (out.count("\x1b")))
+        secs, out = timeIt(vt.stripEscapes, text)
+        report("VT tokenizer, all escapes", secs, len(text))
+        print("    (%d ESCs left)" % (out.count("\x1b")))
+        secs, _ = timeIt(lambda: sum(1 for _ in vt.tokenize(text)))
+        report("VT tokenizer, just tokens", secs, len(text))
+
+    # The whole program, on a file that ends partway through an escape.
+    mixed += "\x1b]8;;http://example.com/cut-off"
+    data = mixed.encode("utf-8")
+    for drop in ("all", "sgr"):
+        secs, out = runUncolorize([ "--drop", drop ], data)
+        report("uncolorize --drop %s" % (drop), secs, len(data))
+        checkSame("uncolorize --drop %s output" % (drop), out,
+            vt.stripEscapes(mixed, drop=vt.parseKinds(drop)).encode("utf-8"))
+    from colorQuantize import SGRDownsampler
+    secs, out = runUncolorize([ "--drop", "osc,csi", "--oformat", "16" ], data)
+    report("uncolorize --drop osc,csi --oformat 16", secs, len(data))
+    checkSame("uncolorize --drop ... --oformat 16 output", out,
+        SGRDownsampler("16", useCache=False).rewrite(vt.stripEscapes(
+        mixed, drop=vt.parseKinds("osc,csi"))).encode("utf-8"))
+
+def makeDiffLines(n:int, seed:int=7) -> str:
+    """Lines like `git diff --color`: each line colored (and reset) on its
+    own, in runs of the same color.
+    """
+    rnd = random.Random(seed)
+    vocab = makeWords(500, seed)
+    lines = []
+    while (len(lines) < n):
+        code, mark = rnd.choice([ ("31", "-"), ("32", "+"), ("36", "@@"), ("", " ") ])
+        for _ in range(rnd.randint(1, 8)):
+            text = mark + " ".join(rnd.choice(vocab) for _ in range(rnd.randint(1, 6)))
+            lines.append("\x1b[%sm%s\x1b[m" % (code, text) if code else text)
+    return "\n".join(lines) + "\n"
+
+def benchCompressed() -> None:
+    import io
+    import os
+    import gzip
+    import lzma
+    import zlib
+    import tempfile
+    import compressedIO as ci
+    import uncolorizeEngine as ue
+    data = makeColoredLogData(args.size or 500000)
+    secs, _ = timeIt(lambda: ue.uncolorizeStream(io.BytesIO(data), io.BytesIO(), True))
+    report("uncompressed (baseline)", secs, len(data))
+    with tempfile.TemporaryDirectory() as tdir:
+        for kind, compress in (("gz", gzip.compress), ("xz", lzma.compress)):
+            path = os.path.join(tdir, "colored.log." + kind)
+            with open(path, "wb") as fh:
+                fh.write(compress(data))
+            print("  %s: %d bytes, %d compressed." % (kind, len(data), os.path.getsize(path)))
+            def decompressOnly():
+                with ci.openBinary(path, readAhead=False) as ifh:
+                    while (ifh.read(1 << 20)): pass
+            secs, _ = timeIt(decompressOnly)
+            report("just decompress", secs, len(data))
+            for readAhead in (False, True):
+                def strip():
+                    ofh = io.BytesIO()
+                    with ci.openBinary(path, readAhead=readAhead) as ifh:
+                        ue.uncolorizeStream(ifh, ofh, unman=True)
+                    return ofh.getvalue()
+                secs, out = timeIt(strip)
+                report("strip, %s reader thread" % ("with" if readAhead else "no"),
+                    secs, len(data))
+            if (out != ue.BlockUncolorizer(unman=True).strip(data)):
+                print("  Output differs from stripping the uncompressed data!")
+                failures.append("compressed output")
+            # A truncated file should give all it can (like zcat), then an error.
+            with open(path, "rb") as fh:
+                head = fh.read(os.path.getsize(path) // 2)
+            with open(path, "wb") as fh:
+                fh.write(head)
+            expected = (zlib.decompressobj(31) if (kind == "gz")
+                else lzma.LZMADecompressor()).decompress(head)
+            for readAhead in (False, True):
+                ofh = io.BytesIO()
+                with ci.openBinary(path, readAhead=readAhead) as ifh:
+                    try:
+                        ue.uncolorizeStream(ifh, ofh)
+                    except ci.readErrors():
+                        pass
+                checkSame("truncated %s, %s reader thread" % (
+                    kind, "with" if readAhead else "no"), ofh.getvalue(),
+                    ue.BlockUncolorizer().strip(expected))
+
+def benchHtml() -> None:
+    import io
+    import html
+    import ansiHtml as ah
+
+    def byLines(text):
+        conv = ah.HtmlConverter(None)
+        buf = []
+        for rec in text.splitlines():
+            style = ah.defaultStyle
+            parts = ah.sgrSplitRegex.split(html.escape(rec, quote=False))
+            for i in range(0, len(parts), 2):
+                if (i): style = ah.applySGR(style, parts[i-1])
+                if (not parts[i]): continue
+                css = conv.styleCSS(style)
+                if (css): buf.append('<span style="%s">%s</span>' % (css, parts[i]))
+                else: buf.append(parts[i])
+            buf.append("\n")
+        return "<pre>" + "".join(buf) + "</pre>"
+
+    n = args.size or 200000
+    for label, text in (
+        ("colored logs", makeColoredLogData(n).decode("utf-8")),
+        ("diff-style lines", makeDiffLines(n)),
+        ("24-bit color words", "\n".join(makeTruecolorLines(n // 4)) + "\n")):
+        print("  %s: %d chars, %d ESCs." % (label, len(text), text.count("\x1b")))
+        secs, out = timeIt(byLines, text, reps=1)
+        report("per line, inline CSS", secs, len(text))
+        print("    (%d chars of HTML)" % (len(out)))
+        def stream():
+            ofh = io.StringIO()
+            conv = ah.HtmlConverter(ofh)
+            conv.feedStream(io.StringIO(text))
+            conv.finish()
+            return ofh.getvalue()
+        secs, out2 = timeIt(stream)
+        report("stream, CSS classes", secs, len(text))
+        print("    (%d chars of HTML, %.0f%% of the per-line size)" % (
+            len(out2), 100.0 * len(out2) / len(out)))
+
+def benchRemap() -> None:
+    import io
+    import uncolorizeEngine as ue
+    import sgrRemap as sr
+    data = makeColoredLogData(args.size or 500000)
+    nEscapes = data.count(b"\x1b")
+    print("  %d bytes, %d escapes." % (len(data), nEscapes))
+    secs, _ = timeIt(lambda: ue.uncolorizeStream(io.BytesIO(data), io.BytesIO()))
+    report("remove all (baseline)", secs, len(data), nEscapes)
+    for rules in ("31=31, 1=1, *=", "light"):
+        rm = sr.SGRRemapper(rules)
+        secs, _ = timeIt(lambda: ue.uncolorizeStream(io.BytesIO(data), io.BytesIO(),
+            rewrite=rm.rewriteBytes))
+        report("remap '%s'" % (rules), secs, len(data), nEscapes)
+    def uncached():
+        return sr.sgrRegexBytes.sub(lambda mat: rm.rewriteParams(
+            mat.group(1).decode("ascii")).encode("ascii"), data)
+    secs, _ = timeIt(uncached, reps=1)
+    report("remap 'light', no cache", secs, len(data), nEscapes)
+
+def benchStats() -> None:
+    import os
+    import tempfile
+    from escapeStats import EscapeStats
+    data = makeColoredLogData(args.size or 500000)
+    lines = data.split(b"\n")
+    for i in range(0, len(lines), 5):
+        lines[i] = b"\x1b]0;job\x07\x1b[2K\x1b(0q\x1b(B" + lines[i]
+    for label, text in (
+        ("colored 1 line in 1", data),
+        ("colored 1 line in 10", makeColoredLogData(args.size or 500000, 10)),
+        ("with other escapes", b"\n".join(lines))):
+        print("  %s: %d bytes, %d ESCs." % (label, len(text), text.count(b"\x1b")))
+        secs, _ = timeIt(lambda: text.count(b"\x1b"))
+        report("just count ESCs (baseline)", secs, len(text))
+        with tempfile.TemporaryDirectory() as tdir:
+            path = os.path.join(tdir, "colored.log")
+            with open(path, "wb") as fh:
+                fh.write(text)
+            def readAll():
+                with open(path, "rb") as ifh:
+                    while (ifh.read(1 << 24)): pass
+            secs, _ = timeIt(readAll)
+            report("just read the file", secs, len(text))
+            def stats():
+                es = EscapeStats()
+                es.addFile(path)
+                return es.report()
+            secs, rep = timeIt(stats)
+            report("escape stats", secs, len(text))
+        nCounted = sum(k["count"] for k in rep["kinds"].values())
+        if (nCounted < text.count(b"\x1b") - text.count(b"\x1b\\")):
+            print("  Only %d escapes counted!" % (nCounted))
+            failures.append("stats count")
+
+def uncolorizeOneFile(task:tuple) -> tuple:
+    """Worker for benchUncolorizeFiles().
+    """
+    import uncolorizeEngine as ue
+    return ue.uncolorizeToPath(*task, unman=True)
+
+def benchUncolorizeFiles() -> None:
+    import os
+    import tempfile
+    import parallelChunks as pc
+    nCPUs = os.cpu_count() or 1
+    data = makeColoredLogData(args.size or 20000, 10)
+    nFiles = 4 * nCPUs
+    print("  %d CPUs, %d files of %d bytes." % (nCPUs, nFiles, len(data)))
+    with tempfile.TemporaryDirectory() as tdir:
+        tasks = []
+        for i in range(nFiles):
+            path = os.path.join(tdir, "job%04d.log" % (i))
+            with open(path, "wb") as fh:
+                fh.write(data)
+            tasks.append( (path, path + ".clean") )
+        jobs = 1
+        base = None
+        while (True):
+            secs, _ = timeIt(lambda: list(pc.mapChunks(uncolorizeOneFile, tasks,
+                jobs, ordered=False)), reps=1)
+            if (base is None): base = secs
+            report("%d jobs (%.1fx)" % (jobs, base / secs), secs, len(data) * nFiles)
+            if (jobs >= nCPUs): break
+            jobs = min(nCPUs, jobs * 2)
+
+        # Text with no escapes must come out byte for byte the same, in place
+        # and to per-file outputs (by the byte path, and the line path).
+        import subprocess
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uncolorize")
+        plain = b"\r\n".join(makeLogLines(1000)) + b"\n\nlast line, no newline"
+        for label, options in (
+            ("--in-place", [ "--in-place" ]),
+            ("to .out", [ "--outputSuffix", ".out" ]),
+            ("--oformat 256 to .out", [ "--outputSuffix", ".out", "--oformat", "256" ]),
+            ("--drop all to .out", [ "--outputSuffix", ".out", "--drop", "all" ])):
+            path = os.path.join(tdir, "plain.txt")
+            with open(path, "wb") as fh:
+                fh.write(plain)
+            subprocess.run([ sys.executable, script ] + options + [ path ],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            outPath = path if ("--in-place" in options) else path + ".out"
+            with open(outPath, "rb") as fh:
+                checkSame("plain text, %s" % (label), fh.read(), plain)
+
+def benchLsDir() -> None:
+    import os
+    import io
+    import tempfile
+    from lsColorsIndex import LSColorsIndex
+    lci = LSColorsIndex(getLSColorsEntries())
+    nFiles = args.size or 100000
+    exts = [ ".c", ".py", ".txt", ".tar", ".jpg", "" ]
+    with tempfile.TemporaryDirectory() as tdir:
+        for i in range(nFiles):
+            path = os.path.join(tdir, "f%07d%s" % (i, exts[i % len(exts)]))
+            open(path, "wb").close()
+            if (i % 10 == 0): os.chmod(path, 0o755)
+            elif (i % 50 == 1): os.mkdir(path + ".d")
+        nFiles = len(os.listdir(tdir))
+        print("  %d entries in %s." % (nFiles, tdir))
+
+        def statAll():
+            return [ os.lstat(os.path.join(tdir, name)) for name in os.listdir(tdir) ]
+        secs, _ = timeIt(statAll)
+        report("listdir + lstat every entry", secs, 0, nFiles)
+        for threads in (1, 8):
+            secs, _ = timeIt(lambda: lci.colorizeDirectory(tdir, io.BytesIO(), threads=threads))
+            report("colorizeDirectory, %d thread(s)" % (threads), secs, 0, nFiles)
+        noStat = LSColorsIndex([ e for e in getLSColorsEntries()
+            if e.split("=")[0] not in ("ex", "su", "sg", "mh", "st", "tw", "ow", "or") ])
+        secs, _ = timeIt(lambda: noStat.colorizeDirectory(tdir, io.BytesIO()))
+        report("colorizeDirectory, no mode-bit codes", secs, 0, nFiles)
+
+def benchStartup() -> None:
+    import os
+    import subprocess
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(here, "colorstring.py")
+    reps = args.size or 20
+    cases = [
+        ("python -c pass (baseline)", [ sys.executable, "-c", "pass" ]),
+        ("import colorstringCore", [ sys.executable, "-c", "import colorstringCore" ]),
+        ("colorstring.py -c red x", [ sys.executable, script, "-c", "red", "x" ]),
+    ]
+    for label, cmd in cases:
+        secs, _ = timeIt(lambda: subprocess.run(cmd, cwd=here,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), reps=reps)
+        report(label, secs)
+    checkBudget("colorstring.py -c red x", secs, args.budget / 1000.0)
+
+    # Lines of -X importtime output look like:
+    #     import time: self [us] | cumulative | imported package
+    res = subprocess.run([ sys.executable, "-X", "importtime", script, "-c", "red", "x" ],
+        cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for rec in res.stderr.splitlines():
+        parts = rec.split("|")
+        if (len(parts) == 3 and parts[1].strip().isdigit()):
+            rows.append( (int(parts[1]), parts[2].rstrip()) )
+    print("  Slowest imports (cumulative microseconds):")
+    for cumulative, name in sorted(rows, reverse=True)[0:8]:
+        print("    %8d %s" % (cumulative, name))
+
+def getLSColorsEntries() -> list:
+    import os
+    from subprocess import check_output, CalledProcessError
+    lsc = os.environ.get("LS_COLORS")
+    if (not lsc):
+        try:
+            out = check_output([ "dircolors", "-b" ]).decode("utf-8")
+            lsc = out.split("'")[1]
+        except (CalledProcessError, OSError, IndexError):
+            lsc = "di=01;34:ln=01;36:ex=01;32:*.tar=01;31:*.gz=01;31:*.jpg=01;35"
+    return [ x for x in lsc.split(":") if x ]
+
+benchmarks = {
+    "compressed": benchCompressed,
+    "convert"   : benchConvert,
+    "downsample": benchDownsample,
+    "findname"  : benchFindName,
+    "html"      : benchHtml,
+    "lsdir"     : benchLsDir,
+    "lsfilter"  : benchLsFilter,
+    "metrics"   : benchMetrics,
+    "namedb"    : benchNameDB,
+    "palette"   : benchPalette,
+    "remap"     : benchRemap,
+    "rules"     : benchRules,
+    "startup"   : benchStartup,
+    "stats"     : benchStats,
+    "tokenizer" : benchTokenizer,
+    "uncolorize": benchUncolorize,
+    "uncolorizeFiles": benchUncolorizeFiles,
+}
+
+
+###############################################################################
+# Main
+#
+def processOptions():
+    import argparse
+    try:
+        from BlockFormatter import BlockFormatter
+        parser = argparse.ArgumentParser(
+            description=descr, formatter_class=BlockFormatter)
+    except ImportError:
+        parser = argparse.ArgumentParser(description=descr)
+
+    parser.add_argument(
+        "--budget", type=float, default=150, metavar="MS",
+        help='Time budget for the startup benchmark, in milliseconds.')
+    parser.add_argument(
+        "--list", action="store_true",
+        help='List the available benchmarks, then exit.')
+    parser.add_argument(
+        "--size", type=int, default=0, metavar="N",
+        help='How many lines (or other items) of test data to use (default varies).')
+    parser.add_argument(
+        "--verbose", "-v", action="count", default=0,
+        help='Add more messages (repeatable).')
+    parser.add_argument(
+        "--version", action="version", version=__version__,
+        help='Display version information, then exit.')
+
+    parser.add_argument(
+        'names', type=str, nargs=argparse.REMAINDER,
+        help='Benchmark(s) to run (default: all).')
+
+    args0 = parser.parse_args()
+    if (lg and args0.verbose):
+        logging.basicConfig(level=logging.INFO - args0.verbose,
+            format="%(message)s")
+    return(args0)
+
+
+if __name__ == "__main__":
+    args = processOptions()
+    if (args.list):
+        print("\n".join(sorted(benchmarks.keys())))
+        sys.exit()
+    for name in (args.names or benchmarks.keys()):
+        if (name not in benchmarks):
+            lg.error("Unknown benchmark '%s'. Known: %s.",
+                name, ", ".join(sorted(benchmarks.keys())))
+            sys.exit(99)
+        print("%s:" % (name))
+        benchmarks[name]()
+    if (failures):
+        lg.error("Over budget: %s.", ", ".join(failures))
+        sys.exit(1)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+#
+# colorCharts.py: Render terminal color charts into one buffer.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import sys
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "colorCharts",
+    "description"  : "Render terminal color charts into one buffer.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from colorCharts import xterm256Chart, truecolorChart, emit
+    emit(xterm256Chart(background="light"))
+
+Support for the charts from `colorstring.py` (`--table`, `--list`,
+`--effects`, `--xterm256`, `--truecolor`) and `show256colors`.
+Each chart function returns the whole chart as one string, and `emit()`
+writes it with a single `write()` and flush. That matters mostly over
+`ssh` and in slow terminal emulators, where hundreds of separate `print()`
+calls (each a write, and often a packet) make a chart visibly paint
+line by line.
+
+Charts fit themselves to the terminal width (from `$COLUMNS` or the
+terminal, see `terminalWidth()`):
+
+* `xterm256Chart()` shows the 16 system colors, the 6x6x6 color cube (as
+six 6x6 planes, side by side as many as fit), and the 24 greys. Each
+cell shows its number, either as a background swatch (with black or
+white text, whichever contrasts more), or (`mode="fg"`) as colored text.
+
+* `truecolorChart()` shows a hue (across) by lightness (down) gradient
+in 24-bit color, using half-block characters so each text row shows two
+rows of color, plus a grey ramp.
+
+* `columnize()` packs any list of cells into as many columns as fit.
+
+With `background="light"` or `"dark"`, samples of foreground colors are
+drawn on white or black, to see how they'd look with either kind of
+terminal background. With `background=None` they're drawn on whatever
+the terminal's background is.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+* 2026-10-17: Keep headings within the width of the chart under them.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+esc = chr(27)
+reset = esc + "[0m"
+
+# SGR to put fg samples on a given kind of background (see `backgroundSeq()`).
+backgroundSeqs = {
+    None    : "",
+    "dark"  : esc + "[48;5;16m",
+    "light" : esc + "[48;5;231m",
+}
+
+# Approximate RGB for the 16 xterm system colors (they vary by terminal).
+systemRGB = [
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+]
+cubeLevels = [ 0, 95, 135, 175, 215, 255 ]
+
+
+###############################################################################
+#
+def terminalWidth(default:int=80) -> int:
+    """Columns available: $COLUMNS, else the terminal's, else `default`.
+    """
+    import shutil
+    return shutil.get_terminal_size((default, 24)).columns
+
+def emit(text:str, ofh=None) -> None:
+    """Write a whole chart with one write() and flush().
+    """
+    if (ofh is None): ofh = sys.stdout
+    try:
+        ofh.write(text)
+        ofh.flush()
+    except BrokenPipeError:
+        sys.stderr.close()  # e.g., piped into `head`
+
+def backgroundSeq(background:str) -> str:
+    if (background not in backgroundSeqs):
+        raise KeyError("Unknown background '%s' (use light or dark)." % (background))
+    return backgroundSeqs[background]
+
+def xterm256RGB(n:int) -> tuple:
+    """Approximate (r, g, b) for xterm-256 color number `n`.
+    """
+    if (n < 16): return systemRGB[n]
+    if (n < 232):
+        n -= 16
+        return (cubeLevels[n // 36], cubeLevels[(n // 6) % 6], cubeLevels[n % 6])
+    grey = 8 + 10 * (n - 232)
+    return (grey, grey, grey)
+
+def contrastingText(rgb:tuple) -> str:
+    """SGR for black or white text, whichever shows up better on `rgb`.
+    """
+    r, g, b = rgb
+    if (0.299 * r + 0.587 * g + 0.114 * b > 128): return esc + "[38;5;16m"
+    return esc + "[38;5;231m"
+
+def columnize(cells:list, cellWidth:int, width:int=None, sep:str=" ") -> list:
+    """Pack `cells` (strings that each take `cellWidth` columns on screen,
+    escapes aside) into lines of as many as fit in `width`.
+    @return A list of lines (without newlines).
+    """
+    if (width is None): width = terminalWidth()
+    perLine = max(1, (width + len(sep)) // (cellWidth + len(sep)))
+    return [ sep.join(cells[i:i+perLine]) for i in range(0, len(cells), perLine) ]
+
+
+def fitHeading(text:str, width:int) -> str:
+    """Clip a heading to `width` columns (ending it with "..." if cut), so
+    it doesn't wrap and push the chart under it out of line.
+    """
+    if (len(text) <= width): return text
+    return text[0:max(0, width - 3)] + "..."
+
+
+###############################################################################
+#
+def xterm256Cell(n:int, mode:str="bg", background:str=None) -> str:
+    """One 4-column cell showing color `n` (" 123").
+    """
+    if (mode == "bg"):
+        return (esc + "[48;5;%dm" % (n) + contrastingText(xterm256RGB(n)) +
+            "%4d" % (n) + reset)
+    return backgroundSeq(background) + esc + "[38;5;%dm%4d" % (n, n) + reset
+
+def xterm256Chart(mode:str="bg", background:str=None, width:int=None) -> str:
+    """The whole xterm-256 palette as a grid fitted to `width`.
+    """
+    if (width is None): width = terminalWidth()
+    cellWidth = 4
+    sysPerLine = 16 if (width >= 16 * cellWidth) else 8
+    planeWidth = 6 * cellWidth
+    planesPerLine = max(1, min(6, (width + 1) // (planeWidth + 1)))
+    cubeWidth = planesPerLine * (planeWidth + 1) - 1
+    greysPerLine = max(1, min(24, width // cellWidth))
+    chartWidth = max(sysPerLine, greysPerLine) * cellWidth
+    chartWidth = max(chartWidth, cubeWidth)
+    buf = [ fitHeading("xterm-256 colors (ESC[%s8;5;Nm):" % ("4" if mode == "bg" else "3"),
+        chartWidth) + "\n" ]
+
+    buf.append("\n" + fitHeading("System colors 0-15:", sysPerLine * cellWidth) + "\n")
+    cells = [ xterm256Cell(n, mode, background) for n in range(16) ]
+    for i in range(0, 16, sysPerLine):
+        buf.append("".join(cells[i:i+sysPerLine]) + "\n")
+
+    buf.append("\n" + fitHeading("Color cube 16-231:", cubeWidth) + "\n")
+    buf.append(fitHeading("(r=plane, g=row, b=col)", cubeWidth) + "\n")
+    for p0 in range(0, 6, planesPerLine):
+        for g in range(6):
+            row = []
+            for r in range(p0, min(6, p0 + planesPerLine)):
+                base = 16 + 36 * r + 6 * g
+                row.append("".join(xterm256Cell(n, mode, background)
+                    for n in range(base, base + 6)))
+            buf.append(" ".join(row) + "\n")
+        buf.append("\n")
+
+    buf.append(fitHeading("Greys 232-255:", greysPerLine * cellWidth) + "\n")
+    cells = [ xterm256Cell(n, mode, background) for n in range(232, 256) ]
+    for i in range(0, len(cells), greysPerLine):
+        buf.append("".join(cells[i:i+greysPerLine]) + "\n")
+    return "".join(buf)
+
+def xterm256List(sampleText:str="test of color", background:str=None) -> str:
+    """One line per xterm-256 color, as fg text and as a bg swatch.
+    """
+    bgSeq = backgroundSeq(background)
+    buf = []
+    for n in range(256):
+        buf.append("%s%s[38;5;%dm%s #%d%s  %s[48;5;%dm%s%s #%d %s\n" % (
+            bgSeq, esc, n, sampleText, n, reset,
+            esc, n, contrastingText(xterm256RGB(n)), sampleText, n, reset))
+    return "".join(buf)
+
+def truecolorChart(rows:int=12, background:str=None, width:int=None) -> str:
+    """A hue-by-lightness gradient in 24-bit color, `width` columns wide and
+    `rows` text rows high (each row is 2 color rows, via upper half-blocks),
+    plus a grey ramp.
+    """
+    import colorsys
+    if (width is None): width = terminalWidth()
+    bgSeq = backgroundSeq(background)
+    nPixelRows = 2 * rows
+    buf = [ bgSeq + fitHeading("24-bit color (ESC[38;2;R;G;Bm / ESC[48;2;R;G;Bm):",
+        width) + reset + "\n" ]
+    hues = [ x / width for x in range(width) ]
+    for row in range(rows):
+        line = []
+        for hue in hues:
+            top = colorsys.hls_to_rgb(hue, 0.9 - 0.8 * (2*row) / nPixelRows, 1.0)
+            bot = colorsys.hls_to_rgb(hue, 0.9 - 0.8 * (2*row+1) / nPixelRows, 1.0)
+            line.append("%s[38;2;%d;%d;%dm%s[48;2;%d;%d;%dm▀" % (
+                esc, top[0]*255, top[1]*255, top[2]*255,
+                esc, bot[0]*255, bot[1]*255, bot[2]*255))
+        buf.append("".join(line) + reset + "\n")
+    line = []
+    for x in range(width):
+        grey = int(255 * x / max(1, width - 1))
+        line.append("%s[48;2;%d;%d;%dm " % (esc, grey, grey, grey))
+    buf.append("".join(line) + reset + "\n")
+    return "".join(buf)
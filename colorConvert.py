@@ -5,16 +5,18 @@
 #
 import sys
 import os
+import io
 import re
 import math
 import codecs
 import colorsys
 import logging
 
-import webcolors
+import colorNameDB
+import compressedIO as ci
 
 lg = logging.getLogger()
-palColors = {}
+palette = None  # A paletteIndex.Palette, for --palette
 
 __metadata__ = {
     "title"        : "colorConvert",
@@ -47,13 +49,42 @@ Forms accepted:
         rgb(r, g, b, h)
     hsv(h, s, v))
     hsva(h, s, v, a)
+    hls(h, l, s)
     yiq(y, i, q)
-    HTML and CSS color names
+    HTML and CSS color names, X11 color names, and "ansi:red" etc.
+
+Spaces are ignored around the whole color and around each number, but
+nothing may follow the ")". The "#" forms may have any multiple of 3 hex
+digits (#RGB being short for #RRGGBB).
+
+With `--batch`, lines are converted a block at a time (`--blockLines`,
+default 65536) with NumPy (see `colorBatch.py`), which is over 10 times
+as fast for big inputs (such as palettes or design-token dumps). The output
+is the same, and so are the forms accepted, except that a line that can't
+be parsed gives an empty line and a warning, instead of stopping.
+
+With `--palette`, each output line also gets a tab and "Nearest: " and the
+closest color from the palette file (one color per line, in any of the forms
+below, optionally followed by a label). That's exact, but uses a spatial
+index (see `paletteIndex.py`), so it's fast even for palettes of 100K+
+colors. With `--paletteCache`, the index is saved next to the palette
+file (as PATH.idx.npz), and re-used until the palette file changes.
+
+`--metric` says how "nearest" is measured, for `--palette` and for
+`--oformat name` (see `colorDistance.py`): ''rgb'' (the default) is plain
+Euclidean distance in RGB; ''de76'' and ''de2000'' are CIE Delta E 1976 and
+CIEDE2000 (in CIELAB); ''oklab'' is Euclidean distance in OKLab.
+Perceptual ones pick what looks closest much better than ''rgb''.
+
+Input files (and stdin) may be compressed with gzip, bzip2, or xz; that's
+detected from their first few bytes, and they're decompressed as they're
+read (see `compressedIO.py`). With `--compress gz` (or `bz2` or `xz`), the
+output is written compressed.
 
 Arguments to the function-style forms may be specified as any of:
     decimal integers from 0 to 255
     hexadecimal numbers prefixed with "0x", from 0x00 to 0xff
-    octal numbers with a leading "0"
+    octal numbers with a leading "0" (but "0.5" is decimal)
     decimal non-integers from 0 to 255
     decimal numbers followed by a percent sign ("%")
 
@@ -63,7 +94,8 @@ a ''ValueError'' exception is raised.
 
 =Related Commands=
 
-Pip packages: colorsys, webcolors [https://pypi.python.org/pypi/webcolors/1.3].
+Pip packages: colorsys, webcolors [https://pypi.python.org/pypi/webcolors/1.3]
+(only to build the name table; see `colorNameDB.py`).
 
 Pantone conversion is said to be supported
 by [https://pypi.python.org/pypi/pycolorname].
@@ -79,10 +111,14 @@ component is discarded.
 
 CMYK, spot color systems, and many other possibilities are not supported.
 
-Conversion I<to> named HTML colors is not provided (yet).
+`--oformat name` gives the nearest HTML/CSS color name (which is exact
+if there is one for the color).
 
-A feature to pick, for each input color, the nearest color from a given
-pal*[ae]t*e*, would be helpful.
+Color names are looked up in a compiled, memory-mapped table (see
+`colorNameDB.py`) merging the HTML/CSS names from `webcolors`, the X11
+names from rgb.txt, and the basic ANSI colors; HTML/CSS names win when
+sources disagree (say, "green"), and "x11:green" or "ansi:green" picks one.
+It's built the first time it's needed.
 
 
 =References=
@@ -97,6 +133,12 @@ pal*[ae]t*e*, would be helpful.
   2016-04-14: Written. Copyright by Steven J. DeRose.
   2018-04-18: lint.
   2020-03-03, 2021-06-24: New layout.
+  2026-10-17: Read compressed input; add --compress. Add --batch.
+Accept --oformat rgbdec and hsl (as listed). Make importable.
+Take numbers like "0.5" as decimal, not (bad) octal; accept "0x80".
+Implement --palette (with paletteIndex.py); add --paletteCache.
+Add --metric (with colorDistance.py), and --oformat name.
+Look up names in colorNameDB.py (adding X11 and ANSI names).
 
 
 =Rights=
@@ -114,10 +156,13 @@ or [https://github.com/sderose].
 """
 
 knownSchemes = [ 'rgb', 'rgba', 'hsv', 'hsva', 'yiq', 'hls' ]
-token = r'\s*([\da-fA-F.]+%?)'
+# Spaces are allowed around the numbers; nothing may follow the ")".
+# (colorBatch.py accepts just the same forms.)
+token = r'\s*((?:0x)?[\da-fA-F.]+%?)\s*'
+hexExpr = re.compile(r'#[\da-fA-F]*$')
 try:
-    fe = r'(\w+)\(%s,%s,%s(,%s)?\)' % (token,token,token,token)
-    print("Expr: /%s/'", fe)
+    fe = r'(\w+)\(%s,%s,%s(,%s)?\)$' % (token,token,token,token)
+    lg.info("Expr: /%s/", fe)
     functionExpr = re.compile(fe)
 except re.error as e0:
     print("Bad regex: '%s'.\n    %s", fe, e0)
@@ -132,43 +177,38 @@ def doOneFile(fh, path):
     recnum = 0
     rec = ""
     while (True):
-        try:
-            rec = fh.readline()
-        except IOError as e:
-            lg.error("Error (%s) reading record %d of '%s'.",
-                type(e), recnum, path)
-            break
+        rec = fh.readline()  # Errors go to the caller (see main).
         if (len(rec) == 0): break # EOF
         recnum += 1
-        rec = rec.rstrip()
+        rec = rec.strip()
         rgbTriple = cconvert(rec)
-        outColor = serialize(rgbTriple, args.oformat)
-        if (args.palette):
-            #nearest = findNearestPalColor(serialize(rgbTriple, 'rgb6'))
-            #outColor += '\t Nearest: %s' % (nearest)
-            lg.error("PAL not yet supported.")
-            sys.exit()
+        outColor = serialize(rgbTriple, args.oformat, metric=args.metric)
+        if (palette is not None):
+            outColor += '\t Nearest: %s' % (findNearestPalColor(rgbTriple))
         print(outColor)
     fh.close()
     return(recnum)
 
+def doOneFileBatch(fh, path):
+    """Like doOneFile(), but convert a block of lines at a time (see colorBatch.py).
+    """
+    import colorBatch
+    try:
+        recnum = colorBatch.convertStream(fh, sys.stdout, args.oformat,
+            blockLines=args.blockLines, path=path, palette=palette,
+            metric=args.metric)
+    except ValueError as e:
+        lg.error("%s", e)
+        sys.exit()
+    fh.close()
+    return(recnum)
+
 def cconvert(s):
-    # Try HTML and CSS names. 'webcolors' returns as $RRGGBB.
-    rgbString = None
-    if (s in webcolors.HTML4_NAMES_TO_HEX):
-        rgbString = webcolors.HTML4_NAMES_TO_HEX[s]
-        #print("Found '%s' in HTML4 colors. Got: %s.", s, rgbString)
-    elif (s in webcolors.CSS2_NAMES_TO_HEX):
-        rgbString = webcolors.CSS2_NAMES_TO_HEX[s]
-        #print("Found '%s' in CSS2 colors. Got: %s.", s, rgbString)
-    elif (s in webcolors.CSS21_NAMES_TO_HEX):
-        rgbString = webcolors.CSS21_NAMES_TO_HEX[s]
-        #print("Found '%s' in CSS2.1 colors. Got: %s.", s, rgbString)
-    elif (s in webcolors.CSS3_NAMES_TO_HEX):
-        rgbString = webcolors.CSS3_NAMES_TO_HEX[s]
-        #print("Found '%s' in CSS3 colors. Got: %s.", s, rgbString)
-    if (rgbString is not None):
-        s = rgbString
+    s = s.strip()
+    # Try color names (HTML/CSS, then X11, then ANSI; see colorNameDB.py).
+    rgb255 = colorNameDB.getDB().lookup(s)
+    if (rgb255 is not None):
+        s = '#%02x%02x%02x' % rgb255
 
     # Try functional notations, like 'rgb(12, 50%, 0xA0)'
     mat = re.match(functionExpr, s)
@@ -186,7 +226,7 @@ def cconvert(s):
             rgbTriple = [ a1, a2, a3 ]
         elif (func == 'hls'):
             rgbTriple = colorsys.hls_to_rgb(a1, a2, a3)
-        elif (func == 'hsv'):
+        elif (func == 'hsv' or func == 'hsva'):
             rgbTriple = colorsys.hsv_to_rgb(a1, a2, a3)
         elif (func == 'yiq'):
             rgbTriple = colorsys.yiq_to_rgb(a1, a2, a3)
@@ -197,13 +237,18 @@ def cconvert(s):
     elif (s.startswith('#')):
         if (len(s) % 3 != 1):
             raise ValueError('Bad length for #rgb color.')
+        if (not hexExpr.match(s)):  # (int() would take "+", "_", and spaces)
+            raise ValueError('Bad hex digits in "%s".' % (s))
         per = int(len(s)/3)
         #print("rgb%d" % (per))
         rgbTriple = [ ]
         for i in range(3):
             piece = s[per*i+1:per*i+per+1]
             if (len(piece)==1): piece += piece
-            rgbTriple.append(convertNumber('0x' + piece))
+            try:  # Scaled by the number of digits (#fff and #fffffffff are white).
+                rgbTriple.append(int(piece, 16) / float(16 ** len(piece) - 1))
+            except ValueError as e:
+                raise ValueError('Bad hex digits in "%s".' % (s)) from e
 
     else:
         raise ValueError('Unrecognized syntax: "%s".' % (s))
@@ -217,15 +262,16 @@ def convertNumber(s:str):
     try:
         if (s.endswith('%')): return(float(s[0:-1])/100)
         if (s.startswith('0x')): return(int(s[2:],16)/255.0)
-        if (s.startswith('0')): return(int(s,8)/255.0)
         if ('.' in s): return(float(s))
+        if (s.startswith('0')): return(int(s,8)/255.0)
         return(float(int(s)/255.0))
     except ValueError as e:
         print("Cannot parse number from '%s'.\n    %s" % (s, e))
         sys.exit()
 
-def serialize(rgb, fmt):
+def serialize(rgb, fmt, metric='rgb'):
     """Convert a tuple of floats to the named output format.
+    For 'name', that's the nearest color name by `metric` (see colorDistance.py).
     """
     if (fmt == 'rgb3'):
         return('#%01x%01x%01x' %
@@ -236,7 +282,7 @@ def serialize(rgb, fmt):
     elif (fmt == 'rgb9'):
         return('#%03x%03x%03x' %
               (int(rgb[0]*4095), int(rgb[1]*4095), int(rgb[2]*4095)))
-    elif (fmt == 'rgdDec'):
+    elif (fmt == 'rgdDec' or fmt == 'rgbdec'):
         return('rgb(%3d, %3d, %3d)' %
               (int(rgb[0]*255), int(rgb[1]*255), int(rgb[2]*255)))
     elif (fmt == 'rgb%'):
@@ -246,31 +292,40 @@ def serialize(rgb, fmt):
     elif (fmt == 'hsv'):
         return('hsv(%5.3f%%, %5.3f%%, %5.3f%%)' %
               colorsys.rgb_to_hsv(rgb[0], rgb[1], rgb[2]))
-    elif (fmt == 'hls'):
+    elif (fmt == 'hls' or fmt == 'hsl'):
         return('hls(%5.1f%%, %5.1f%%, %5.1f%%)' %
               colorsys.rgb_to_hls(rgb[0], rgb[1], rgb[2]))
     elif (fmt == 'yiq'):
         return('yiq(%5.1f%%, %5.1f%%, %5.1f%%)' %
               colorsys.rgb_to_yiq(rgb[0], rgb[1], rgb[2]))
+    elif (fmt == 'name'):
+        rgb255 = tuple(int(round(c * 255)) for c in rgb)
+        if (all(abs(c * 255 - c8) < 1e-9 for c, c8 in zip(rgb, rgb255))):
+            exact = colorNameDB.getDB().nameFor(rgb255, source='css')
+            if (exact is not None): return(exact)
+        import colorBatch
+        return(colorBatch.getNamePalette(metric).nearestLabel(rgb))
     else:
         raise ValueError('Unknown output format "%s".' % (fmt))
 
 
-def cdistance(rgb1, rgb2):
+def cdistance(rgb1, rgb2, metric='rgb'):
+    """Color difference by `metric` (see colorDistance.py).
+    """
+    if (metric != 'rgb'):
+        import colorDistance
+        return(float(colorDistance.distance(rgb1, rgb2, metric)))
     tot = 0.0
     for i in range(len(rgb1)):
         tot += (rgb1[i]-rgb2[i])**2
     return(math.sqrt(tot))
 
-#def findNearestPalColor(rgb6):
-#    minDist = 999
-#    minRGB = None
-#    for i in range(len(pal)):
-#        thisDist = cdistance(rgb5, pal[i])
-#        if (abs(thisDist) < abs(minDict)):
-#            minDict = thisDict
-#            minRGB = pal[i]
-#    return(minRGB)
+def findNearestPalColor(rgb):
+    """Return the (label of the) `palette` color nearest to `rgb` (as from
+    cconvert()). This is exact, like a cdistance() to each palette color,
+    but uses the palette's index (see paletteIndex.py).
+    """
+    return(palette.nearestLabel(rgb))
 
 
 ###############################################################################
@@ -286,12 +341,26 @@ def processOptions():
     except ImportError:
         parser = argparse.ArgumentParser(description=descr)
 
+    parser.add_argument(
+        "--batch", action="store_true",
+        help='Convert a block of lines at a time, with NumPy (much faster for big inputs).')
+    parser.add_argument(
+        "--blockLines", "--block-lines", type=int, metavar="N", default=1 << 16,
+        help='With --batch, how many lines to convert at a time. Default: 65536.')
     parser.add_argument(
         "--color", # Don't default. See below.
         help='Colorize the output.')
+    parser.add_argument(
+        "--compress", type=str, metavar="KIND", default=None,
+        choices=[ "gz", "bz2", "xz" ],
+        help='Write the output compressed: gz, bz2, or xz.')
     parser.add_argument(
         "--iencoding", "--input-encoding", type=str, metavar="E", default="utf-8",
         help='Assume this character set for input files. Default: utf-8.')
+    parser.add_argument(
+        "--metric", type=str, default='rgb',
+        choices=[ 'rgb', 'de76', 'de2000', 'oklab' ],
+        help='How to measure "nearest" for --palette and --oformat name.')
     parser.add_argument(
         "--oencoding", "--output-encoding", type=str, metavar="E",
         help='Use this character set for output files.')
@@ -301,7 +370,10 @@ def processOptions():
         help='Which color format to use for output.')
     parser.add_argument(
         "--palette", type=str,
-        help='File of "known" colors, one per line as #RRGGBB.')
+        help='File of "known" colors, one per line (say, as #RRGGBB).')
+    parser.add_argument(
+        "--paletteCache", "--palette-cache", action="store_true",
+        help='Save the --palette index next to the palette file, and re-use it.')
     parser.add_argument(
         "--quiet", "-q", action="store_true",
         help='Suppress most messages.')
@@ -325,40 +397,67 @@ def processOptions():
             format="%(message)s")
     if (args0.color is None):
         args0.color = ("CLI_COLOR" in os.environ and sys.stderr.isatty())
-    lg.setColors(args0.color)
+    if (hasattr(lg, "setColors")): lg.setColors(args0.color)
     return(args0)
 
 
-args = processOptions()
+if __name__ == "__main__":
+    args = processOptions()
+    doFile = doOneFileBatch if (args.batch) else doOneFile
 
-if (args.palette):
-    try:
-        pfh = codecs.open(args.palette, mode='r', encoding=args.iencoding)
-    except IOError:
-        lg.error("Can't open -pal file '%s'.", args.palette)
-        sys.exit()
-    precnum = 0
-    while (True):
-        rec0 = pfh.readline()
-        if (rec0==""): break
-        precnum += 1
-        rec0 = rec0.trim()
-        if (not re.match('#[0-9a-fA-F]{6,6}', rec0)):
-            lg.error("%s:%d: Bad record: '%s'.", args.palette, precnum, rec0)
-            sys.exit()
-        else:
-            palColors[rec0] = 1
-    pfh.close()
-
-if (not args.files):
-    if (not args.quiet): print("Waiting on STDIN...")
-    doOneFile(sys.stdin, 'STDIN')
-else:
-    for f in (args.files):
+    if (args.palette):
+        from paletteIndex import Palette
         try:
-            fh0 = codecs.open(f, mode='r', encoding=args.iencoding)
+            palette = Palette.fromFile(args.palette, encoding=args.iencoding,
+                useCache=args.paletteCache, metric=args.metric)
         except IOError:
-            lg.error("Can't open '%s'.", f)
+            lg.error("Can't open -pal file '%s'.", args.palette)
             sys.exit()
-        doOneFile(fh0, f)
-        fh0.close()
+        except ValueError as e0:
+            lg.error("%s", e0)
+            sys.exit()
+
+    if (args.compress):
+        sys.stdout = io.TextIOWrapper(ci.openOutput(sys.stdout.buffer, args.compress),
+            encoding=args.oencoding or sys.stdout.encoding)
+
+    # A truncated or damaged (compressed) file is done as far as it can be
+    # read, then reported (like zcat does), and we go on to the next one.
+    rc = 0
+    readErrors = ci.readErrors()
+    if (not args.files):
+        if (not args.quiet): print("Waiting on STDIN...")
+        try:
+            doFile(ci.openText(sys.stdin.buffer, encoding=args.iencoding), 'STDIN')
+        except BrokenPipeError:  # (An OSError, but not a read error.)
+            sys.stderr.close()  # e.g., piped into `head`
+            sys.exit(rc)
+        except readErrors as e:
+            sys.stdout.flush()
+            lg.error("colorConvert.py: STDIN: %s", e)
+            rc = 1
+    else:
+        for f, zfh in ci.openEach(args.files):
+            try:
+                if (zfh is not None):
+                    fh0 = io.TextIOWrapper(zfh, encoding=args.iencoding)
+                else:
+                    fh0 = codecs.open(f, mode='r', encoding=args.iencoding)
+            except IOError:
+                lg.error("Can't open '%s'.", f)
+                sys.exit()
+            try:
+                doFile(fh0, f)
+            except BrokenPipeError:  # (An OSError, but not a read error.)
+                sys.stderr.close()  # e.g., piped into `head`
+                sys.exit(rc)
+            except readErrors as e:
+                sys.stdout.flush()
+                lg.error("colorConvert.py: %s: %s", f, e)
+                rc = 1
+            finally:
+                fh0.close()
+
+    if (args.compress):
+        sys.stdout.close()  # Finish the compressed stream
+    sys.exit(rc)
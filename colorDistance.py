@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+#
+# colorDistance.py: Perceptual color differences (CIELAB, CIEDE2000, OKLab), vectorized.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import logging
+
+import numpy as np
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "colorDistance",
+    "description"  : "Perceptual color differences (CIELAB, CIEDE2000, OKLab), vectorized.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    import colorDistance as cd
+    lab = cd.convert(rgb, "de76")               # (N, 3) sRGB, 0 to 1 -> CIELAB
+    d = cd.difference(lab1, lab2, "de2000")     # Broadcasts, like NumPy ops
+    d = cd.distance((1, 0, 0), (.9, .1, 0), "oklab")
+
+Color-difference measures for `colorConvert.py --metric` (for `--palette`
+and `--oformat name`) and `findColorName`, all working on whole
+NumPy arrays of colors at once:
+
+* ''rgb'' -- Euclidean distance in sRGB (0 to 1), as `cdistance()` always did.
+
+* ''de76'' -- CIE 1976 Delta E: Euclidean distance in CIELAB (D65 white).
+About 2.3 is a "just noticeable difference".
+
+* ''de2000'' -- CIEDE2000 Delta E, which corrects CIELAB's worst
+non-uniformities (blues, near-grays, lightness); the usual choice in
+industry. The formulas are as in Sharma, Wu, and Dalal (2005), and the test
+pairs from that paper are in `ciede2000Pairs` (see `checkCIEDE2000()`).
+
+* ''oklab'' -- Euclidean distance in Björn Ottosson's OKLab (2020), which
+is nearly as uniform as CIEDE2000 but (being Euclidean) much cheaper, and
+can use a spatial index.
+
+Each measure has a ''space'' that colors are converted to once (see
+`convert()`), so a palette's coordinates can be computed (and cached) once,
+and each query only pays to convert the query color. `difference()` then
+works on converted coordinates.
+
+All but ''de2000'' are plain Euclidean distance in their space (see
+`isEuclidean()`), so `paletteIndex.py` can use its grid index for them;
+''de2000'' is compared against every palette color (still vectorized).
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+# metric name -> (space to convert to, is it Euclidean distance in that space?)
+metrics = {
+    "rgb"    : ("rgb", True),
+    "de76"   : ("lab", True),
+    "de2000" : ("lab", False),
+    "oklab"  : ("oklab", True),
+}
+
+# sRGB (linear) -> CIE XYZ, and the D65 white point.
+rgbToXyzMatrix = np.array([
+    [ 0.4124564, 0.3575761, 0.1804375 ],
+    [ 0.2126729, 0.7151522, 0.0721750 ],
+    [ 0.0193339, 0.1191920, 0.9503041 ] ])
+whiteD65 = np.array([ 0.95047, 1.0, 1.08883 ])
+
+# sRGB (linear) -> LMS, and LMS (cube-rooted) -> OKLab (Ottosson).
+oklabM1 = np.array([
+    [ 0.4122214708, 0.5363325363, 0.0514459929 ],
+    [ 0.2119034982, 0.6806995451, 0.1073969566 ],
+    [ 0.0883024619, 0.2817188376, 0.6299787005 ] ])
+oklabM2 = np.array([
+    [ 0.2104542553,  0.7936177850, -0.0040720468 ],
+    [ 1.9779984951, -2.4285922050,  0.4505937099 ],
+    [ 0.0259040371,  0.7827717662, -0.8086757660 ] ])
+
+POW25_7 = 25.0 ** 7
+
+# Sharma, Wu, and Dalal (2005), Table 1: (L1, a1, b1, L2, a2, b2, Delta E 2000).
+ciede2000Pairs = np.array([
+    [ 50.0000,   2.6772, -79.7751, 50.0000,   0.0000, -82.7485,  2.0425 ],
+    [ 50.0000,   3.1571, -77.2803, 50.0000,   0.0000, -82.7485,  2.8615 ],
+    [ 50.0000,   2.8361, -74.0200, 50.0000,   0.0000, -82.7485,  3.4412 ],
+    [ 50.0000,  -1.3802, -84.2814, 50.0000,   0.0000, -82.7485,  1.0000 ],
+    [ 50.0000,  -1.1848, -84.8006, 50.0000,   0.0000, -82.7485,  1.0000 ],
+    [ 50.0000,  -0.9009, -85.5211, 50.0000,   0.0000, -82.7485,  1.0000 ],
+    [ 50.0000,   0.0000,   0.0000, 50.0000,  -1.0000,   2.0000,  2.3669 ],
+    [ 50.0000,  -1.0000,   2.0000, 50.0000,   0.0000,   0.0000,  2.3669 ],
+    [ 50.0000,   2.4900,  -0.0010, 50.0000,  -2.4900,   0.0009,  7.1792 ],
+    [ 50.0000,   2.4900,  -0.0010, 50.0000,  -2.4900,   0.0010,  7.1792 ],
+    [ 50.0000,   2.4900,  -0.0010, 50.0000,  -2.4900,   0.0011,  7.2195 ],
+    [ 50.0000,   2.4900,  -0.0010, 50.0000,  -2.4900,   0.0012,  7.2195 ],
+    [ 50.0000,  -0.0010,   2.4900, 50.0000,   0.0009,  -2.4900,  4.8045 ],
+    [ 50.0000,  -0.0010,   2.4900, 50.0000,   0.0010,  -2.4900,  4.8045 ],
+    [ 50.0000,  -0.0010,   2.4900, 50.0000,   0.0011,  -2.4900,  4.7461 ],
+    [ 50.0000,   2.5000,   0.0000, 50.0000,   0.0000,  -2.5000,  4.3065 ],
+    [ 50.0000,   2.5000,   0.0000, 73.0000,  25.0000, -18.0000, 27.1492 ],
+    [ 50.0000,   2.5000,   0.0000, 61.0000,  -5.0000,  29.0000, 22.8977 ],
+    [ 50.0000,   2.5000,   0.0000, 56.0000, -27.0000,  -3.0000, 31.9030 ],
+    [ 50.0000,   2.5000,   0.0000, 58.0000,  24.0000,  15.0000, 19.4535 ],
+    [ 50.0000,   2.5000,   0.0000, 50.0000,   3.1736,   0.5854,  1.0000 ],
+    [ 50.0000,   2.5000,   0.0000, 50.0000,   3.2972,   0.0000,  1.0000 ],
+    [ 50.0000,   2.5000,   0.0000, 50.0000,   1.8634,   0.5757,  1.0000 ],
+    [ 50.0000,   2.5000,   0.0000, 50.0000,   3.2592,   0.3350,  1.0000 ],
+    [ 60.2574, -34.0099,  36.2677, 60.4626, -34.1751,  39.4387,  1.2644 ],
+    [ 63.0109, -31.0961,  -5.8663, 62.8187, -29.7946,  -4.0864,  1.2630 ],
+    [ 61.2901,   3.7196,  -5.3901, 61.4292,   2.2480,  -4.9620,  1.8731 ],
+    [ 35.0831, -44.1164,   3.7933, 35.0232, -40.0716,   1.5901,  1.8645 ],
+    [ 22.7233,  20.0904, -46.6940, 23.0331,  14.9730, -42.5619,  2.0373 ],
+    [ 36.4612,  47.8580,  18.3852, 36.2715,  50.5065,  21.2231,  1.4146 ],
+    [ 90.8027,  -2.0831,   1.4410, 91.1528,  -1.6435,   0.0447,  1.4441 ],
+    [ 90.9257,  -0.5406,  -0.9208, 88.6381,  -0.8985,  -0.7239,  1.5381 ],
+    [  6.7747,  -0.2908,  -2.4247,  5.8714,  -0.0985,  -2.2286,  0.6377 ],
+    [  2.0776,   0.0795,  -1.1350,  0.9033,  -0.0636,  -0.5514,  0.9082 ],
+])
+
+
+###############################################################################
+#
+def checkMetric(metric:str) -> None:
+    if (metric not in metrics):
+        raise ValueError("Unknown color metric '%s' (known: %s)." %
+            (metric, ", ".join(metrics)))
+
+def spaceOf(metric:str) -> str:
+    checkMetric(metric)
+    return metrics[metric][0]
+
+def isEuclidean(metric:str) -> bool:
+    checkMetric(metric)
+    return metrics[metric][1]
+
+def srgbToLinear(rgb:np.ndarray) -> np.ndarray:
+    rgb = np.asarray(rgb, dtype=np.float64)
+    return np.where(rgb <= 0.04045, rgb / 12.92,
+        ((np.maximum(rgb, 0.04045) + 0.055) / 1.055) ** 2.4)
+
+def rgbToLab(rgb:np.ndarray) -> np.ndarray:
+    """sRGB (..., 3), 0 to 1 -> CIELAB (D65), L from 0 to 100.
+    """
+    xyz = (srgbToLinear(rgb) @ rgbToXyzMatrix.T) / whiteD65
+    f = np.where(xyz > (6.0 / 29.0) ** 3, np.cbrt(xyz),
+        xyz / (3.0 * (6.0 / 29.0) ** 2) + 4.0 / 29.0)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116.0 * f[..., 1] - 16.0
+    lab[..., 1] = 500.0 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200.0 * (f[..., 1] - f[..., 2])
+    return lab
+
+def rgbToOklab(rgb:np.ndarray) -> np.ndarray:
+    """sRGB (..., 3), 0 to 1 -> OKLab, L from 0 to 1.
+    """
+    return np.cbrt(srgbToLinear(rgb) @ oklabM1.T) @ oklabM2.T
+
+def convert(rgb:np.ndarray, metric:str) -> np.ndarray:
+    """Convert sRGB colors (0 to 1, in the last axis) to the space `metric`
+    works in (see `metrics`).
+    """
+    space = spaceOf(metric)
+    if (space == "lab"): return rgbToLab(rgb)
+    if (space == "oklab"): return rgbToOklab(rgb)
+    return np.asarray(rgb, dtype=np.float64)
+
+
+###############################################################################
+#
+def euclidean(c1:np.ndarray, c2:np.ndarray) -> np.ndarray:
+    d = np.asarray(c1, dtype=np.float64) - c2
+    return np.sqrt(np.einsum("...i,...i->...", d, d))
+
+def deltaE2000(lab1:np.ndarray, lab2:np.ndarray,
+    kL:float=1.0, kC:float=1.0, kH:float=1.0) -> np.ndarray:
+    """CIEDE2000 color difference between CIELAB colors (in the last axis;
+    the others broadcast), after Sharma, Wu, and Dalal (2005).
+    """
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    cBar7 = ((np.hypot(a1, b1) + np.hypot(a2, b2)) / 2.0) ** 7
+    g1 = 1.5 - 0.5 * np.sqrt(cBar7 / (cBar7 + POW25_7))
+    a1p = a1 * g1
+    a2p = a2 * g1
+    c1p = np.hypot(a1p, b1)
+    c2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360.0
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360.0
+    cc = c1p * c2p
+    achromatic = (cc == 0)
+
+    dLp = L2 - L1
+    dCp = c2p - c1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180.0, dhp - 360.0, np.where(dhp < -180.0, dhp + 360.0, dhp))
+    dhp = np.where(achromatic, 0.0, dhp)
+    dHp = 2.0 * np.sqrt(cc) * np.sin(np.radians(dhp / 2.0))
+
+    lBarp = (L1 + L2) / 2.0
+    cBarp = (c1p + c2p) / 2.0
+    hSum = h1p + h2p
+    hBarp = np.where(achromatic, hSum,
+        np.where(np.abs(h1p - h2p) <= 180.0, hSum / 2.0,
+        np.where(hSum < 360.0, (hSum + 360.0) / 2.0, (hSum - 360.0) / 2.0)))
+    hRad = np.radians(hBarp)
+    t = (1.0 - 0.17 * np.cos(hRad - np.radians(30.0))
+        + 0.24 * np.cos(2.0 * hRad)
+        + 0.32 * np.cos(3.0 * hRad + np.radians(6.0))
+        - 0.20 * np.cos(4.0 * hRad - np.radians(63.0)))
+    dTheta = 30.0 * np.exp(-(((hBarp - 275.0) / 25.0) ** 2))
+    cBarp7 = cBarp ** 7
+    rC = 2.0 * np.sqrt(cBarp7 / (cBarp7 + POW25_7))
+    l50 = (lBarp - 50.0) ** 2
+    sL = 1.0 + 0.015 * l50 / np.sqrt(20.0 + l50)
+    sC = 1.0 + 0.045 * cBarp
+    sH = 1.0 + 0.015 * cBarp * t
+    rT = -np.sin(np.radians(2.0 * dTheta)) * rC
+
+    x = dLp / (kL * sL)
+    y = dCp / (kC * sC)
+    z = dHp / (kH * sH)
+    return np.sqrt(np.maximum(x * x + y * y + z * z + rT * y * z, 0.0))
+
+def difference(c1:np.ndarray, c2:np.ndarray, metric:str) -> np.ndarray:
+    """Color difference by `metric`, between colors already `convert()`ed
+    for it. Broadcasts, so (N, 1, 3) against (1, K, 3) gives (N, K).
+    """
+    if (isEuclidean(metric)): return euclidean(c1, c2)
+    return deltaE2000(c1, c2)
+
+def distance(rgb1, rgb2, metric:str="rgb"):
+    """Difference between sRGB colors (0 to 1) by `metric`, converting them first.
+    """
+    return difference(convert(rgb1, metric), convert(rgb2, metric), metric)
+
+def nearestBrute(coords:np.ndarray, queries:np.ndarray, metric:str,
+    tile:int=1 << 21) -> tuple:
+    """Find the nearest of `coords` (K, 3) to each of `queries` (N, 3), both
+    already `convert()`ed, by comparing every pair (a tile at a time).
+    Ties go to the earlier color.
+    @return ((N,) array of row numbers in `coords`, (N,) array of differences).
+    """
+    n = len(queries)
+    which = np.empty(n, dtype=np.intp)
+    dist = np.empty(n, dtype=np.float64)
+    step = max(1, tile // max(1, len(coords)))
+    for s in range(0, n, step):
+        d = difference(queries[s:s+step, None, :], coords[None, :, :], metric)
+        which[s:s+step] = d.argmin(axis=1)
+        dist[s:s+step] = d[np.arange(len(d)), which[s:s+step]]
+    return which, dist
+
+def checkCIEDE2000(places:int=4) -> list:
+    """Compare `deltaE2000()` to the published test pairs.
+    @return a list of (pair number, expected, got) for any that differ at
+    `places` decimal places.
+    """
+    got = deltaE2000(ciede2000Pairs[:, 0:3], ciede2000Pairs[:, 3:6])
+    expected = ciede2000Pairs[:, 6]
+    bad = np.flatnonzero(np.round(got, places) != expected)
+    return [ (int(i) + 1, float(expected[i]), float(got[i])) for i in bad ]
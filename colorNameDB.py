@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+#
+# colorNameDB.py: One compiled, memory-mapped table of color names.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import sys
+import os
+import json
+import zlib
+import struct
+import logging
+from bisect import bisect_left
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "colorNameDB",
+    "description"  : "One compiled, memory-mapped table of color names.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    colorNameDB.py --build [--rgbFile /usr/share/X11/rgb.txt]
+    colorNameDB.py --lookup GhostWhite x11:green ansi:red
+    colorNameDB.py --dump x11
+
+    from colorNameDB import getDB
+    db = getDB()
+    db.lookup("salmon")             # -> (250, 128, 114), or None
+    db.nameFor((250, 128, 114))     # -> "salmon", or None
+
+Color names come from several places: the HTML and CSS tables in `webcolors`,
+the X11 `rgb.txt` file, and the basic ANSI colors (as in colorNames.md,
+with the usual xterm r, g, b). This merges them all into one small binary
+file, which is memory-mapped, so looking names up costs almost nothing at
+startup (no `webcolors` import, no parsing). It's used by `colorConvert.py`
+(for names, and `--oformat name`), `findColorName.py`, and `xcolors`.
+
+The file is built when first needed (or with `--build`), in the
+colorstring cache directory (see `colorstringCore.getCachePath()`), and
+`colorstring --clearCache` removes it. It records what it was built from
+(see `sourceKey()`): the rgb.txt file and the `webcolors` module file (each
+path, modification time, and size), and this module's version. If any of
+those change (say, `webcolors` is installed or upgraded, or rgb.txt is
+edited or turns up), it's rebuilt the next time it's used.
+
+==Names==
+
+Each source's names are all there, qualified by the source: "css:green"
+(#008000), "x11:green" (#00ff00), "ansi:green" (#00cd00). Unqualified names
+go to the first source that has them, in that order (so "green" is the
+CSS one, as `colorConvert.py` always had it, and "GhostWhite", only in X11,
+works too). ANSI colors are "black" through "white", and "bright black"
+through "bright white". Names must match exactly (X11 has several
+spellings, such as "ghost white" and "GhostWhite").
+
+==File layout==
+
+All little-endian 32-bit words (so it can be viewed as an array in place):
+
+* Header (16 words): magic "CNDB", version, number of entries, keys, and
+hash slots, the word offsets of each table below, the byte size of the
+string pool, a bit per source included, and the byte offset and length
+in the pool of the source key (as JSON).
+* Entries (3 words each): the name's byte offset in the pool, its length
+plus the source number times 65536, and 0xRRGGBB.
+* Keys (3 words each): a name as it's looked up (like "x11:green"):
+offset and length in the pool, and its entry number.
+* Hash slots: a power of 2 (at least twice the keys), each a key number
+plus 1 (0 for empty), at CRC-32 of the key's UTF-8, probing linearly.
+* Reverse index: the entries' 0xRRGGBB values, sorted, and (in a
+parallel table) their entry numbers, so a binary search finds every name
+for a color (the preferred source first).
+* The string pool (UTF-8), ending with the source key.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+* 2026-10-17: Rebuild automatically when the sources change.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+
+=Options=
+"""
+
+dbVersion = 1
+dbMagic = 0x42444E43  # "CNDB", little-endian
+headerWords = 16
+sources = [ "css", "x11", "ansi" ]  # In order of preference
+
+# The 8 basic ANSI colors, then the bright ones (as in colorCharts.systemRGB).
+ansiNames = [ "black", "red", "green", "yellow", "blue", "magenta", "cyan", "white" ]
+
+defaultRgbFile = "/etc/X11/rgb.txt"
+
+# Other places rgb.txt turns up (from `xcolors`).
+rgbPaths = [
+    "/usr/share/X11/rgb.txt",
+    "/usr/X11R6/lib/X11/rgb.txt",
+    "/usr/X11R6/share/X11/rgb.txt",
+    "/etc/X11/rgb.txt",
+    "/opt/X11/share/X11/rgb.txt",
+]
+
+
+###############################################################################
+# Reading the sources
+#
+def findRgbFile(path:str=defaultRgbFile) -> str:
+    """@return `path` if it exists, else the first of `rgbPaths` that does
+    (or None).
+    """
+    if (path and os.path.isfile(path)): return path
+    for p in rgbPaths:
+        if (os.path.isfile(p)): return p
+    return None
+
+def findWebcolors() -> str:
+    """@return the path to the `webcolors` module (without importing it,
+    which takes a while), or None if it's not installed.
+    """
+    import importlib.util
+    try:
+        spec = importlib.util.find_spec("webcolors")
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if (spec) else None
+
+def fileKey(path:str) -> list:
+    """@return [ path, modification time (ns), size ], or None.
+    """
+    if (not path): return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [ path, st.st_mtime_ns, st.st_size ]
+
+def sourceKey(rgbFile:str=None) -> dict:
+    """Identify what a database would be built from (see `build()`), so we
+    can tell if a built one is still good.
+    """
+    return {
+        "version":   __version__,
+        "rgbFile":   fileKey(findRgbFile(rgbFile or defaultRgbFile)),
+        "webcolors": fileKey(findWebcolors()),
+    }
+
+def isCurrent(key:dict) -> bool:
+    """Whether a database built with source key `key` is still up to date.
+    A database built from a particular rgb.txt (with `--rgbFile`) stays
+    good as long as that file is unchanged.
+    """
+    rgbFile = key.get("rgbFile")
+    return key == sourceKey(rgbFile[0] if rgbFile else None)
+
+def readWebcolors() -> list:
+    """@return [ (name, 0xRRGGBB) ] from the HTML4, CSS2, CSS2.1, and CSS3
+    tables in `webcolors` (CSS3 order first), or [] if it's not installed.
+    """
+    try:
+        import webcolors
+    except ImportError:
+        lg.warning("webcolors is not installed; no HTML/CSS color names.")
+        return []
+    table = {}
+    for spec in ("CSS3", "HTML4", "CSS2", "CSS21"):
+        try:
+            names = getattr(webcolors, spec + "_NAMES_TO_HEX")
+        except AttributeError:  # Newer webcolors keeps the tables to itself.
+            names = { n: webcolors.name_to_hex(n, spec=spec.lower())
+                for n in webcolors.names(spec.lower()) }
+        for name, h in names.items():
+            if (name not in table): table[name] = int(h[1:], 16)
+    return list(table.items())
+
+def readRgbTxt(path:str) -> list:
+    """@return [ (name, 0xRRGGBB) ] from an X11 rgb.txt file ("r g b name"
+    lines; "!" starts a comment).
+    """
+    entries = []
+    with open(path, "r", encoding="utf-8", errors="replace") as ifh:
+        for rec in ifh:
+            tokens = rec.split(None, 3)
+            if (len(tokens) < 4 or rec.lstrip().startswith("!")): continue
+            try:
+                r, g, b = (int(t) for t in tokens[0:3])
+            except ValueError:
+                continue
+            entries.append( (tokens[3].strip(), (r << 16) | (g << 8) | b) )
+    return entries
+
+def readAnsi() -> list:
+    from colorCharts import systemRGB
+    names = ansiNames + [ "bright " + n for n in ansiNames ]
+    return [ (n, (r << 16) | (g << 8) | b) for n, (r, g, b) in zip(names, systemRGB) ]
+
+
+###############################################################################
+# Building
+#
+def compileDB(bySource:dict, srcKey:dict=None) -> bytes:
+    """Compile { source: [ (name, 0xRRGGBB) ] } into the binary format,
+    recording the source key `srcKey` (see `sourceKey()`).
+    """
+    entries = []  # (name, source number, rgb)
+    for srcNum, src in enumerate(sources):
+        seen = set()
+        for name, rgb in bySource.get(src, []):
+            if (name in seen): continue
+            seen.add(name)
+            entries.append( (name, srcNum, rgb) )
+
+    pool = bytearray()
+    poolOffsets = {}
+    def intern(s:str) -> tuple:
+        if (s not in poolOffsets):
+            b = s.encode("utf-8")
+            poolOffsets[s] = (len(pool), len(b))
+            pool.extend(b)
+        return poolOffsets[s]
+
+    entryWords = []
+    keys = []  # (key, entry number)
+    plain = set()
+    for i, (name, srcNum, rgb) in enumerate(entries):
+        off, ln = intern(name)
+        entryWords.extend( (off, ln | (srcNum << 16), rgb) )
+        keys.append( ("%s:%s" % (sources[srcNum], name), i) )
+        if (name not in plain):
+            plain.add(name)
+            keys.append( (name, i) )
+
+    nSlots = 1
+    while (nSlots < 2 * len(keys)): nSlots *= 2
+    slots = [ 0 ] * nSlots
+    keyWords = []
+    for k, (key, entryNum) in enumerate(keys):
+        off, ln = intern(key)
+        keyWords.extend( (off, ln, entryNum) )
+        h = zlib.crc32(key.encode("utf-8")) & (nSlots - 1)
+        while (slots[h]): h = (h + 1) & (nSlots - 1)
+        slots[h] = k + 1
+
+    rev = sorted(range(len(entries)), key=lambda i: (entries[i][2], i))
+    revRGB = [ entries[i][2] for i in rev ]
+
+    keyOff = len(pool)
+    pool.extend(json.dumps(srcKey or {}, sort_keys=True).encode("utf-8"))
+    poolSize = len(pool)
+    pool.extend(b"\0" * (-len(pool) % 4))
+    entriesOff = headerWords
+    keysOff = entriesOff + len(entryWords)
+    slotsOff = keysOff + len(keyWords)
+    revRGBOff = slotsOff + nSlots
+    revEntryOff = revRGBOff + len(entries)
+    poolOff = revEntryOff + len(entries)
+    sourceBits = sum(1 << n for n, src in enumerate(sources) if bySource.get(src))
+    header = [ dbMagic, dbVersion, len(entries), len(keys), nSlots,
+        entriesOff, keysOff, slotsOff, revRGBOff, revEntryOff, poolOff,
+        poolSize, sourceBits, keyOff, poolSize - keyOff, 0 ]
+    words = header + entryWords + keyWords + slots + revRGB + rev
+    return struct.pack("<%dI" % (len(words)), *words) + bytes(pool)
+
+def getDBPath(create:bool=False) -> str:
+    from colorstringCore import getCachePath
+    return getCachePath("colornames-v%d.bin" % (dbVersion), create=create)
+
+def build(path:str=None, rgbFile:str=None) -> bytes:
+    """Read all the sources, compile them, and write the result to `path`
+    (default: see `getDBPath()`), if possible.
+    @return the compiled data.
+    """
+    key = sourceKey(rgbFile)
+    bySource = { "css": readWebcolors(), "ansi": readAnsi() }
+    if (key["rgbFile"]): bySource["x11"] = readRgbTxt(key["rgbFile"][0])
+    else: lg.warning("Can't find X11 rgb.txt; no X11 color names.")
+    data = compileDB(bySource, key)
+    path = path or getDBPath(create=True)
+    if (path):
+        tmpPath = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            with open(tmpPath, "wb") as ofh:
+                ofh.write(data)
+            os.replace(tmpPath, path)
+        except OSError as e:
+            lg.warning("Can't write color name database '%s': %s", path, e)
+    return data
+
+
+###############################################################################
+# Loading and lookup
+#
+class ColorNameDB:
+    """A compiled color-name table (see above), memory-mapped from `path`
+    if given, or else used from `data` (bytes).
+    """
+    def __init__(self, path:str=None, data:bytes=None):
+        import mmap
+        self.path = path
+        if (path is not None):
+            with open(path, "rb") as ifh:
+                data = mmap.mmap(ifh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = data
+        view = memoryview(data)
+        nWords = len(data) // 4
+        if (sys.byteorder == "little"):
+            self.words = view[0:nWords * 4].cast("I")
+        else:
+            import array
+            self.words = array.array("I", bytes(view[0:nWords * 4]))
+            self.words.byteswap()
+        w = self.words
+        if (nWords < headerWords or w[0] != dbMagic or w[1] != dbVersion):
+            raise ValueError("Not a version %d color name database: '%s'." % (dbVersion, path))
+        (self.nEntries, self.nKeys, self.nSlots, self.entriesOff, self.keysOff,
+            self.slotsOff, revRGBOff, revEntryOff, poolOff, poolSize,
+            self.sourceBits, self.keyOff, self.keyLen) = w[2:15]
+        self.revRGB = w[revRGBOff:revRGBOff + self.nEntries]
+        self.revEntry = w[revEntryOff:revEntryOff + self.nEntries]
+        self.pool = view[poolOff * 4:poolOff * 4 + poolSize]
+
+    def __len__(self):
+        return self.nEntries
+
+    def sourceKey(self) -> dict:
+        """@return the source key it was built with (see `sourceKey()`), or {}.
+        """
+        if (not self.keyLen): return {}
+        try:
+            return json.loads(bytes(self.pool[self.keyOff:self.keyOff + self.keyLen]))
+        except ValueError:
+            return {}
+
+    def hasSource(self, source:str) -> bool:
+        return bool(self.sourceBits & (1 << sources.index(source)))
+
+    def findEntry(self, name:str) -> int:
+        """@return the entry number for `name` (a key; see above), or -1.
+        """
+        w = self.words
+        key = name.encode("utf-8")
+        mask = self.nSlots - 1
+        h = zlib.crc32(key) & mask
+        while (True):
+            k = w[self.slotsOff + h]
+            if (k == 0): return -1
+            base = self.keysOff + 3 * (k - 1)
+            off = w[base]
+            if (w[base + 1] == len(key) and self.pool[off:off + len(key)] == key):
+                return w[base + 2]
+            h = (h + 1) & mask
+
+    def entry(self, i:int) -> tuple:
+        """@return (name, source, (r, g, b)) for entry number `i`.
+        """
+        base = self.entriesOff + 3 * i
+        off, lenSrc, rgb = self.words[base:base + 3]
+        name = bytes(self.pool[off:off + (lenSrc & 0xFFFF)]).decode("utf-8")
+        return name, sources[lenSrc >> 16], (rgb >> 16, (rgb >> 8) & 0xFF, rgb & 0xFF)
+
+    def lookup(self, name:str) -> tuple:
+        """@return (r, g, b) (0 to 255) for a color name, or None.
+        """
+        i = self.findEntry(name)
+        if (i < 0): return None
+        rgb = self.words[self.entriesOff + 3 * i + 2]
+        return (rgb >> 16, (rgb >> 8) & 0xFF, rgb & 0xFF)
+
+    def namesFor(self, rgb:tuple, source:str=None) -> list:
+        """@return the names for exactly `rgb` (0 to 255), preferred first.
+        """
+        r, g, b = rgb
+        packed = (r << 16) | (g << 8) | b
+        names = []
+        i = bisect_left(self.revRGB, packed)
+        while (i < self.nEntries and self.revRGB[i] == packed):
+            name, src, _ = self.entry(self.revEntry[i])
+            if (source is None or src == source): names.append(name)
+            i += 1
+        return names
+
+    def nameFor(self, rgb:tuple, source:str=None) -> str:
+        """@return the preferred name for exactly `rgb` (0 to 255), or None.
+        """
+        names = self.namesFor(rgb, source)
+        return names[0] if names else None
+
+    def keys(self) -> list:
+        """@return [ (key, entry number) ] for every name that can be looked up.
+        """
+        w = self.words
+        out = []
+        for k in range(self.nKeys):
+            off, ln, entryNum = w[self.keysOff + 3 * k:self.keysOff + 3 * k + 3]
+            out.append( (bytes(self.pool[off:off + ln]).decode("utf-8"), entryNum) )
+        return out
+
+    def arrays(self, source:str=None) -> tuple:
+        """@return (list of names, (K, 3) uint8 NumPy array of their r, g, b),
+        for the entries from `source` (or all), in entry order.
+        """
+        import numpy as np
+        ent = np.frombuffer(self.data, dtype="<u4", count=3 * self.nEntries,
+            offset=4 * self.entriesOff).reshape(-1, 3)
+        keep = np.ones(len(ent), dtype=bool)
+        if (source is not None):
+            keep = (ent[:, 1] >> 16) == sources.index(source)
+        idx = np.flatnonzero(keep)
+        names = [ self.entry(i)[0] for i in idx.tolist() ]
+        packed = ent[idx, 2]
+        rgb = np.stack([ packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF ],
+            axis=1).astype(np.uint8)
+        return names, rgb
+
+
+_db = None
+
+def getDB() -> ColorNameDB:
+    """@return the shared database, memory-mapped from the cache (built first
+    if it's not there, or if its sources have changed).
+    """
+    global _db
+    if (_db is None):
+        path = getDBPath()
+        if (path and os.path.isfile(path)):
+            try:
+                db = ColorNameDB(path)
+                if (isCurrent(db.sourceKey())):
+                    _db = db
+                    return _db
+                lg.info("Color name sources have changed; rebuilding '%s'.", path)
+            except (OSError, ValueError) as e:
+                lg.warning("Rebuilding color name database: %s", e)
+        data = build()
+        path = getDBPath()
+        _db = ColorNameDB(path) if (path and os.path.isfile(path)) else ColorNameDB(data=data)
+    return _db
+
+
+###############################################################################
+# Main
+#
+def processOptions():
+    import argparse
+
+    try:
+        from BlockFormatter import BlockFormatter
+        parser = argparse.ArgumentParser(
+            description=descr, formatter_class=BlockFormatter)
+    except ImportError:
+        parser = argparse.ArgumentParser(description=descr)
+
+    parser.add_argument(
+        "--build", action="store_true",
+        help='(Re)build the database from the sources.')
+    parser.add_argument(
+        "--dump", type=str, metavar="SOURCE", nargs="?", const="all",
+        choices=sources + [ "all" ],
+        help='List the colors (from one source, or all), like rgb.txt.')
+    parser.add_argument(
+        "--lookup", type=str, metavar="NAME", nargs="+",
+        help='Show the r g b for these names.')
+    parser.add_argument(
+        "--output", type=str, metavar="PATH",
+        help='With --build, write here instead of the cache directory.')
+    parser.add_argument(
+        "--rgbFile", "--rgb-file", type=str, metavar="PATH", default=defaultRgbFile,
+        help='X11 rgb.txt to build from. Default: %s (or wherever one is).'
+            % (defaultRgbFile))
+    parser.add_argument(
+        "--quiet", "-q", action="store_true",
+        help='Suppress most messages.')
+    parser.add_argument(
+        "--verbose", "-v", action="count", default=0,
+        help='Add more messages (repeatable).')
+    parser.add_argument(
+        "--version", action="version", version=__version__,
+        help='Display version information, then exit.')
+
+    args0 = parser.parse_args()
+    if (lg and args0.verbose):
+        logging.basicConfig(level=logging.INFO - args0.verbose,
+            format="%(message)s")
+    return(args0)
+
+
+if __name__ == "__main__":
+    args = processOptions()
+    if (args.build):
+        outPath = args.output or getDBPath(create=True)
+        theDB = ColorNameDB(data=build(outPath, args.rgbFile))
+        if (not args.quiet):
+            print("%d colors (%s), in '%s'." % (len(theDB),
+                ", ".join(s for s in sources if theDB.hasSource(s)), outPath))
+    else:
+        theDB = getDB()
+    if (args.lookup):
+        for nm in args.lookup:
+            found = theDB.lookup(nm)
+            if (found is None): print("%s\t(not found)" % (nm))
+            else: print("%s\t#%02x%02x%02x" % ((nm,) + found))
+    if (args.dump):
+        for i0 in range(len(theDB)):
+            nm, src, (r0, g0, b0) = theDB.entry(i0)
+            if (args.dump in ("all", src)):
+                print("%3d %3d %3d\t\t%s" % (r0, g0, b0, nm))
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+#
+# colorQuantize.py: Rewrite 24-bit color escapes for 256- or 16-color terminals.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import os
+import re
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "colorQuantize",
+    "description"  : "Rewrite 24-bit color escapes for 256- or 16-color terminals.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from colorQuantize import SGRDownsampler
+    ds = SGRDownsampler("256")
+    print(ds.rewrite("\\x1b[38;2;255;128;0mOrange\\x1b[0m"))  # -> ESC[38;5;208m...
+
+Support for `uncolorize --oformat 256` (or 16, or 8). Finds SGR escapes
+(ESC [ ... m) and rewrites any 24-bit color in them (`38;2;r;g;b` for
+foreground, `48;2;r;g;b` for background, also with colons as separators)
+to the nearest color the target has. Components over 255 are taken as 255,
+and the colon forms come out in the ";" form.
+
+* ''256'' -- the xterm 6x6x6 color cube and grey ramp (`38;5;n`). The 16
+system colors are not used as targets, since terminals differ about them.
+
+* ''16'' -- the 8 basic ANSI colors (as in colorNames.md) plus their bright
+forms (`30`-`37` and `90`-`97`, and `40`-`47` and `100`-`107`).
+256-color escapes (`38;5;n`) are mapped down, too.
+
+* ''8'' -- just the 8 basic colors.
+
+Everything else in an escape is left as is.
+
+==Quantization tables==
+
+Finding the nearest color is a search over all the candidates, so
+instead it's looked up: a table has an entry for every color at 6 bits
+per channel (262,144 entries, one byte each); so each color costs a shift,
+an or, and one index.
+
+Each entry covers a cell of 4x4x4 colors, and they don't all have the same
+nearest color if the cell is near a boundary (such as between two greys of
+the xterm grey ramp, which are only 10 apart). So an entry is only the
+answer if it's the nearest color for the whole cell: that is, if at the
+cell's center it's nearer than the runner-up by more than the cell's
+width (corner to corner). Otherwise the entry is a special value
+(`unsureCodes`), and the color is searched for. That's about 8% of all
+colors for "256", 11% for "16", and 7% for "8"; and the answer is always
+exact (ties go to the lower color number).
+
+A table takes a fraction of a second to build, but that's still far
+more than the rest of the startup, so it's written to
+`$XDG_CACHE_HOME/colorstring/` (see `colorstringCore.getCachePath()`), and
+later uses just memory-map that file. The cache file name includes the
+target, table version, and precision; if it's missing or the wrong size,
+it's rebuilt. `colorstring --clearCache` removes it.
+
+Distance is plain Euclidean in RGB.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+* 2026-10-17: Make lookups exact: search for colors whose table cell
+isn't all nearest the same color (table version 2).
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+tableVersion = 2
+tableBits = 6
+tableShift = 8 - tableBits
+tableSize = 1 << (3 * tableBits)
+targets = [ "256", "16", "8" ]
+
+# Table entry meaning "search for this one" (a code the target never uses).
+unsureCodes = { "256": 0, "16": 255, "8": 255 }
+
+# Distance from the center of a table cell to its farthest color.
+cellRadius = (3 * (((1 << tableShift) - 1) / 2.0) ** 2) ** 0.5
+
+def clampByte(s:str) -> int:
+    """A color component from an escape, as 0 to 255 (bigger is taken as 255).
+    @raise ValueError if it's not a number.
+    """
+    return min(255, max(0, int(s)))
+
+# SGR escapes; the params are group 1.
+sgrRegex = re.compile(r"\x1b\[([0-9;:]*)m")
+sgrRegexBytes = re.compile(rb"\x1b\[([0-9;:]*)m")
+
+
+###############################################################################
+#
+def candidates(target:str) -> list:
+    """Return the [ (code, (r, g, b)) ] a target can use. `code` is the
+    xterm-256 number for "256", else the basic color number 0-7 (or 8-15
+    for the bright ones).
+    """
+    from colorCharts import xterm256RGB
+    if (target == "256"): return [ (n, xterm256RGB(n)) for n in range(16, 256) ]
+    if (target == "16"): return [ (n, xterm256RGB(n)) for n in range(16) ]
+    if (target == "8"): return [ (n, xterm256RGB(n)) for n in range(8) ]
+    raise KeyError("Unknown target '%s' (use one of %s)." % (target, ", ".join(targets)))
+
+def isSure(best:float, second:float) -> bool:
+    """Whether the nearest color to a cell's center is the nearest for the
+    whole cell, given the squared distances to it and to the runner-up.
+    """
+    return second ** 0.5 - best ** 0.5 > 2 * cellRadius
+
+def buildTable(target:str) -> bytes:
+    """Make the quantization table for `target`: entry
+    (r6 << 12 | g6 << 6 | b6) is the code nearest every color in that cell,
+    or `unsureCodes[target]` if that's not the same for all of them.
+    """
+    steps = 1 << tableBits
+    centers = [ (i << tableShift) + ((1 << tableShift) - 1) / 2.0 for i in range(steps) ]
+    if (target == "256"): return buildTable256(centers)
+    cands = candidates(target)
+    unsure = unsureCodes[target]
+    # Squared distance along each channel, per candidate, per cell.
+    dr = [ [ (c - rgb[0]) ** 2 for c in centers ] for _, rgb in cands ]
+    dg = [ [ (c - rgb[1]) ** 2 for c in centers ] for _, rgb in cands ]
+    db = [ [ (c - rgb[2]) ** 2 for c in centers ] for _, rgb in cands ]
+    codes = [ code for code, _ in cands ]
+    table = bytearray(tableSize)
+    pos = 0
+    for ri in range(steps):
+        for gi in range(steps):
+            # For this (r, g), the best candidate for each b, and the runner-up.
+            best = [ 1 << 30 ] * steps
+            second = [ 1 << 30 ] * steps
+            bestCode = [ 0 ] * steps
+            for k, code in enumerate(codes):
+                base = dr[k][ri] + dg[k][gi]
+                if (base >= max(second)): continue
+                dbk = db[k]
+                for bi in range(steps):
+                    d = base + dbk[bi]
+                    if (d < best[bi]):
+                        second[bi] = best[bi]
+                        best[bi] = d
+                        bestCode[bi] = code
+                    elif (d < second[bi]):
+                        second[bi] = d
+            table[pos:pos+steps] = bytes(code if isSure(best[bi], second[bi]) else unsure
+                for bi, code in enumerate(bestCode))
+            pos += steps
+    return bytes(table)
+
+greyLevels = [ 8 + 10 * i for i in range(24) ]
+
+def nearestLevel(x:float) -> tuple:
+    """The nearest xterm cube level to `x` (as an index; ties go to the
+    lower one), and the squared distance to it.
+    """
+    from colorCharts import cubeLevels
+    dist, i = min(((x - lev) ** 2, i) for i, lev in enumerate(cubeLevels))
+    return i, dist
+
+def nearestGreys(mean:float) -> tuple:
+    """The nearest grey (0-23) to a color whose channels average `mean`,
+    and the runner-up. Ties go to the darker one.
+    """
+    grey = min(23, max(0, int((mean - 8) // 10)))
+    if (grey < 23 and abs(greyLevels[grey+1] - mean) < abs(greyLevels[grey] - mean)):
+        grey += 1
+    if (grey == 0): return grey, 1
+    if (grey == 23): return grey, 22
+    if (abs(greyLevels[grey+1] - mean) < abs(greyLevels[grey-1] - mean)):
+        return grey, grey + 1
+    return grey, grey - 1
+
+def nearest256(r:int, g:int, b:int) -> int:
+    """Find the nearest xterm-256 color (16-255) exactly. The nearest cube
+    color is just the nearest level on each channel, and the nearest grey is
+    the one nearest the mean of the channels; so only those two need comparing.
+    """
+    rl, dr = nearestLevel(r)
+    gl, dg = nearestLevel(g)
+    bl, db = nearestLevel(b)
+    grey = nearestGreys((r + g + b) / 3.0)[0]
+    gv = greyLevels[grey]
+    greyDist = (r - gv) ** 2 + (g - gv) ** 2 + (b - gv) ** 2
+    if (greyDist < dr + dg + db): return 232 + grey
+    return 16 + 36 * rl + 6 * gl + bl
+
+def buildTable256(centers:list) -> bytes:
+    """Like `buildTable("256")`, but quicker, in the same way as `nearest256()`.
+    The halfway points between cube levels (47.5, 115, 155, 195, 235) all
+    fall between cells, so the nearest cube color is the same for the whole
+    cell; only a grey can make a cell unsure.
+    """
+    levels = [ nearestLevel(c) for c in centers ]
+    table = bytearray(tableSize)
+    pos = 0
+    for r, (rl, dr) in zip(centers, levels):
+        for g, (gl, dg) in zip(centers, levels):
+            rgCube = 16 + 36 * rl + 6 * gl
+            rgDist = dr + dg
+            for b, (bl, db) in zip(centers, levels):
+                cubeDist = rgDist + db
+                grey, grey2 = nearestGreys((r + g + b) / 3.0)
+                gv, gv2 = greyLevels[grey], greyLevels[grey2]
+                greyDist = (r - gv) ** 2 + (g - gv) ** 2 + (b - gv) ** 2
+                greyNext = (r - gv2) ** 2 + (g - gv2) ** 2 + (b - gv2) ** 2
+                if (greyDist < cubeDist):
+                    sure = isSure(greyDist, min(greyNext, cubeDist))
+                    code = 232 + grey
+                else:
+                    sure = isSure(cubeDist, greyDist)
+                    code = rgCube + bl
+                table[pos] = code if sure else unsureCodes["256"]
+                pos += 1
+    return bytes(table)
+
+def getTablePath(target:str) -> str:
+    from colorstringCore import getCachePath
+    return getCachePath("quantize-%s-v%d-%dbit.bin" % (target, tableVersion, tableBits),
+        create=True)
+
+def loadTable(target:str, useCache:bool=True):
+    """Return the table for `target`, memory-mapped from the cache if it's
+    there (else built, and cached unless `useCache` is False).
+    The result can be indexed like bytes.
+    """
+    import mmap
+    path = getTablePath(target) if useCache else None
+    if (path and os.path.isfile(path) and os.path.getsize(path) == tableSize):
+        with open(path, "rb") as ifh:
+            return mmap.mmap(ifh.fileno(), 0, access=mmap.ACCESS_READ)
+    table = buildTable(target)
+    if (path):
+        tmpPath = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            with open(tmpPath, "wb") as ofh:
+                ofh.write(table)
+            os.replace(tmpPath, path)
+        except OSError as e:
+            lg.warning("Can't write quantization table cache '%s': %s", path, e)
+    return table
+
+
+###############################################################################
+#
+class SGRDownsampler:
+    """Rewrite the 24-bit (and for "16" and "8", 256-color) colors in SGR
+    escapes, to the nearest color of the target.
+    """
+    def __init__(self, target:str="256", useCache:bool=True):
+        candidates(target)  # Check it
+        self.target = target
+        self.table = loadTable(target, useCache=useCache)
+        self.unsure = unsureCodes[target]
+        self.cands = candidates(target)
+        self.from256 = None  # For "16" and "8": xterm-256 number -> code
+        if (target != "256"):
+            from colorCharts import xterm256RGB
+            self.from256 = [ self.lookup(*xterm256RGB(n)) for n in range(256) ]
+            if (target == "16"):
+                self.from256[0:16] = list(range(16))
+            else:
+                self.from256[0:8] = list(range(8))
+
+    def lookup(self, r:int, g:int, b:int) -> int:
+        code = self.table[((r >> tableShift) << (2 * tableBits)) |
+            ((g >> tableShift) << tableBits) | (b >> tableShift)]
+        if (code == self.unsure): code = self.search(r, g, b)
+        return code
+
+    def search(self, r:int, g:int, b:int) -> int:
+        """Find the nearest code the slow way, for a color whose table cell
+        isn't all the same.
+        """
+        if (self.target == "256"): return nearest256(r, g, b)
+        return min(self.cands, key=lambda c: (
+            (c[1][0] - r) ** 2 + (c[1][1] - g) ** 2 + (c[1][2] - b) ** 2))[0]
+
+    def colorParams(self, isBg:bool, code:int) -> str:
+        """SGR params for a code from the table.
+        """
+        if (self.target == "256"): return "%d;5;%d" % (48 if isBg else 38, code)
+        if (code < 8): return str((40 if isBg else 30) + code)
+        return str((100 if isBg else 90) + code - 8)
+
+    def rewriteParams(self, params:str) -> str:
+        """Rewrite the params of one SGR escape (the part between "[" and "m").
+        """
+        if (":" in params):  # ITU form, like 38:2::r:g:b; make it the ";" form.
+            ps = []
+            for sub in params.split(";"):
+                fields = sub.split(":")
+                if (fields[0] in ("38", "48") and len(fields) > 2):
+                    if (fields[1] == "2" and len(fields) >= 5):
+                        fields = fields[0:2] + fields[-3:]  # (drop the color space)
+                    ps.extend(f or "0" for f in fields)
+                else:
+                    ps.append(sub)
+        else:
+            ps = params.split(";")
+        out = []
+        i = 0
+        n = len(ps)
+        while (i < n):
+            p = ps[i]
+            if ((p == "38" or p == "48") and i + 1 < n):
+                kind = ps[i+1]
+                try:
+                    if (kind == "2" and i + 4 < n):
+                        code = self.lookup(clampByte(ps[i+2]), clampByte(ps[i+3]),
+                            clampByte(ps[i+4]))
+                        out.append(self.colorParams(p == "48", code))
+                        i += 5
+                        continue
+                    if (kind == "5" and i + 2 < n and self.from256):
+                        out.append(self.colorParams(p == "48", self.from256[clampByte(ps[i+2])]))
+                        i += 3
+                        continue
+                except ValueError:
+                    pass
+            out.append(p)
+            i += 1
+        return ";".join(out)
+
+    def rewrite(self, s:str) -> str:
+        if ("\x1b" not in s): return s
+        return sgrRegex.sub(lambda mat: "\x1b[" + self.rewriteParams(mat.group(1)) + "m", s)
+
+    def rewriteBytes(self, s:bytes) -> bytes:
+        if (b"\x1b" not in s): return s
+        return sgrRegexBytes.sub(lambda mat: b"\x1b[" + self.rewriteParams(
+            mat.group(1).decode("ascii")).encode("ascii") + b"m", s)
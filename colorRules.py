@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+#
+# colorRules.py: Highlight many patterns at once, each in its own color.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import re
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "colorRules",
+    "description"  : "Highlight many patterns at once, each in its own color.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from colorRules import ColorRules
+    cr = ColorRules(seqFor=lambda name: ...)
+    cr.load("myRules.txt")
+    print(cr.highlight(someText))
+
+Support for `colorstring --rules`. A set of (pattern, color name) rules is
+compiled into a ''single'' regex, so each line is scanned once no matter
+how many rules there are. Lines that match nothing cost about as much
+as a plain copy.
+
+`seqFor` is a function that takes a color name (see `colorNames.md`), and
+returns the full escape string to switch to it (`colorstring.py` passes
+one based on its style table).
+
+==Rule files==
+
+One rule per line: a color name, whitespace, and a pattern running to the
+end of the line. Blank lines and lines starting with "#" are ignored.
+The pattern may be prefixed to say what kind it is:
+
+    re:PATTERN        a Python regex (the default, if there's no prefix)
+    lit:STRING        a literal string
+    words:W1 W2 ...   whitespace-separated keywords, matched as whole words
+
+For example:
+
+    # color        pattern
+    red/bold       \\bERROR\\b
+    yellow         words: WARN WARNING DEPRECATED
+    cyan           lit: [main]
+    green          \\d+\\.\\d+\\.\\d+\\.\\d+
+
+The rules are not simply joined with "|" (Python's regex engine would then
+try every rule at every position). Instead, the literal characters at the
+start of each rule (or keyword) are merged into a trie, as in an
+Aho-Corasick automaton, and only the rest of each rule hangs off the trie.
+So at each position only the rules that could start with the character
+there are tried. Rules (or keywords) that start with a literal (optionally
+after `\\b` or `^`) are thus much cheaper than ones starting with, say,
+`\\d+` or `(`. `colorBenchmarks.py rules` shows how throughput changes as
+rules are added.
+
+==Priority==
+
+Matches never overlap. Scanning left to right, the leftmost match wins; if
+several rules match at the same place, the one earlier in the file wins.
+Within a `words:` rule, the longest keyword wins.
+
+=Known bugs and limitations=
+
+Numbered backreferences (\\1) inside a rule won't work, because the rules are
+combined into one regex (which renumbers groups). Use named groups and
+`(?P=name)` instead, with names unique across all the rules.
+
+Global inline flags such as `(?i)` only work at the very start of a rule,
+where they're changed to the scoped form (`(?i:...)`), since the rule is
+not at the start of the combined regex. Anywhere else they're an error.
+
+Matches can run across lines only within one block of input.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+
+###############################################################################
+# Each rule is split into "items": its top-level alternatives, or (for
+# `words:` rules) one per keyword. An item is a list of leading tokens that
+# are single literal characters (or the zero-width `\b` and `^`), plus the
+# rest of its regex. The items are then merged into a trie on those tokens,
+# so at any position the regex engine only follows the branch for the
+# character actually there, instead of trying every rule in turn.
+#
+metaChars = ".^$*+?{}[]()|\\"
+quantifierChars = "*+?{"
+maxPrefix = 64        # Longer literal prefixes just stay in the remainder.
+
+# Global inline flags at the start of a rule, like "(?i)" (the flags are group 1).
+globalFlagsRegex = re.compile(r"\(\?([aiLmsux]+)\)")
+maxHoistChars = 8     # See `ColorRules.compile()`.
+
+def splitAlternatives(pattern:str) -> list:
+    """Split a regex on its top-level "|"s (ignoring those inside groups,
+    character classes, or escaped).
+    """
+    parts = []
+    depth = 0
+    start = 0
+    i = 0
+    n = len(pattern)
+    while (i < n):
+        c = pattern[i]
+        if (c == "\\"):
+            i += 2
+            continue
+        if (c == "["):  # Skip the class, allowing for "[]...]" and "[^]...]"
+            i += 1
+            if (i < n and pattern[i] == "^"): i += 1
+            if (i < n and pattern[i] == "]"): i += 1
+            while (i < n and pattern[i] != "]"):
+                if (pattern[i] == "\\"): i += 1
+                i += 1
+        elif (c == "("): depth += 1
+        elif (c == ")"): depth -= 1
+        elif (c == "|" and depth == 0):
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+def splitPrefix(pattern:str) -> tuple:
+    """Split a regex (with no top-level "|") into a list of leading tokens
+    that can go in the trie, and the rest. Char tokens are 1-char strings;
+    the zero-width ones are r"\b" and "^".
+    """
+    tokens = []
+    i = 0
+    n = len(pattern)
+    while (i < n and len(tokens) < maxPrefix):
+        c = pattern[i]
+        if (c == "\\"):
+            if (i+1 >= n): break
+            d = pattern[i+1]
+            if (d == "b"): tok = r"\b"
+            elif (not d.isalnum() and d != "_"): tok = d
+            else: break  # \d, \w, \1, \x41, etc.
+            width = 2
+        elif (c == "^"):
+            tok = c
+            width = 1
+        elif (c in metaChars):
+            break
+        else:
+            tok = c
+            width = 1
+        if (i+width < n and pattern[i+width] in quantifierChars): break
+        tokens.append(tok)
+        i += width
+    return tokens, pattern[i:]
+
+def isCharToken(tok:str) -> bool:
+    return len(tok) == 1 and tok != "^"
+
+def hoistAnchor(tokens:list, multiline:bool=True) -> list:
+    """Python's regex engine can skip ahead quickly to a possible match only
+    if the regex starts with a literal. So change a leading `\\b` or `^`
+    followed by a literal char `c`, to `c` followed by an equivalent
+    lookbehind (which checks the char before `c`).
+    """
+    if (len(tokens) < 2 or not isCharToken(tokens[1]) or tokens[1] == "\n"):
+        return tokens
+    c = tokens[1]
+    if (tokens[0] == r"\b"):
+        if (re.match(r"\w", c)): look = r"(?<!\w.)"
+        else: look = r"(?<=\w.)"
+    elif (tokens[0] == "^" and multiline):
+        look = r"(?<![^\n].)"
+    else:
+        return tokens
+    return [ c, look ] + tokens[2:]
+
+
+###############################################################################
+#
+class ColorRules:
+    """A list of (color name, regex) rules, compiled into one regex.
+    """
+    def __init__(self, seqFor, reset:str="\x1b[0m", flags:int=re.MULTILINE):
+        self.seqFor = seqFor
+        self.reset = reset
+        self.flags = flags
+        self.rules = []          # (colorName, where-defined)
+        self.items = []          # (prefix tokens, rest of regex, rule number)
+        self.regex = None
+        self.groupSeqs = None    # Group number -> escape string
+
+    def __len__(self):
+        return len(self.rules)
+
+    def addRule(self, colorName:str, pattern:str, where:str="") -> None:
+        mat = globalFlagsRegex.match(pattern)
+        if (mat):  # Make them scoped, since the rule won't be at the start.
+            pattern = "(?%s:%s)" % (mat.group(1), pattern[mat.end():])
+        try:  # (As it will be in the combined regex.)
+            re.compile("(?:%s)" % (pattern), self.flags)
+        except re.error as e:
+            raise ValueError("%sBad regex /%s/: %s" %
+                (where and where + ": ", pattern, e)) from e
+        ruleNum = len(self.rules)
+        self.rules.append( (colorName, where) )
+        for alt in (splitAlternatives(pattern)):
+            tokens, rest = splitPrefix(alt)
+            self.items.append( (tokens, rest, ruleNum) )
+        self.regex = None
+
+    def addLiteral(self, colorName:str, s:str, where:str="") -> None:
+        self.addRule(colorName, re.escape(s), where)
+
+    def addWords(self, colorName:str, words:list, where:str="") -> None:
+        """Add a rule for a list of keywords, matched as whole words.
+        Longer words go first, so the longest one wins.
+        """
+        words = sorted(set(w for w in words if w), key=len, reverse=True)
+        if (not words): return
+        ruleNum = len(self.rules)
+        self.rules.append( (colorName, where) )
+        for w in (words):
+            self.items.append( ([ r"\b" ] + list(w[0:maxPrefix]),
+                re.escape(w[maxPrefix:]) + r"\b", ruleNum) )
+        self.regex = None
+
+    def addRuleLine(self, rec:str, where:str="") -> None:
+        """Parse and add one rule-file line (see the module doc).
+        """
+        rec = rec.strip()
+        if (not rec or rec.startswith("#")): return
+        parts = rec.split(None, 1)
+        if (len(parts) < 2):
+            raise ValueError("%s: No pattern after color '%s'." % (where, rec))
+        colorName, pattern = parts
+        if (pattern.startswith("words:")):
+            self.addWords(colorName, pattern[6:].split(), where)
+        elif (pattern.startswith("lit:")):
+            self.addLiteral(colorName, pattern[4:].lstrip(), where)
+        else:
+            if (pattern.startswith("re:")): pattern = pattern[3:].lstrip()
+            self.addRule(colorName, pattern, where)
+
+    def load(self, path:str, encoding:str="utf-8") -> int:
+        """Add all the rules from a file. @return The number of rules added.
+        """
+        n0 = len(self.rules)
+        with open(path, "r", encoding=encoding) as ifh:
+            for recnum, rec in enumerate(ifh):
+                self.addRuleLine(rec, where="%s:%d" % (path, recnum+1))
+        return len(self.rules) - n0
+
+    def compile(self) -> re.Pattern:
+        """Merge the items into a trie and make that into one regex. Each item
+        ends with an empty marker group "(?P<_crN>)"; since that's the last
+        group to close in a match, `match.lastindex` identifies the rule.
+        """
+        markerRules = []
+        foldCase = bool(self.flags & re.IGNORECASE)
+
+        def makeLeaf(rest:str, ruleNum:int) -> str:
+            markerRules.append(ruleNum)
+            if (rest): rest = "(?:%s)" % (rest)
+            return "%s(?P<_cr%d>)" % (rest, len(markerRules)-1)
+
+        def makeNode(items:list) -> str:
+            """Make the regex for a list of (tokens, rest, ruleNum) items,
+            keeping them in order except where that can't matter.
+            """
+            alts = []
+            i = 0
+            while (i < len(items)):
+                tokens, rest, ruleNum = items[i]
+                if (not tokens):
+                    alts.append(makeLeaf(rest, ruleNum))
+                    i += 1
+                elif (isCharToken(tokens[0])):
+                    # Items starting with different chars can't both match
+                    # here, so a run of them can be regrouped by char.
+                    byChar = {}
+                    while (i < len(items) and items[i][0] and isCharToken(items[i][0][0])):
+                        tokens, rest, ruleNum = items[i]
+                        key = tokens[0].lower() if foldCase else tokens[0]
+                        byChar.setdefault(key, []).append( (tokens[1:], rest, ruleNum) )
+                        i += 1
+                    for c, sub in byChar.items():
+                        alts.append(re.escape(c) + makeNode(sub))
+                else:
+                    tok = tokens[0]
+                    sub = []
+                    while (i < len(items) and items[i][0] and items[i][0][0] == tok):
+                        tokens, rest, ruleNum = items[i]
+                        sub.append( (tokens[1:], rest, ruleNum) )
+                        i += 1
+                    alts.append(tok + makeNode(sub))
+            if (len(alts) == 1): return alts[0]
+            return "(?:%s)" % ("|".join(alts))
+
+        groupSeqs = []
+        ruleSeqs = []
+        for colorName, where in self.rules:
+            try:
+                ruleSeqs.append(self.seqFor(colorName))
+            except KeyError as e:
+                raise ValueError("%s: Unknown color '%s'." % (where, colorName)) from e
+        if (self.items):
+            items = self.items
+            # Hoisting only pays if then every item starts with a literal,
+            # and there aren't so many different ones that the engine's
+            # quick scan for them rarely skips anything.
+            multiline = bool(self.flags & re.MULTILINE)
+            hoisted = [ (hoistAnchor(tokens, multiline), rest, ruleNum)
+                for tokens, rest, ruleNum in self.items ]
+            firstChars = set(tokens[0] if tokens and isCharToken(tokens[0])
+                else None for tokens, rest, ruleNum in hoisted)
+            if (None not in firstChars and len(firstChars) <= maxHoistChars):
+                items = hoisted
+            self.regex = re.compile(makeNode(items), self.flags)
+        else:
+            self.regex = re.compile("(?!)")
+        groupSeqs = [ None ] * (self.regex.groups + 1)
+        for name, gnum in self.regex.groupindex.items():
+            if (name.startswith("_cr")):
+                groupSeqs[gnum] = ruleSeqs[markerRules[int(name[3:])]]
+        self.groupSeqs = groupSeqs
+        lg.info("Compiled %d rules (%d items) to a regex of %d chars, %d groups.",
+            len(self.rules), len(self.items), len(self.regex.pattern),
+            self.regex.groups)
+        return self.regex
+
+    def highlight(self, s:str) -> str:
+        """Return `s` with each match wrapped in its rule's color.
+        """
+        if (self.regex is None): self.compile()
+        groupSeqs = self.groupSeqs
+        reset = self.reset
+
+        def colorMatch(mat):
+            if (mat.end() == mat.start()): return ""
+            return groupSeqs[mat.lastindex] + mat.group() + reset
+
+        return self.regex.sub(colorMatch, s)
+
+    def highlightLines(self, lines:list, encoding:str="utf-8") -> bytes:
+        """Highlight a block of lines (bytes, without newlines), as one string.
+        Undecodable bytes are passed through unchanged.
+        """
+        if (not lines): return b""
+        s = b"\n".join(lines).decode(encoding, errors="surrogateescape")
+        return self.highlight(s).encode(encoding, errors="surrogateescape") + b"\n"
@@ -7,14 +7,14 @@
 import sys
 import os
 import re
-import argparse
-from subprocess import check_output, CalledProcessError
-
 import logging
-from ColorManager import ColorManager
+
+from colorstringCore import (esc, cseq, colorSeq, colorize,
+    getColorManager, clearCache, LSColors, showTable, showList, try256,
+    showEffectSamples, tryTruecolor, getCycleBytes, colorizeBlock, colorizeStream, colorizeFile,
+    namedColorCombinations, shellVarName, shellQuote, writePromptFile)
 
 lg = logging.getLogger()
-cm = ColorManager()
 args = None
 
 __metadata__ = {
@@ -25,13 +25,16 @@ __metadata__ = {
     "type"         : "http://purl.org/dc/dcmitype/Software",
     "language"     : "Python 3.7",
     "created"      : "2018-08-29",
-    "modified"     : "2022-12-07",
+    "modified"     : "2026-10-17",
     "publisher"    : "http://github.com/sderose",
     "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
 }
 __version__ = __metadata__['modified']
 
-descr = """
+def helpText() -> str:
+    """The text for `-h` (only built when that's asked for; see processOptions()).
+    """
+    return """
 =Usage=
 
 colorstring.py [options] [text]
@@ -49,6 +52,10 @@ colorstring.py [options] [text]
 * Return the escape sequence to switch an ANSI terminal to the given color:
     colorstring.py --ansi -c white/black/bold
 
+* Use the same facilities from Python (see `colorstringCore.py`):
+    from colorstringCore import colorize
+    print(colorize("Hello, world", "red/white/bold"))
+
 * Return that same escape string, but with the ESCAPE in the form
 that goes in a bash prompt string (in the second case, also have bash assign it).
 This also include the special
@@ -60,6 +67,13 @@ sequences (\\[...\\]) to make bash not count the escapes into line-length:
     colorstring -zps -c Cyan
     PS1=`colorstring -zps -c Cyan` Hello, `colorstring -zps -c green`"world ==>"
 
+* Better, since the above start Python every time the prompt is shown:
+write a file of shell variables for all the color combinations once, and
+source it from `.bashrc` or `.zshrc` (see `--compilePrompt`):
+    colorstring.py --compilePrompt ~/.colorstring-prompt.sh
+    . ~/.colorstring-prompt.sh
+    PS1="${COLORSTRING_cyan}Hello, ${COLORSTRING_green}world ==>${COLORSTRING_reset} "
+
 * Show a neat chart of foreground/background samples (see also `--list`):
     colorstring.py --table
 
@@ -118,6 +132,37 @@ to your `.emacs` or other init file:
 Show all of stdin in the `colorname`.
 With `--all`, you can specify multiple colornames to alternate, or
 specify the predefined patterns 'usa', 'christmas', 'italy', or 'rainbow'.
+Input is streamed, not read all at once, so this works on huge files and
+on live input such as `tail -f log | colorstring --all -c red -c blue`.
+Output is written in blocks (see `--bufferSize`), but is flushed whenever
+the input pauses for `--flushDelay` seconds.
+
+To read files instead of stdin, use `--input` (repeatable). Then `--jobs N`
+colorizes big files with N processes: each file is cut into chunks at line
+boundaries, each chunk is told where in the color cycle it starts, and the
+results are written back out in order. So the output is byte-for-byte the
+same as without `--jobs`. Stdin can't be split that way, so `--jobs` (over 1)
+without `--input` (or `--lsdir`) is an error.
+
+* ''--rules'' `file`
+
+Copy stdin to stdout (streamed as for `--all`), coloring just the parts that
+match any of many regexes. Each line of `file` has a color name and a regex:
+
+    red/bold       \\bERROR\\b
+    yellow         words: WARN WARNING DEPRECATED
+
+All the rules are compiled into one regex, so each line is scanned just
+once however many rules there are. Where matches could overlap, the leftmost
+wins, and then the rule that comes first. See `colorRules.py` for details.
+
+* ''--strip''
+
+With `--all` or `--rules`, first remove any terminal escapes already in the
+input (colors, but also cursor movement, titles, hyperlinks, etc.; see
+`vtTokenizer.py`). Then colors already there don't fight the new ones
+(such as a reset in the middle of a line turning off the `--all` color),
+and `--rules` regexes can match text that had escapes in the middle of it.
 
 * ''--help-ls''
 
@@ -133,13 +178,38 @@ Show all known combination of colors and effects.
 Most terminal programs do not support all effects.
 See also `--breakLines`, `--table`, and `--xterm256`.
 
-With `--xterm256` and `--breakLines`, a line will be shown for each color number
-0...255, including a word shown in
-
-  the foreground color on the default background,
-  the foreground color on a white background,
-  the background color with the default foreground,
-  the background color with white foreground.
+With `--xterm256`, show the 256 colors as a grid (the 16 system colors, the
+6x6x6 color cube, and the greys), laid out to fit the terminal width
+(`$COLUMNS` if set). Each cell is a background swatch with its number; with
+`--background light` or `dark`, it's the number in that foreground color,
+on white or on black (to see how a color would work with either kind of
+terminal background). With `--breakLines`, a line will be shown for each
+color number 0...255 instead, showing a word in the foreground color
+and on the background color.
+
+With `--truecolor`, show a hue by lightness gradient in 24-bit color, as wide
+as the terminal.
+
+All the charts (`--table`, `--list`, `--effects`, `--xterm256`,
+`--truecolor`) are built in memory and written all at once (see
+`colorCharts.py`), so they appear at once even over a slow connection.
+
+* ''--compilePrompt'' `file`
+
+Write a shell file that bash and zsh can both source, which sets a variable
+for every combination of (at most) one foreground color, one background
+color, and one effect, to that color in the shell's own prompt syntax: for
+bash, like `\\[\\e[1;31;47m\\]`; for zsh, like `%F{red}%K{white}%B`
+(with raw escapes in `%{...%}` for effects zsh lacks). The names are
+`--envPrefix` (default "COLORSTRING"), "_", and the color name with "/"
+changed to "_": `COLORSTRING_red`, `COLORSTRING_red_white_bold`,
+`COLORSTRING__white` (background only), `COLORSTRING_bold`, etc. There's
+also `COLORSTRING_reset`. Set the prompt with double quotes, so the
+variables are expanded when it's assigned.
+
+The first line of the file holds a hash of the rest, and the file is only
+rewritten if that changes, so it's cheap to run this from a login script
+(and the file's mtime means something).
 
 * ''--lscolorset'' `oldcolor` `newcolor`
 
@@ -154,6 +224,25 @@ Figure out what color `ls` will use to
 display a given file's name. If you give an expression such as '*.html' that's
 ok, too.
 
+* ''--lsfilter''
+
+Copy stdin (or the `--input` files) to stdout, coloring each line's path as
+`ls` would color that file, based on `$LS_COLORS` (or the `dircolors`
+defaults). This is for the output of `find`, `git ls-files`, `du` (only the
+part after the last tab is colored), and so on. Only the name is looked at,
+not the file itself (except that a trailing "/" means a directory). The
+LS_COLORS entries are compiled into an index first (see `lsColorsIndex.py`),
+so each path takes about the same time however many entries there are.
+
+* ''--lsdir'' `dir`
+
+List the entries in `dir`, one per line, colored as `ls --color` would
+color them, in directory order (like `ls -U1 --color`). This uses
+`os.scandir()`, so most entries need no stat() at all; only those whose color
+depends on mode bits (executable, setuid, sticky, etc.) or on a symlink's
+target get one. With `--jobs N`, those stat()s are done by N threads, which
+helps a lot on network filesystems. Output is written in batches.
+
 * ''--lslist''
 
 List how `ls` colors are set up, organized by color
@@ -163,6 +252,15 @@ the mnemonics `dircolors` uses to refer to various file classes (otherwise,
 it assigns color by file extensions).
 See `--lsset` for a slightly easier way to modify `dircolors`.
 
+Since running `dircolors` takes a subprocess, its parsed output is cached
+(in `$XDG_CACHE_HOME/colorstring/`, default `~/.cache/colorstring/`).
+`dircolors` is given the first settings file that exists
+(`~/.dircolors`, `~/.dir_colors`, or `/etc/DIR_COLORS`), as shell startup
+files usually do. The cache is used only if the `dircolors` binary, that
+settings file (by path, size, and modification time), and `$TERM`,
+`$COLORTERM`, and `$LS_COLORS` are all unchanged. Use `--noCache` to
+bypass it, or `--clearCache` to delete it.
+
 In general, the default settings are (on my system -- BSD and Linux are
 significantly different):
 
@@ -208,8 +306,9 @@ Different *nix versions differ between LSCOLORS and LS_COLORS.
 Not yet as thoroughly tested as the Perl predecessor, esp. --msg and --warn
 and just getting a raw code.
 
-You can't set more than one effect (such as blink, bold, inverse, hidden,
-and underline) at once.
+Several effects (such as blink, bold, inverse, hidden, and underline) can
+be set at once, as in 'red/white/bold/ul'. But negated effects (like '!bold')
+and numeric colors are still left to `ColorManager`.
 
 The color-name lookup used with the `--lslist` option can't handle
 simultaneous property, foreground, and background settings unless the
@@ -395,6 +494,30 @@ distinction.
 * 2022-12-07: Reorganize options to make more sense.
 Allow 'light grey' as synonym for 'white'. cf zsh prompt specs.
 Fix wrong args to ColorManager.colorize(). Support --table + --effects.
+* 2026-10-17: Add packed styles (fg, bg, and an effect bitmask in one int),
+with a memoized name parser and a table of SGR strings indexed by style.
+`cseq()`, `colorSeq()`, `colorizeString()`, `--all`, and `--table` use it.
+Allow multiple effects per color.
+* 2026-10-17: Make `--all` stream stdin in binary blocks, with coalesced
+output and a flush timer. Add `--bufferSize` and `--flushDelay`.
+* 2026-10-17: Add `--rules` to highlight many regexes at once (see `colorRules.py`).
+* 2026-10-17: Add `--input` and `--jobs` (see `parallelChunks.py`).
+* 2026-10-17: Cache parsed `dircolors` output on disk. Add `--noCache` and
+`--clearCache`. Fix parsing of `dircolors` output (bytes, quotes).
+* 2026-10-17: Add `--lsfilter`. Make `--lsget` use a compiled index of
+LS_COLORS (see `lsColorsIndex.py`) instead of trying each entry as a regex.
+* 2026-10-17: Add `--lsdir`. Fix `getFileCategory()` and `isExecutable()`,
+which used nonexistent stat_result attributes.
+* 2026-10-17: Build charts in one buffer and write them at once. Redo
+`--xterm256` as a grid fitted to the terminal width. Add `--truecolor` and
+`--background`.
+* 2026-10-17: Add `--compilePrompt`. Make `--setenv` work (it looped over
+an empty table).
+* 2026-10-17: Move everything but the command-line handling to
+`colorstringCore.py`, which can be imported without side effects. Load
+`ColorManager` and `argparse` only when needed, so `colorstring -c red x`
+starts faster (see `colorBenchmarks.py startup`).
+* 2026-10-17: Add `--strip` (see `vtTokenizer.py`).
 
 
 =To do=
@@ -429,430 +552,56 @@ or [https://github.com/sderose].
 =Options=
 """
 
-if ("lscolorVarName" in os.environ):
-    theEnvVarName = os.environ("lscolorVarName")
-elif ("OSTYPE" in os.environ and os.environ["OSTYPE"] == "darwin"):
-    theEnvVarName = "LSCOLORS"
-else:
-    theEnvVarName = "LS_COLORS"
-
-boldToken = "bold"
-blinkToken = "blink"
-inverseToken = "inverse"
-ulToken = "ul"
-esc = chr(27)
-
-# Table of basic color names. +30 for foreground, +40 for background
-atomicColors = cm.colorNumbers
-if (len(atomicColors) != 9):
-    raise ValueError("Bad color table from ColorManager!")
-
-effectsOn = cm.effectNumbers
-
-colorTable = {}      # Map from named colors to codes (switch to just use ColorManager)
-lsColors = []
-
-def cseq(name):
-    return cm.getColorString(name)
-
-
-###############################################################################
-#
-def colorizeString(msg, fg:str="", bg:str="", effect:str=""):
-    """Basically the same as ColorManager.colorize().
-    """
-    #print("calling cm.colorize with '%s', '%s', '%s'." % (fg, bg, effect))
-    return cm.colorize(msg, fg=fg, bg=bg, effect=effect)
-
-def colorSeq(name):
-    if (isinstance(name, list)):
-        lg.error("Multi-color not yet supported")
-        name = name[0]
-    try:
-        cs = cm.getColorString(name)
-    except TypeError as e:
-        lg.error("Error in ColorManager: %s", e)
-        cs = ""
-    return cs
-
-
-##############################################################################
-# TODO: Move lscolors support to other package; add set ability; add direct
-# mapping to ColorManager colors, from booleans on stat values?
-#
-class LSColors:
-    """Do some support for `ls` colorizing, for various *nix flavors.
-    """
-    import stat
-
-    ###############################################################################
-    # Define explanations for the non-file-glob cases used by LS_COLORS (Linux)
-    #
-    linuxLSSpecials = {
-        "bd" : "BLK                    Block device driver",
-        "ca" : "CAPABILITY             File with capability",
-        "cd" : "CHR                    Character device driver",
-        "di" : "DIR                    Directories",
-        "do" : "DOOR                   Door (eh?)",
-        "ex" : "EXEC                   Executable files",
-        "??" : "FILE                   Other file (normally not set)",
-        "hl" : "HARDLINK               Hard link",
-        "ln" : "LINK                   Symbolic link (can use 'target' color)",
-        "or" : "ORPHAN                 Broken symbolic link, etc.",
-        "ow" : "OTHER_WRITABLE         Other-writable, non-sticky file",
-        "pi" : "FIFO                   Pipe",
-        "rs" : "RESET                  Reset to default color",
-        "sg" : "SETGID                 SetGID",
-        "so" : "SOCK                   Socket?",
-        "st" : "STICKY                 Directory with sticky bit set (+t)",
-        "su" : "SETUID                 SetUID",
-        "tw" : "STICKY_OTHER_WRITABLE  Sticky other writable file",
-    }
-
-    bsdLSSpecials = {
-        "0" : "regular file",   # FILE?
-        "1" : "directory",      # DIR
-        "2" : "symbolic link",   # LINK
-        "3" : "socket",   # SOCK
-        "4" : "pipe",   # FIFO
-        "5" : "executable",   # EXEC
-        "6" : "block special",   # BLK
-        "7" : "character special",   # CHR
-        "8" : "executable with setuid bit set",   #
-        "9" : "executable with setgid bit set",   #
-        "10" : "directory writable to others, with sticky bit",   #
-        "11" : "directory writable to others, without sticky bit",   #
-    }
-
-    bsdColorMap = {
-        "a": "black",
-        "b": "red",
-        "c": "green",
-        "d": "brown",
-        "e": "blue",
-        "f": "magenta",
-        "g": "cyan",
-        "h": "light grey",
-        "A": "bold black",       # usually shows up as dark grey",
-        "B": "bold red",
-        "C": "bold green",
-        "D": "bold brown",       # usually shows up as yellow",
-        "E": "bold blue",
-        "F": "bold magenta",
-        "G": "bold cyan",
-        "H": "bold light grey",  # looks like bright white",
-        "x": "default",          # foreground or background",
-    }
-
-    @staticmethod
-    def bsdShowLSColors() -> None:
-        pairs = LSColors.bsdParseLSColors()
-        if (pairs):
-            for i, pair in enumerate(pairs):
-                cname = "%s/%s" % (LSColors.bsdColorMap[pair[0]], LSColors.bsdColorMap[pair[1]])
-                print("%2d: %-24s %s" % (i, cname, LSColors.bsdLSSpecials[i]))
-        return
-
-    @staticmethod
-    def bsdParseLSColors() -> list:
-        """PArse a 22-char LSCOLORS BSD value into 11 tuples, each with a
-        single-char color-codes for foreground and background.
-        TODO: Should this return one-char codes or names?
-        """
-        if ('LSCOLORS' not in os.environ):
-            if ('LS_COLORS' in os.environ):
-                lg.error("No $LSCOLORS in env, but $LS_COLORS is. ")
-            else:
-                lg.warning("No $LSCOLORS in env.")
-            return None
-        lsc = os.environ['LSCOLORS']
-        if (len(lsc) != 22):
-            lg.error("Expected 22 chars in LSCOLORS, but got %d: '%s'.", len(lsc), lsc)
-            return
-        colorPairList = []
-        for codeStart in range(len(lsc)):
-            fgbg = ( lsc[codeStart], lsc[codeStart+1] )
-            colorPairList.append( fgbg )
-        return colorPairList
-
-    # Take an n;m... string as used in environment variable LS_COLORS (Linux),
-    # and try to look up what it means.
-    # Normalizes to increasing (numeric) order.
-    #
-    @staticmethod
-    def getColorName(code):   ### OBSOLETE, FIX
-        code = re.sub(r'0+(\d)', "\\1", code)  # Strip any leading zeros
-        code2 = ';;'.join(sorted(re.split(';', code)))
-        lg.log(logging.INFO-1, "normalized order: '%s' -> '%s'", str(code), str(code2))
-
-        code = code2
-        code = "[" + code + "m"
-        for k in (colorTable):
-            if (colorSeq(k) == code): return(k)
-
-        lg.log(logging.INFO-1, "Couldn't find '%s' in color table.\n", code)
-        return("?")
-
-    @staticmethod
-    def getFileCategory(path:str) -> None:
-        """The category to be used for LSCOLORS on BSD, MacOSX, and similar.
-        There doesn't seem to be a category for regular files? I guess they
-        just go in the default color?
-        @return Category number 1-11, or 0 for regular, or -1 on fail.
-        TODO: Test and verify vs. reality....
-        """
-        if (not os.path.exists(path)): return -1
-        st = os.stat(path)
-        if (st.S_ISLNK): return 2   # symbolic link
-        if (st.S_ISSOCK): return 3  # socket
-        if (st.S_ISFIFO): return 4  # pipe
-        if (st.S_ISBLK): return 6   # block special
-        if (st.S_ISCHR): return 7   # character special
-        if (st.S_ISDIR):
-            if (st.S_ISWOTH and st.S_ISVTX): return 10  # dir w to others, +sticky bit
-            if (st.S_ISWOTH and not st.S_ISVTX): return 11  # dir w to others, -sticky bit
-            return 1                           # directory
-        if (LSColors.isExecutable(st)):
-            if (st.S_ISUID): return 8          # executable with setuid bit set
-            if (st.S_ISGID): return 9          # executable with setgid bit set
-            return 5                           # executable
-        assert st.s_ISREG
-        return 0                               # (0 for regular file)
-
-    @staticmethod
-    def isExecutable(st:os.stat_result) -> bool:
-        """Return whether (for purposes of getFileCategory()) the item is
-        executable.
-        TODO: Check exactly what ls does -- does executable mean by current user,
-        or current user qua user or qua group or qua other? Or...?
-        """
-        return st.S_IXUSR or st.S_IXGRP or st.S_IXRXO
-
-    @staticmethod
-    def setupDircolors():
-        """'dircolors' is a Linux /GNU corutils command that helps set bash colors
-        for the ls command, via environment variable 'LS_COLORS'.
-        It is not typically available on BSD/MacOSX.
-        """
-        global lsColors
-        try:
-            lsColors = re.split(r':', check_output('dircolors'))
-        except CalledProcessError as e:
-            sys.stderr.write("'dircolors' failed. OS dependency?\n    %s" % (e))
-
-        lsColors[0] = re.sub(r'LS_COLORS=', '', lsColors[0])
-        lsColors.pop()  # "export LS_COLORS"
-        lsColors[-1] = re.sub(r';;', '', lsColors[-1])
-
-    @staticmethod
-    def helpLSColors():
-        print("The LS_COLORS keys are (see also dircolors --print-database):")
-        lssp = sorted(LSColors.linuxLSSpecials.keys())
-        for sp in (lssp):
-            print("    sp\t" + LSColors.linuxLSSpecials[sp])
-        sys.exit()
-
-    @staticmethod
-    def doLsList():
-        """Display a list of all the LS_COLORS or LSCOLORS settings.
-        Lots of OS differences here....
-        See also 'theEnvVarName', set up top.
-        """
-        bsdName = "LSCOLORS"
-        bsdValue = os.environ[bsdName] if bsdName in os.environ else ""
-        print("%s (for BSD): '%s'" % (bsdName, bsdValue))
-        linuxName = "LS_COLORS"
-        linuxValue = os.environ[linuxName] if linuxName in os.environ else ""
-        print("%s (for Linux): '%s'" % (linuxName, linuxValue))
-
-        LSColors.setupDircolors()
-        byColor = {}
-        for lsc in (lsColors):
-            mat = re.search(r'^(.*)=(.*)', lsc)
-            #expr = mat.group(1)
-            colorCode = mat.group(2)
-            if (byColor[colorCode] is not None):
-                byColor[colorCode] = ""
-            byColor[colorCode] += "expr "
-
-        print("Colors for 'ls':")
-        coff = cm.getColorString('default')
-        for code in (sorted(byColor.keys())):
-            name = LSColors.getColorName(code)
-            if (colorSeq(name) is None): con2 = ""
-            else: con2 = esc + colorSeq(name)
-            print("%s%s (%s):%s %s" % (con2, code, name, coff, byColor[code]))
-
-    @staticmethod
-    def doLsGet(what:str):
-        LSColors.setupDircolors()
-        found = 0
-        coff = cm.getColorString('default')
-        for lsc in (lsColors):
-            if (re.match(what, lsc)):
-                found += 1
-                code = lsc = re.sub(r'^.*=', '', lsc)
-                name = LSColors.getColorName(code)
-                if (colorSeq(name) is None): con2 = ""
-                else: con2 = esc + colorSeq(name)
-                print("%s\t%s (%s%s%s)" % (lsc, code, con2, name, coff))
-        if (not (found>0)):
-            print("No LS_COLORS mapping found for '%s'." % (what))
-
-
-###############################################################################
-# For '--xterm56' (unfinished):
-#     FG codes: '\e38;5;nm' for `n` from 0 to at least 255.
-#     BG codes: '\e48;5;nm'.
-#
-def showTable(sampleText:str="Text") -> None:
-    """Show a short table of foreground/background combinations, plain and bold.
-    A column for each bg color, a row for each fg color.
-    """
-    slen = len(sampleText)
-    rowHeadWidth = 10
-    rowHeadFormat = "%2d: %-" + str(rowHeadWidth) + "s"
-
-    # Make table header row
-    thead1 = thead2 = " " * (rowHeadWidth + 4)
-    for cname, cnum in (atomicColors.items()):
-        thead1 += cname.ljust(slen+1)
-        thead2 += str(cnum+40).ljust(slen+1)
-    print(thead1 + "\n" + thead2)
-
-    effects = [ "Bold", "Plain" ]
-    if (args.effects):
-        effects = [
-            "plain"      ,  # 0   (can be used to express "no special effect")
-            "bold"       ,  # 1   aka 'bright'
-            "faint"      ,  # 2
-            "italic"     ,  # 3   (rare)
-            "underline"  ,  # 4   aka 'ul'
-            "blink"      ,  # 5
-            "fblink"     ,  # 6?  aka 'fastblink' (rare)
-            "reverse"    ,  # 7   aka 'inverse'
-            "concealed"  ,  # 8   aka 'invisible' or 'hidden'
-            "strike"     ,  # 9   aka 'strikethru' or 'strikethrough'
-        ]
-
-    for effectName in effects:
-        print("\nTable of %s foreground colors on all backgrounds:" % (effectName))
-        print(thead1 + "\n" + thead2)
-        for i, fgName in enumerate(atomicColors.keys()):
-            fgNum = 30 + i
-            if (fgNum == 38): fgNum = 39  # 'default' or 'off'...
-            buf = rowHeadFormat % (fgNum, fgName)
-            for bgName in (atomicColors.keys()):
-                #fullName = fgname + "/" + bgname
-                if (effectName=='Plain'): effectName = ""
-                buf += colorizeString(sampleText, fg=fgName, bg=bgName, effect=effectName) + " "
-            print(buf)
-    return
-
-def showList() -> None:
-    if (args.breakLines): nl = "\n"
-    else: nl = " "
-    ctable = cm.getColorStrings()
-    n = 0
-    for ct in (sorted(ctable.keys())):
-        print(ctable[ct] + ct + cseq('default'), end=nl)
-        n += 1
-    print("\nDone, %d combinations." % (n))
-
-# TODO: Use ColorManager.
-#
-def setupEffects() -> None:
-    shortMap = {
-        "black"     : "blk",
-        "red"       : "red",
-        "green"     : "grn",
-        "yellow"    : "yel",
-        "blue"      : "blu",
-        "magenta"   : "mag",
-        "cyan"      : "cyn",
-        "white"     : "wht",
-    }
-    effects = sorted(effectsOn.keys())
-    for effect in range(len(effects)):
-        print("")
-        print("******* Colors with " + (effects[effect] or "no") + " effect:")
-
-        for fg in (atomicColors):
-            print("fg: '%s'." % (fg))
-            buf0 = ""
-            for bg in (atomicColors):
-                sample = ' ' + shortMap[fg] + "/" + shortMap[bg] + ' '
-                if (args.breakLines): sep = "\n"
-                else: sep = " "
-                buf0 += colorizeString(sample, fg=fg, bg=bg, effect=effect) + sep
-            print(buf0)
-
-        print("")
-
-def try256() -> None:
-    end = esc + "[0m"
-    print("\n******* Foreground and Background xterm256 colors:")
-    for i in range(256):
-        e1 = esc + "[38;5;%dm (fg sample) %s\t" % (i, end)
-        e2 = esc + "[38;5;%dm %c[47m (fg sample) %s\t" % (i, esc, end)
-        e3 = esc + "[48;5;%dm (bg sample) %s\t" % (i, end)
-        e4 = esc + "[48;5;%dm %c[37m (bg sample) %s\t" % (i, esc, end)
-        nl = ""
-        if (args.breakLines): nl = "\n"
-        print("i: " + nl + e1 + e2 + e3 + e4)
-    print("")
-
-def showEffectSamples() -> None:
-    for e in (sorted(effectsOn.keys())):
-        print("%-12s '%s'" % (e, colorizeString(args.sampleText, fg="blue", bg="white", effect=e)))
-
 def colorizeStdin() -> None:
-    reset = colorSeq("default")
-    bg_reset = colorSeq("/default")
-    clist = []
-    for colorName in (args.colors):
-        if (colorName == "usa"):
-            clist.append(cseq("red/bold"))
-            clist.append(cseq("white/bold"))
-            clist.append(cseq("blue/bold"))
-
-        elif (colorName == "christmas"):
-            clist.append(cseq("red/bold"))
-            clist.append(cseq("green/bold"))
-
-        elif (colorName == "italy"):
-            clist.append(cseq("red/bold"))
-            clist.append(cseq("green/bold"))
-            clist.append(cseq("white/bold"))
-
-        elif (colorName == "rainbow"):
-            clist.append(cseq("red/bold"))
-            clist.append(cseq("red"))
-            clist.append(cseq("yellow/bold"))
-            clist.append(cseq("green/bold"))
-            clist.append(cseq("blue/bold"))
-            clist.append(cseq("magenta/bold"))
-            clist.append(cseq("magenta"))
-
-        else:
-            seq0 = colorSeq(colorName)
-            if (not seq0):
-                print("colorstring: Unknown color '%s'." % (colorName))
-                print("Known: %s" % (" ".join(cm.colorStrings.keys())))
-                sys.exit(0)
-            clist.append(seq0)
-
-    #warn "Color sequence: " + (" ".join(clist)) + "\n"
-
-    n = 0
-    for rec in sys.stdin.readlines():
-        rec = rec.strip()
-        print(esc + clist[n] + rec
-            + esc + reset
-            + esc + bg_reset)
-        n += 1
-        if (n >= len(clist)):
-            n = 0
+    if (args.rules):
+        from colorRules import ColorRules
+        # (The reset is ColorRules' own "ESC[0m", which ends effects, too.)
+        rules = ColorRules(seqFor=lambda name: esc + cseq(name))
+        for path in (args.rules):
+            try:
+                rules.load(path)
+            except (IOError, ValueError) as e:
+                lg.error("Can't load --rules file: %s", e)
+                sys.exit(99)
+        try:
+            rules.compile()
+        except re.error as e:
+            lg.error("Can't combine the --rules into one regex: %s", e)
+            sys.exit(99)
+        nCycle = 1
+        def colorizer(lines, n): return rules.highlightLines(lines), n
+    elif (args.lsfilter):
+        lci = LSColors.getIndex(useCache=not args.noCache)
+        nCycle = 1
+        def colorizer(lines, n): return lci.colorizeLines(lines), n
+    else:
+        try:
+            prefixes, suffix = getCycleBytes(args.colors)
+        except KeyError as e:
+            print("colorstring: Unknown color '%s'." % (e.args[0]))
+            print("Known: %s" % (" ".join(getColorManager().colorStrings.keys())))
+            sys.exit(0)
+        nCycle = len(prefixes)
+        def colorizer(lines, n): return colorizeBlock(lines, prefixes, suffix, n)
+    if (args.strip):
+        from vtTokenizer import stripEscapes
+        baseColorizer = colorizer
+        def colorizer(lines, n):
+            return baseColorizer([ stripEscapes(rec) for rec in lines ], n)
+    try:
+        if (not args.input):
+            colorizeStream(sys.stdin.fileno(), sys.stdout.buffer, colorizer,
+                chunkSize=args.bufferSize, outBlock=args.bufferSize,
+                flushDelay=args.flushDelay)
+        n = 0
+        for path in (args.input or []):
+            try:
+                n = colorizeFile(path, sys.stdout.buffer, colorizer, nCycle, n,
+                    jobs=args.jobs, bufferSize=args.bufferSize, flushDelay=args.flushDelay)
+            except OSError as e:
+                lg.error("Can't read '%s': %s", path, e)
+    except BrokenPipeError:
+        sys.stderr.close()  # e.g., piped into `head`
     return
 
 def outConvert(s:str) -> str:
@@ -916,13 +665,30 @@ def outConvert(s:str) -> str:
 ###############################################################################
 # Main
 #
+def positiveInt(s:str) -> int:
+    """argparse type for options that must be at least 1.
+    """
+    import argparse
+    try:
+        n = int(s)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError("'%s' is not an integer." % (s)) from e
+    if (n < 1): raise argparse.ArgumentTypeError("must be at least 1 (got %d)." % (n))
+    return n
+
 def processOptions():
+    import argparse
+
+    class HelpParser(argparse.ArgumentParser):
+        def format_help(self):
+            self.description = helpText()
+            return super().format_help()
+
     try:
         from BlockFormatter import BlockFormatter
-        parser = argparse.ArgumentParser(
-            description=descr, formatter_class=BlockFormatter)
+        parser = HelpParser(formatter_class=BlockFormatter)
     except ImportError:
-        parser = argparse.ArgumentParser(description=descr)
+        parser = HelpParser()
 
     # Output color(s) and format choices
     #
@@ -945,11 +711,32 @@ def processOptions():
     #
     parser.add_argument("--all", action="store_true",
         help="Show all of stdin in the 'colorname'.")
+    parser.add_argument("--bufferSize", type=positiveInt, default=1<<16, metavar="N",
+        help="With `--all`, read and write in blocks of about this many bytes.")
+    parser.add_argument("--flushDelay", type=float, default=0.1, metavar="SEC",
+        help="""With `--all`, flush pending output if no input arrives
+for this many seconds (so `tail -f | colorstring --all` stays live).""")
+    parser.add_argument("--input", "-i", type=str, action="append", metavar="FILE",
+        help="""With `--all` or `--rules`, read this file instead of stdin.
+Repeatable (the color cycle continues from one file to the next).""")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+        help="""With `--input`, split regular files into chunks and colorize
+them with N processes. The output is the same as without it.
+With `--lsdir`, use N threads to stat() files. Not allowed otherwise.""")
+    parser.add_argument("--rules", type=str, action="append", metavar="FILE",
+        help="""Copy stdin, coloring whatever matches the regexes in FILE
+(see `colorRules.py` for the format). Repeatable.""")
+    parser.add_argument("--strip", action="store_true",
+        help="""With `--all` or `--rules`, remove any escapes already in
+the input before coloring it.""")
     parser.add_argument("--warn", "-w", action="store_true",
         help="Send the text to stderr.")
 
     # Lists and charts and such
     #
+    parser.add_argument("--background", type=str, choices=[ "light", "dark" ],
+        help="""For charts, show foreground samples on white or black, as
+they'd look on a light or dark terminal.""")
     parser.add_argument("--breakLines", action="store_true",
         help="With `--list`, put each example on a separate line.")
     parser.add_argument("--effects", action="store_true",
@@ -965,9 +752,14 @@ def processOptions():
 the "plain" and "bold" effects, but shows all foreground/background
 combinations, along with the color names and numbers.
 See also `--breakLines`, `--list`, `--sampleText`, `-v`, and `--xterm256`.""")
+    parser.add_argument("--truecolor", action="store_true",
+        help="Show a chart of 24-bit colors, if your terminal supports them.")
 
     # Options related to LS_COLORS / LSCOLORS
     #
+    parser.add_argument("--compilePrompt", "--compile-prompt", type=str, metavar="FILE",
+        help="""Write a file of bash/zsh prompt color variables to source,
+unless it's already up to date.""")
     parser.add_argument("--envPrefix", type=str, default="COLORSTRING", metavar="P",
         help="Prefix to name env variables for color names with --setenv.")
     parser.add_argument("--lscolorset", type=str,
@@ -976,6 +768,11 @@ See also `--breakLines`, `--list`, `--sampleText`, `-v`, and `--xterm256`.""")
         help="""Find what color `ls` will use to display file names.
 Provide a sample file to specify a category (see 'man ls', or the -h here).
 This requires the 'dirColors' command (mainly available on Linux.""")
+    parser.add_argument("--lsdir", type=str, metavar="DIR",
+        help="""List the entries in DIR, colored as `ls` would (see also `--jobs`).""")
+    parser.add_argument("--lsfilter", action="store_true",
+        help="""Copy stdin (or `--input`), coloring paths (one per line, such
+as from `find` or `du`) the way `ls` would, based on their names.""")
     parser.add_argument("--lslist", "--showlscolors", action="store_true",
         help="List how `ls` colors are set up, organized by color.")
     parser.add_argument("--lsset", type=str, default="",
@@ -984,10 +781,15 @@ This requires the 'dirColors' command (mainly available on Linux.""")
         help="""Returns a (long) string you can
 use to set a lot of environment variables, to hold the required escapes to
 set given colors. The variable names are 'COLORSTRING_' plus the color names
-you can give to this script (but you can change the prefix using `--envPrefix`.""")
+you can give to this script, with '/' changed to '_' (but you can change
+the prefix using `--envPrefix`). Use like: eval "$(colorstring --setenv)".""")
 
     # Miscellaneous options
     #
+    parser.add_argument("--clearCache", "--clear-cache", action="store_true",
+        help="Delete cached data (such as parsed `dircolors` output), then exit.")
+    parser.add_argument("--noCache", "--no-cache", action="store_true",
+        help="Don't read or write cached data (such as for `--lslist`).")
     parser.add_argument("--quiet", "-q", action="store_true",
         help='Suppress most messages.')
     parser.add_argument(
@@ -997,7 +799,7 @@ you can give to this script (but you can change the prefix using `--envPrefix`."
         "--version", action="version", version=__version__,
         help='Display version information, then exit.')
     parser.add_argument("--xterm256", action="store_true",
-        help="Enable the 256-color set supported by TERM=xterm-256color.")
+        help="Show a chart of the 256-color set supported by TERM=xterm-256color.")
 
     # Rest of arguments (non-option text)
     #
@@ -1006,6 +808,8 @@ you can give to this script (but you can change the prefix using `--envPrefix`."
         help='Text to colorize.')
 
     args0 = parser.parse_args()
+    if (args0.jobs > 1 and not (args0.input or args0.lsdir)):
+        parser.error("--jobs needs --input (or --lsdir); stdin can't be split.")
     if (lg and args0.verbose):
         logging.basicConfig(level=logging.INFO - args0.verbose,
             format="%(message)s")
@@ -1017,65 +821,83 @@ you can give to this script (but you can change the prefix using `--envPrefix`."
     if (not args0.text): args0.text = args0.sampleText
     return(args0)
 
-args = processOptions()
-color0 = args.colors[0]
-
-#setupEffects()
-
-if (args.xterm256 and os.environ['TERM'] != "xterm256color"):
-    print("You set --xterm256, but TERM is '%s'." % (os.environ['TERM']))
-
-if (args.table):
-    showTable(sampleText=args.sampleText)
-    sys.exit()
-if (args.list):
-    showList()
-    sys.exit()
-if (args.xterm256):
-    try256()
-    sys.exit()
-if (args.effects and not args.table):
-    showEffectSamples()
-    sys.exit()
-
-if (args.helpls):
-    LSColors.helpLSColors()
-    sys.exit()
-if (args.lslist):
-    LSColors.doLsList()
-    sys.exit()
-if (args.lsget != ""):
-    LSColors.doLsGet(args.lsget)
-    sys.exit()
-
-if (args.setenv):
-    # You can't easily set the relevant environment since it's
-    # owned by the parent process. So return a big string the caller can use....
-    lsbuf = ""
-    for cc in (colorTable):
-        seq = re.sub(r'\[', '', colorSeq(cc))
-        seq = re.sub(r'm$', '', seq)
-        lsbuf += args.envPrefix + "_c='" + seq + "'"
-    print(lsbuf)
-    sys.exit()
-
-if (not args.colors):
-    # Remaining commands require that a color be specified.
-    sys.stderr.write("No color(s) specified.\n")
-
-if (args.ansi or args.bps or args.zps):
-    escString = colorSeq(args.colors[0])
-    if (not escString):
-        print("colorstring: Unknown color key '%s'. Use -h for help." % (args.colors[0]))
-        sys.exit(99)
-    escString = outConvert(escString)
-    print(escString, end="")
-    sys.exit()
-
-if (args.all):  # copy stdin coloring each line in rotation.
-    colorizeStdin()
-elif (args.warn):
-    sys.stderr.write(cm.colorize(args.text + "\n", argColor=color0))
-else:
-    #print("color0: %s, %s" % (color0, type(color0)))
-    print(cm.colorize(args.text, argColor=color0))
+if __name__ == "__main__":
+    args = processOptions()
+    color0 = args.colors[0]
+
+    #setupEffects()
+
+    if (args.xterm256 and "256color" not in os.environ.get('TERM', "")):
+        lg.warning("You set --xterm256, but TERM is '%s'.", os.environ.get('TERM', ""))
+
+    if (args.table):
+        showTable(sampleText=args.sampleText, allEffects=args.effects,
+            background=args.background)
+        sys.exit()
+    if (args.list):
+        showList(breakLines=args.breakLines)
+        sys.exit()
+    if (args.xterm256):
+        try256(breakLines=args.breakLines, mode="fg" if args.background else "bg",
+            background=args.background)
+        sys.exit()
+    if (args.truecolor):
+        tryTruecolor(background=args.background)
+        sys.exit()
+    if (args.effects and not args.table):
+        showEffectSamples(sampleText=args.sampleText)
+        sys.exit()
+
+    if (args.clearCache):
+        lg.info("Removed %d cache file(s).", clearCache())
+        sys.exit()
+
+    if (args.helpls):
+        LSColors.helpLSColors()
+        sys.exit()
+    if (args.lslist):
+        LSColors.doLsList(useCache=not args.noCache)
+        sys.exit()
+    if (args.lsget != ""):
+        LSColors.doLsGet(args.lsget, useCache=not args.noCache)
+        sys.exit()
+    if (args.lsdir):
+        LSColors.doLsDir(args.lsdir, threads=args.jobs, useCache=not args.noCache)
+        sys.exit()
+
+    if (args.setenv):
+        # You can't easily set the relevant environment since it's
+        # owned by the parent process. So return a big string the caller can use....
+        lsbuf = []
+        for cc in (namedColorCombinations()):
+            lsbuf.append("export %s=%s" % (
+                shellVarName(args.envPrefix, cc), shellQuote(esc + colorSeq(cc))))
+        print("\n".join(lsbuf))
+        sys.exit()
+    if (args.compilePrompt):
+        if (writePromptFile(args.compilePrompt, prefix=args.envPrefix)):
+            lg.info("Wrote '%s'.", args.compilePrompt)
+        else:
+            lg.info("'%s' is already up to date.", args.compilePrompt)
+        sys.exit()
+
+    if (not args.colors):
+        # Remaining commands require that a color be specified.
+        sys.stderr.write("No color(s) specified.\n")
+
+    if (args.ansi or args.bps or args.zps):
+        escString = colorSeq(args.colors[0])
+        if (not escString):
+            print("colorstring: Unknown color key '%s'. Use -h for help." % (args.colors[0]))
+            sys.exit(99)
+        escString = outConvert(escString)
+        print(escString, end="")
+        sys.exit()
+
+    if (args.all or args.rules or args.lsfilter):  # copy stdin coloring each line in rotation.
+        colorizeStdin()
+    elif (args.warn):
+        sys.stderr.write(colorize(args.text + "\n", argColor=color0))
+    else:
+        #print("color0: %s, %s" % (color0, type(color0)))
+        print(colorize(args.text, argColor=color0))
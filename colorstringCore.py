@@ -0,0 +1,1037 @@
+#!/usr/bin/env python3
+#
+# colorstringCore.py: The reusable parts of colorstring.py.
+# 2026-10-17: Split out of colorstring.py, by Steven J. DeRose.
+#
+import sys
+import os
+import re
+import stat
+import functools
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "colorstringCore",
+    "description"  : "The reusable parts of colorstring.py.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from colorstringCore import colorize, cseq, LSColors
+    print(colorize("Hello", "red/white/bold"))
+
+The color tables, packed styles, `ls` color support, charts, and the
+streaming colorizers behind `colorstring.py`, as a module that can be
+imported without doing any work: importing it doesn't parse options, create
+a `ColorManager`, run `dircolors`, or fill in the style table.
+`ColorManager` is only loaded (see `getColorManager()`) for names the
+packed styles can't express (such as "!bold"); `subprocess`, `json`,
+`select`, and the like are imported by the functions that need them.
+
+`colorstring.py` is the command-line interface (and the documentation of
+the options); it imports from here.
+
+=History=
+
+* 2026-10-17: Split out of colorstring.py, by Steven J. DeRose. Use the
+color and effect numbers from colorNames.md rather than loading them from
+`ColorManager`. `styleSeqs` is now a dict, filled as styles are used.
+
+=Rights=
+
+Copyright 2006-10-04 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+if ("lscolorVarName" in os.environ):
+    theEnvVarName = os.environ["lscolorVarName"]
+elif ("OSTYPE" in os.environ and os.environ["OSTYPE"] == "darwin"):
+    theEnvVarName = "LSCOLORS"
+else:
+    theEnvVarName = "LS_COLORS"
+
+boldToken = "bold"
+blinkToken = "blink"
+inverseToken = "inverse"
+ulToken = "ul"
+esc = chr(27)
+
+# Table of basic color names. +30 for foreground, +40 for background.
+# These are as in colorNames.md (which ColorManager also follows); having them
+# here means ColorManager needn't be loaded unless a name is something
+# only it knows (see `getColorManager()`).
+atomicColors = {
+    "black"   : 0,
+    "red"     : 1,
+    "green"   : 2,
+    "yellow"  : 3,
+    "blue"    : 4,
+    "magenta" : 5,
+    "cyan"    : 6,
+    "white"   : 7,
+    "default" : 9,
+}
+
+effectsOn = {
+    "plain"     : 0,
+    "bold"      : 1,
+    "faint"     : 2,
+    "italic"    : 3,
+    "underline" : 4,
+    "blink"     : 5,
+    "fblink"    : 6,
+    "reverse"   : 7,
+    "concealed" : 8,
+    "strike"    : 9,
+}
+
+colorTable = {}      # Map from named colors to codes (switch to just use ColorManager)
+lsColors = []
+
+cm = None
+
+def getColorManager():
+    """Return the shared ColorManager, creating it the first time. It's
+    only needed for names the packed styles below can't express.
+    """
+    global cm
+    if (cm is None):
+        from ColorManager import ColorManager
+        cm = ColorManager()
+    return cm
+
+
+###############################################################################
+# Packed styles. A style is one small int: the fg color in bits 0-3 and the
+# bg color in bits 4-7 (each an index into `styleColorNames`, 0 meaning "not
+# given"), then one bit per effect from `effectShift` up (an effect's bit
+# number is its SGR code). `styleSeqs[style]` is the SGR string for it
+# (without the ESC, like `ColorManager.getColorString()`). Entries are added
+# the first time they're needed, or all at once by `buildStyleTable()`.
+#
+styleColorNames = [ None ] + list(atomicColors.keys())
+styleColorCodes = [ None ] + list(atomicColors.values())
+styleEffectNames = [
+    "plain", "bold", "faint", "italic", "underline",
+    "blink", "fblink", "reverse", "concealed", "strike" ]
+styleAliases = {
+    "bright"        : "bold",
+    "ital"          : "italic",
+    "ul"            : "underline",
+    "fastblink"     : "fblink",
+    "inverse"       : "reverse",
+    "invisible"     : "concealed",
+    "hidden"        : "concealed",
+    "strikethru"    : "strike",
+    "strikethrough" : "strike",
+    "light grey"    : "white",
+    "light gray"    : "white",
+    "lightgrey"     : "white",
+    "off"           : "default",
+}
+styleColorIndex = { n: i for i, n in enumerate(styleColorNames) if n }
+styleEffectIndex = { n: i for i, n in enumerate(styleEffectNames) }
+colorMask = 0x0F
+effectShift = 8
+styleSeqs = {}
+
+def makeStyleSeq(style:int) -> str:
+    """Assemble the SGR string for a packed style: effects, then fg, then bg.
+    """
+    codes = []
+    effects = style >> effectShift
+    for code in range(len(styleEffectNames)):
+        if (effects & (1 << code)):
+            if (code in (5, 6) and "NOBLINK" in os.environ): continue
+            codes.append(str(code))
+    fgi = style & colorMask
+    if (fgi): codes.append(str(30 + styleColorCodes[fgi]))
+    bgi = (style >> 4) & colorMask
+    if (bgi): codes.append(str(40 + styleColorCodes[bgi]))
+    return "[" + (";".join(codes) or "0") + "m"
+
+def styleSeq(style:int) -> str:
+    seq = styleSeqs.get(style)
+    if (seq is None):
+        seq = styleSeqs[style] = makeStyleSeq(style)
+    return seq
+
+def buildStyleTable() -> dict:
+    """Fill in `styleSeqs` for every valid combination of colors and effects.
+    """
+    nColors = len(styleColorNames)
+    for effects in range(1 << len(styleEffectNames)):
+        for bgi in range(nColors):
+            for fgi in range(nColors):
+                styleSeq((effects << effectShift) | (bgi << 4) | fgi)
+    return styleSeqs
+
+def canonicalStyleToken(token:str) -> str:
+    token = token.strip().lower()
+    return styleAliases.get(token, token)
+
+def packStyle(fg:str="", bg:str="", effect="") -> int:
+    """Pack named colors and effect(s) into a style int. `effect` may be
+    a single name or a list of them. Raises KeyError for unknown names.
+    """
+    style = 0
+    if (fg): style |= styleColorIndex[canonicalStyleToken(fg)]
+    if (bg): style |= styleColorIndex[canonicalStyleToken(bg)] << 4
+    if (isinstance(effect, str)): effect = [ effect ]
+    for e in (effect or []):
+        if (not e): continue
+        style |= 1 << (effectShift + styleEffectIndex[canonicalStyleToken(e)])
+    return style
+
+@functools.lru_cache(maxsize=1024)
+def parseStyle(name:str) -> int:
+    """Parse a color name such as "red/white/bold/ul" (see colorNames.md)
+    to a packed style. Effects can go anywhere after the slashes; other
+    tokens are fg then bg, with an empty token holding a place (so "/green"
+    sets only the bg). Since tokens are canonicalized (case, aliases) before
+    packing, "red/white/bold" and "Red/White/bright" get the same style.
+    Raises KeyError for names this can't express (e.g., "!bold").
+    """
+    style = 0
+    colorSlot = 0
+    for token in (name.split("/")):
+        token = canonicalStyleToken(token)
+        if (token in styleEffectIndex):
+            style |= 1 << (effectShift + styleEffectIndex[token])
+            continue
+        if (colorSlot > 1):
+            raise KeyError("Too many colors in '%s'." % (name))
+        if (token):
+            if (token not in styleColorIndex):
+                raise KeyError("Unknown color '%s' in '%s'." % (token, name))
+            style |= styleColorIndex[token] << (4 * colorSlot)
+        colorSlot += 1
+    return style
+
+def cseq(name):
+    try:
+        return styleSeq(parseStyle(name))
+    except KeyError:
+        return getColorManager().getColorString(name)
+
+
+###############################################################################
+#
+def colorizeString(msg, fg:str="", bg:str="", effect:str=""):
+    """Basically the same as ColorManager.colorize(), but via `styleSeqs`.
+    `effect` may also be a list of effect names.
+    """
+    try:
+        style = packStyle(fg=fg, bg=bg, effect=effect)
+    except KeyError:
+        return getColorManager().colorize(msg, fg=fg, bg=bg, effect=effect)
+    return esc + styleSeq(style) + msg + esc + "[0m"
+
+def colorize(msg, argColor:str="red/white"):
+    """Color `msg` with a color name like "red/white/bold" (see colorNames.md).
+    """
+    try:
+        return esc + styleSeq(parseStyle(argColor)) + msg + esc + "[0m"
+    except KeyError:
+        return getColorManager().colorize(msg, argColor=argColor)
+
+def colorSeq(name):
+    if (isinstance(name, list)):
+        lg.error("Multi-color not yet supported")
+        name = name[0]
+    try:
+        cs = cseq(name)
+    except TypeError as e:
+        lg.error("Error in ColorManager: %s", e)
+        cs = ""
+    return cs
+
+
+###############################################################################
+# Precompiled shell prompt variables (`colorstring --compilePrompt`), so a
+# prompt can use colors without starting any process at all.
+#
+zshEffects = { "bold": "%B", "underline": "%U", "reverse": "%S" }
+
+def namedColorCombinations() -> list:
+    """Return the names of all the combinations of no-or-one fg color,
+    no-or-one bg color, and no-or-one effect (but not nothing at all),
+    like "red", "/white", "red/white/bold", and "bold".
+    """
+    colors = [ "" ] + list(atomicColors.keys())
+    effects = [ "" ] + [ e for e in styleEffectNames if e != "plain" ]
+    names = []
+    for fg in colors:
+        for bg in colors:
+            for effect in effects:
+                parts = [ fg, bg ] if bg else ([ fg ] if fg else [])
+                if (effect): parts.append(effect)
+                if (parts): names.append("/".join(parts))
+    return names
+
+def shellVarName(prefix:str, colorName:str) -> str:
+    """E.g., ("COLORSTRING", "red/white/bold") -> "COLORSTRING_red_white_bold".
+    """
+    return prefix + "_" + re.sub(r"\W", "_", colorName)
+
+def bashPromptSeq(colorName:str) -> str:
+    """The color's escape as bash wants it in PS1 (`\\e`, in `\\[...\\]`
+    so bash doesn't count it as taking space).
+    """
+    return "\\[\\e" + cseq(colorName) + "\\]"
+
+def zshPromptSeq(colorName:str) -> str:
+    """The color as zsh prompt escapes: %F{} and %K{} for colors, %B, %U,
+    and %S where zsh has them, else a raw escape inside %{...%}.
+    The result contains a real ESC, so quote it with $'...'.
+    """
+    colors = []
+    buf = ""
+    for token in (colorName.split("/")):
+        token = canonicalStyleToken(token)
+        if (token in zshEffects): buf += zshEffects[token]
+        elif (token in styleEffectIndex): buf += "%{" + esc + cseq(token) + "%}"
+        else: colors.append(token)
+    fg = colors[0] if colors else ""
+    bg = colors[1] if len(colors) > 1 else ""
+    if (bg == "default"): buf = "%k" + buf
+    elif (bg): buf = "%%K{%s}" % (bg) + buf
+    if (fg == "default"): buf = "%f" + buf
+    elif (fg): buf = "%%F{%s}" % (fg) + buf
+    return buf
+
+def shellQuote(s:str) -> str:
+    """Quote for bash or zsh, using $'...' if there are control characters.
+    """
+    if (re.search(r"[\x00-\x1F]", s)):
+        return "$'" + re.sub(r"([\\'])", r"\\\1", s).replace(esc, "\\e") + "'"
+    return "'" + s.replace("'", "'\\''") + "'"
+
+def makePromptFile(prefix:str="COLORSTRING") -> str:
+    """Return the text of a shell file which, when sourced by bash or zsh,
+    sets a variable for every combination from `namedColorCombinations()`
+    to that color in prompt form, plus `prefix_reset`. The first line has
+    a hash of the rest (see `writePromptFile()`).
+    """
+    names = namedColorCombinations()
+    buf = [ 'if [ -n "$ZSH_VERSION" ]; then' ]
+    for name in names:
+        buf.append("    %s=%s" % (shellVarName(prefix, name), shellQuote(zshPromptSeq(name))))
+    buf.append("    %s_reset=%s" % (prefix, shellQuote("%f%k%b%u%s%{" + esc + "[0m%}")))
+    buf.append("else")
+    for name in names:
+        buf.append("    %s=%s" % (shellVarName(prefix, name), shellQuote(bashPromptSeq(name))))
+    buf.append("    %s_reset=%s" % (prefix, shellQuote("\\[\\e[0m\\]")))
+    buf.append("fi")
+    body = "\n".join(buf) + "\n"
+    import hashlib
+    digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+    return ("# colorstring-prompt sha256=%s\n" % (digest) +
+        "# Generated by `colorstring --compilePrompt`; source it from .bashrc or\n" +
+        "# .zshrc, then use e.g. PS1=\"${%s_cyan}\\u${%s_reset} \\$ \" (not '...').\n"
+            % (prefix, prefix) +
+        body)
+
+def writePromptFile(path:str, prefix:str="COLORSTRING") -> bool:
+    """Write `makePromptFile()` to `path`, unless it's already there with the
+    same hash (so its mtime only changes when its content does).
+    @return Whether the file was (re)written.
+    """
+    text = makePromptFile(prefix)
+    firstLine = text[0:text.index("\n")+1]
+    try:
+        with open(path, "r", encoding="utf-8") as ifh:
+            if (ifh.readline() == firstLine): return False
+    except OSError:
+        pass
+    tmpPath = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmpPath, "w", encoding="utf-8") as ofh:
+        ofh.write(text)
+    os.replace(tmpPath, path)
+    return True
+
+
+def getCachePath(name:str, create:bool=False) -> str:
+    """Return the path for a cache file of ours, in $XDG_CACHE_HOME
+    (default ~/.cache) under "colorstring". With `create`, make the directory
+    if needed (returning None if that fails).
+    """
+    cdir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    cdir = os.path.join(cdir, "colorstring")
+    if (create and not os.path.isdir(cdir)):
+        try:
+            os.makedirs(cdir, exist_ok=True)
+        except OSError as e:
+            lg.warning("Can't create cache directory '%s': %s", cdir, e)
+            return None
+    return os.path.join(cdir, name)
+
+def clearCache() -> int:
+    """Remove all our cache files. @return How many were removed.
+    """
+    cdir = os.path.dirname(getCachePath("x"))
+    n = 0
+    if (os.path.isdir(cdir)):
+        for name in (os.listdir(cdir)):
+            try:
+                os.remove(os.path.join(cdir, name))
+                n += 1
+            except OSError as e:
+                lg.warning("Can't remove '%s': %s", name, e)
+    return n
+
+
+##############################################################################
+# TODO: Move lscolors support to other package; add set ability; add direct
+# mapping to ColorManager colors, from booleans on stat values?
+#
+class LSColors:
+    """Do some support for `ls` colorizing, for various *nix flavors.
+    """
+    ###############################################################################
+    # Define explanations for the non-file-glob cases used by LS_COLORS (Linux)
+    #
+    linuxLSSpecials = {
+        "bd" : "BLK                    Block device driver",
+        "ca" : "CAPABILITY             File with capability",
+        "cd" : "CHR                    Character device driver",
+        "di" : "DIR                    Directories",
+        "do" : "DOOR                   Door (eh?)",
+        "ex" : "EXEC                   Executable files",
+        "??" : "FILE                   Other file (normally not set)",
+        "hl" : "HARDLINK               Hard link",
+        "ln" : "LINK                   Symbolic link (can use 'target' color)",
+        "or" : "ORPHAN                 Broken symbolic link, etc.",
+        "ow" : "OTHER_WRITABLE         Other-writable, non-sticky file",
+        "pi" : "FIFO                   Pipe",
+        "rs" : "RESET                  Reset to default color",
+        "sg" : "SETGID                 SetGID",
+        "so" : "SOCK                   Socket?",
+        "st" : "STICKY                 Directory with sticky bit set (+t)",
+        "su" : "SETUID                 SetUID",
+        "tw" : "STICKY_OTHER_WRITABLE  Sticky other writable file",
+    }
+
+    bsdLSSpecials = {
+        "0" : "regular file",   # FILE?
+        "1" : "directory",      # DIR
+        "2" : "symbolic link",   # LINK
+        "3" : "socket",   # SOCK
+        "4" : "pipe",   # FIFO
+        "5" : "executable",   # EXEC
+        "6" : "block special",   # BLK
+        "7" : "character special",   # CHR
+        "8" : "executable with setuid bit set",   #
+        "9" : "executable with setgid bit set",   #
+        "10" : "directory writable to others, with sticky bit",   #
+        "11" : "directory writable to others, without sticky bit",   #
+    }
+
+    bsdColorMap = {
+        "a": "black",
+        "b": "red",
+        "c": "green",
+        "d": "brown",
+        "e": "blue",
+        "f": "magenta",
+        "g": "cyan",
+        "h": "light grey",
+        "A": "bold black",       # usually shows up as dark grey",
+        "B": "bold red",
+        "C": "bold green",
+        "D": "bold brown",       # usually shows up as yellow",
+        "E": "bold blue",
+        "F": "bold magenta",
+        "G": "bold cyan",
+        "H": "bold light grey",  # looks like bright white",
+        "x": "default",          # foreground or background",
+    }
+
+    @staticmethod
+    def bsdShowLSColors() -> None:
+        pairs = LSColors.bsdParseLSColors()
+        if (pairs):
+            for i, pair in enumerate(pairs):
+                cname = "%s/%s" % (LSColors.bsdColorMap[pair[0]], LSColors.bsdColorMap[pair[1]])
+                print("%2d: %-24s %s" % (i, cname, LSColors.bsdLSSpecials[i]))
+        return
+
+    @staticmethod
+    def bsdParseLSColors() -> list:
+        """PArse a 22-char LSCOLORS BSD value into 11 tuples, each with a
+        single-char color-codes for foreground and background.
+        TODO: Should this return one-char codes or names?
+        """
+        if ('LSCOLORS' not in os.environ):
+            if ('LS_COLORS' in os.environ):
+                lg.error("No $LSCOLORS in env, but $LS_COLORS is. ")
+            else:
+                lg.warning("No $LSCOLORS in env.")
+            return None
+        lsc = os.environ['LSCOLORS']
+        if (len(lsc) != 22):
+            lg.error("Expected 22 chars in LSCOLORS, but got %d: '%s'.", len(lsc), lsc)
+            return
+        colorPairList = []
+        for codeStart in range(len(lsc)):
+            fgbg = ( lsc[codeStart], lsc[codeStart+1] )
+            colorPairList.append( fgbg )
+        return colorPairList
+
+    # Take an n;m... string as used in environment variable LS_COLORS (Linux),
+    # and try to look up what it means, as a name like "red/white/bold"
+    # (see colorNames.md), from the packed-style tables.
+    #
+    @staticmethod
+    def getColorName(code):
+        fg = bg = ""
+        effects = []
+        for param in (code.split(";")):
+            try:
+                n = int(param or "0")
+            except ValueError:
+                n = -1
+            if (30 <= n <= 39 and n - 30 in styleColorCodes):
+                fg = styleColorNames[styleColorCodes.index(n - 30)]
+            elif (40 <= n <= 49 and n - 40 in styleColorCodes):
+                bg = styleColorNames[styleColorCodes.index(n - 40)]
+            elif (n == 0):
+                continue  # Reset ("plain"), which any SGR starts from anyway
+            elif (0 < n < len(styleEffectNames)):
+                effects.append(styleEffectNames[n])
+            else:
+                lg.log(logging.INFO-1, "Couldn't find '%s' in color table.", code)
+                return("?")
+        if (bg): return "/".join([ fg, bg ] + effects)
+        return "/".join(([ fg ] if fg else []) + effects) or "plain"
+
+    @staticmethod
+    def getFileCategory(path:str) -> int:
+        """The category to be used for LSCOLORS on BSD, MacOSX, and similar.
+        There doesn't seem to be a category for regular files? I guess they
+        just go in the default color?
+        Uses a single lstat(), so a symlink is category 2 whatever it points to.
+        @return Category number 1-11, or 0 for regular, or -1 on fail.
+        """
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return -1
+        mode = st.st_mode
+        if (stat.S_ISLNK(mode)): return 2   # symbolic link
+        if (stat.S_ISSOCK(mode)): return 3  # socket
+        if (stat.S_ISFIFO(mode)): return 4  # pipe
+        if (stat.S_ISBLK(mode)): return 6   # block special
+        if (stat.S_ISCHR(mode)): return 7   # character special
+        if (stat.S_ISDIR(mode)):
+            if ((mode & stat.S_IWOTH) and (mode & stat.S_ISVTX)): return 10  # dir w to others, +sticky bit
+            if (mode & stat.S_IWOTH): return 11  # dir w to others, -sticky bit
+            return 1                           # directory
+        if (LSColors.isExecutable(st)):
+            if (mode & stat.S_ISUID): return 8  # executable with setuid bit set
+            if (mode & stat.S_ISGID): return 9  # executable with setgid bit set
+            return 5                           # executable
+        return 0                               # (0 for regular file)
+
+    @staticmethod
+    def isExecutable(st:os.stat_result) -> bool:
+        """Return whether (for purposes of getFileCategory()) the item is
+        executable. Like `ls`, this means any of the user, group, or other
+        execute bits is set (not whether the current user can run it).
+        """
+        return bool(st.st_mode & (stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH))
+
+    # Environment variables that change what `dircolors` prints (so they're
+    # part of the cache key, too).
+    dircolorsEnvVars = [ "TERM", "COLORTERM", "LS_COLORS" ]
+
+    # Settings files for `dircolors`, in the order shells' startup files
+    # usually look for them; the first one found is passed to it.
+    dircolorsFiles = [ "~/.dircolors", "~/.dir_colors", "/etc/DIR_COLORS" ]
+
+    @staticmethod
+    def setupDircolors(useCache:bool=True):
+        """'dircolors' is a Linux /GNU corutils command that helps set bash colors
+        for the ls command, via environment variable 'LS_COLORS'.
+        It is not typically available on BSD/MacOSX.
+        Since running it means a subprocess, the parsed result is cached on
+        disk (see `getCachePath()`), keyed by everything it depends on.
+        """
+        global lsColors
+        key = LSColors.dircolorsCacheKey()
+        if (key is None): return
+        if (useCache):
+            cached = LSColors.loadDircolorsCache(key)
+            if (cached is not None):
+                lsColors = cached
+                return
+        settings = key["settings"][0] if (key["settings"]) else None
+        lsColors = LSColors.runDircolors(key["binary"][0], settings)
+        if (useCache and lsColors):
+            LSColors.saveDircolorsCache(key, lsColors)
+
+    @staticmethod
+    def dircolorsCacheKey() -> dict:
+        """Identify the `dircolors` binary, its settings file (if any), and
+        relevant environment, so we can tell if a cached result is still good.
+        @return A dict, or None if there's no `dircolors` (or `gdircolors`).
+        """
+        import shutil
+        binary = shutil.which("dircolors") or shutil.which("gdircolors")
+        if (not binary):
+            lg.error("No 'dircolors' command found. OS dependency?")
+            return None
+        st = os.stat(binary)
+        settings = None
+        for path in LSColors.dircolorsFiles:
+            path = os.path.expanduser(path)
+            try:
+                sst = os.stat(path)
+            except OSError:
+                continue
+            settings = [ path, sst.st_mtime_ns, sst.st_size ]
+            break
+        return {
+            "version": __version__,
+            "binary":  [ binary, st.st_mtime_ns, st.st_size ],
+            "settings": settings,
+            "env":     [ os.environ.get(v, "") for v in LSColors.dircolorsEnvVars ],
+        }
+
+    @staticmethod
+    def runDircolors(binary:str="dircolors", settings:str=None) -> list:
+        """Run `dircolors` (on the `settings` file, if given) and parse its
+        output into a list of "expr=code".
+        """
+        from subprocess import check_output, CalledProcessError
+        cmd = [ binary, "-b" ]
+        if (settings): cmd.append(settings)
+        try:
+            out = check_output(cmd).decode("utf-8", errors="replace")
+        except (CalledProcessError, OSError) as e:
+            sys.stderr.write("'dircolors' failed. OS dependency?\n    %s\n" % (e))
+            return []
+        mat = re.search(r"LS_COLORS='(.*?)'", out, re.S)
+        if (not mat): return []
+        return [ x for x in mat.group(1).split(":") if x ]
+
+    @staticmethod
+    def loadDircolorsCache(key:dict) -> list:
+        import json
+        try:
+            with open(getCachePath("dircolors.json"), "r", encoding="utf-8") as ifh:
+                cached = json.load(ifh)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(cached, dict) or cached.get("key") != key):
+            return None
+        return cached.get("lsColors")
+
+    @staticmethod
+    def saveDircolorsCache(key:dict, lsc:list) -> None:
+        import json
+        path = getCachePath("dircolors.json", create=True)
+        if (not path): return
+        try:
+            tmp = "%s.%d" % (path, os.getpid())
+            with open(tmp, "w", encoding="utf-8") as ofh:
+                json.dump({ "key": key, "lsColors": lsc }, ofh)
+            os.replace(tmp, path)
+        except OSError as e:
+            lg.warning("Can't write cache '%s': %s", path, e)
+
+    @staticmethod
+    def helpLSColors():
+        print("The LS_COLORS keys are (see also dircolors --print-database):")
+        lssp = sorted(LSColors.linuxLSSpecials.keys())
+        for sp in (lssp):
+            print("    sp\t" + LSColors.linuxLSSpecials[sp])
+
+    @staticmethod
+    def doLsList(useCache:bool=True):
+        """Display a list of all the LS_COLORS or LSCOLORS settings.
+        Lots of OS differences here....
+        See also 'theEnvVarName', set up top.
+        """
+        bsdName = "LSCOLORS"
+        bsdValue = os.environ[bsdName] if bsdName in os.environ else ""
+        print("%s (for BSD): '%s'" % (bsdName, bsdValue))
+        linuxName = "LS_COLORS"
+        linuxValue = os.environ[linuxName] if linuxName in os.environ else ""
+        print("%s (for Linux): '%s'" % (linuxName, linuxValue))
+
+        LSColors.setupDircolors(useCache=useCache)
+        byColor = {}
+        for lsc in (lsColors or []):
+            mat = re.search(r'^(.*)=(.*)', lsc)
+            if (not mat): continue
+            expr = mat.group(1)
+            colorCode = mat.group(2)
+            byColor.setdefault(colorCode, "")
+            byColor[colorCode] += expr + " "
+
+        print("Colors for 'ls':")
+        coff = esc + "[0m"
+        for code in (sorted(byColor.keys())):
+            name = LSColors.getColorName(code)
+            con2 = esc + "[" + code + "m"  # Just as `ls` will show it
+            print("%s%s (%s):%s %s" % (con2, code, name, coff, byColor[code]))
+
+    @staticmethod
+    def getEntries(useCache:bool=True) -> list:
+        """Return the "expr=code" entries `ls` will use: from $LS_COLORS if
+        it's set, otherwise the `dircolors` defaults.
+        """
+        if (os.environ.get("LS_COLORS")):
+            return [ x for x in os.environ["LS_COLORS"].split(":") if x ]
+        LSColors.setupDircolors(useCache=useCache)
+        return lsColors
+
+    @staticmethod
+    def getIndex(useCache:bool=True):
+        from lsColorsIndex import LSColorsIndex
+        return LSColorsIndex(LSColors.getEntries(useCache=useCache))
+
+    @staticmethod
+    def doLsGet(what:str, useCache:bool=True):
+        """Show the color `ls` would use for a file name (or for a glob or
+        type key like '*.html' or 'di', if that's literally an entry).
+        """
+        entries = LSColors.getEntries(useCache=useCache)
+        code = None
+        for lsc in (entries):
+            if (lsc.startswith(what + "=")):
+                code = lsc[len(what)+1:]
+        if (code is None):
+            lci = LSColors.getIndex(useCache=useCache)
+            name = os.path.basename(what.rstrip("/")).encode("utf-8", "surrogateescape")
+            codeb = lci.classify(name, isDir=what.endswith("/") or os.path.isdir(what))
+            if (codeb): code = codeb.decode("utf-8")
+        if (code is None):
+            print("No LS_COLORS mapping found for '%s'." % (what))
+            return
+        name = LSColors.getColorName(code)
+        print("%s\t%s (%s%s%s)" % (what, code, esc + "[" + code + "m", name, esc + "[0m"))
+
+    @staticmethod
+    def doLsDir(path:str, threads:int=1, useCache:bool=True) -> None:
+        """List a directory's entries, colored as `ls` would (see `--lsdir`).
+        """
+        lci = LSColors.getIndex(useCache=useCache)
+        try:
+            lci.colorizeDirectory(path, sys.stdout.buffer, threads=threads)
+            sys.stdout.buffer.flush()
+        except BrokenPipeError:
+            sys.stderr.close()
+        except OSError as e:
+            lg.error("Can't list '%s': %s", path, e)
+            sys.exit(99)
+
+
+###############################################################################
+# Charts. Each is built into one buffer and written at once (see
+# `colorCharts.py`), rather than with a print() per line or cell.
+#
+def showTable(sampleText:str="Text", allEffects:bool=False, background:str=None) -> None:
+    """Show a short table of foreground/background combinations, plain and bold
+    (or with every effect, if `allEffects`).
+    A column for each bg color, a row for each fg color. With `background`
+    "light" or "dark", the "default" column is shown on white or black.
+    """
+    import colorCharts
+    slen = len(sampleText)
+    rowHeadWidth = 10
+    rowHeadFormat = "%2d: %-" + str(rowHeadWidth) + "s"
+    defaultBg = colorCharts.backgroundSeq(background)
+
+    # Make table header row
+    thead1 = [ " " * (rowHeadWidth + 4) ]
+    thead2 = [ " " * (rowHeadWidth + 4) ]
+    for cname, cnum in (atomicColors.items()):
+        thead1.append(cname.ljust(slen+1))
+        thead2.append(str(cnum+40).ljust(slen+1))
+    thead = "".join(thead1) + "\n" + "".join(thead2) + "\n"
+    buf = [ thead ]
+
+    effects = [ "Bold", "Plain" ]
+    if (allEffects):
+        effects = [
+            "plain"      ,  # 0   (can be used to express "no special effect")
+            "bold"       ,  # 1   aka 'bright'
+            "faint"      ,  # 2
+            "italic"     ,  # 3   (rare)
+            "underline"  ,  # 4   aka 'ul'
+            "blink"      ,  # 5
+            "fblink"     ,  # 6?  aka 'fastblink' (rare)
+            "reverse"    ,  # 7   aka 'inverse'
+            "concealed"  ,  # 8   aka 'invisible' or 'hidden'
+            "strike"     ,  # 9   aka 'strikethru' or 'strikethrough'
+        ]
+
+    sampleEnd = sampleText + esc + "[0m "
+    defaultBgi = styleColorIndex["default"]
+    for effectName in effects:
+        buf.append("\nTable of %s foreground colors on all backgrounds:\n" % (effectName))
+        buf.append(thead)
+        if (effectName=='Plain'): effectStyle = 0
+        else: effectStyle = packStyle(effect=effectName)
+        for i, fgName in enumerate(atomicColors.keys()):
+            fgNum = 30 + i
+            if (fgNum == 38): fgNum = 39  # 'default' or 'off'...
+            buf.append(rowHeadFormat % (fgNum, fgName))
+            fgStyle = effectStyle | (i + 1)
+            for bgi in range(1, len(styleColorNames)):
+                buf.append(esc + styleSeq(fgStyle | (bgi << 4)))
+                if (bgi == defaultBgi): buf.append(defaultBg)
+                buf.append(sampleEnd)
+            buf.append("\n")
+    colorCharts.emit("".join(buf))
+
+def showList(breakLines:bool=False) -> None:
+    """Show every color name ColorManager knows, in that color, in as many
+    columns as fit (or one per line with `breakLines`).
+    """
+    import colorCharts
+    ctable = getColorManager().getColorStrings()
+    names = sorted(ctable.keys())
+    off = cseq('default')
+    if (breakLines):
+        lines = [ ctable[ct] + ct + off for ct in names ]
+    else:
+        cellWidth = max([ len(ct) for ct in names ] or [ 0 ])
+        lines = colorCharts.columnize(
+            [ ctable[ct] + ct.ljust(cellWidth) + off for ct in names ], cellWidth)
+    colorCharts.emit("\n".join(lines) + "\nDone, %d combinations.\n" % (len(names)))
+
+# TODO: Use ColorManager.
+#
+def setupEffects(breakLines:bool=False) -> None:
+    import colorCharts
+    shortMap = {
+        "black"     : "blk",
+        "red"       : "red",
+        "green"     : "grn",
+        "yellow"    : "yel",
+        "blue"      : "blu",
+        "magenta"   : "mag",
+        "cyan"      : "cyn",
+        "white"     : "wht",
+        "default"   : "dft",
+    }
+    if (breakLines): sep = "\n"
+    else: sep = " "
+    buf = []
+    effects = sorted(effectsOn.keys())
+    for effect in range(len(effects)):
+        buf.append("\n******* Colors with " + (effects[effect] or "no") + " effect:\n")
+        for fg in (atomicColors):
+            buf.append("fg: '%s'.\n" % (fg))
+            for bg in (atomicColors):
+                sample = ' ' + shortMap[fg] + "/" + shortMap[bg] + ' '
+                buf.append(colorizeString(sample, fg=fg, bg=bg, effect=effects[effect]) + sep)
+            buf.append("\n")
+        buf.append("\n")
+    colorCharts.emit("".join(buf))
+
+def try256(breakLines:bool=False, mode:str="bg", background:str=None) -> None:
+    """Show the xterm-256 colors: as a grid fitted to the terminal width,
+    or with `breakLines`, one line per color.
+    """
+    import colorCharts
+    if (breakLines):
+        colorCharts.emit(colorCharts.xterm256List(background=background))
+    else:
+        colorCharts.emit(colorCharts.xterm256Chart(mode=mode, background=background))
+
+def tryTruecolor(background:str=None) -> None:
+    import colorCharts
+    colorCharts.emit(colorCharts.truecolorChart(background=background))
+
+def showEffectSamples(sampleText:str="Sample") -> None:
+    import colorCharts
+    colorCharts.emit("".join("%-12s '%s'\n" % (
+        e, colorizeString(sampleText, fg="blue", bg="white", effect=e))
+        for e in (sorted(effectsOn.keys()))))
+
+def getCycleSeqs(colorNames:list) -> list:
+    """Expand the `--all` color names (including the predefined patterns
+    like 'usa' and 'rainbow') into the list of SGR strings to cycle through.
+    Raises KeyError for an unknown color name.
+    """
+    clist = []
+    for colorName in (colorNames):
+        if (colorName == "usa"):
+            clist.append(cseq("red/bold"))
+            clist.append(cseq("white/bold"))
+            clist.append(cseq("blue/bold"))
+
+        elif (colorName == "christmas"):
+            clist.append(cseq("red/bold"))
+            clist.append(cseq("green/bold"))
+
+        elif (colorName == "italy"):
+            clist.append(cseq("red/bold"))
+            clist.append(cseq("green/bold"))
+            clist.append(cseq("white/bold"))
+
+        elif (colorName == "rainbow"):
+            clist.append(cseq("red/bold"))
+            clist.append(cseq("red"))
+            clist.append(cseq("yellow/bold"))
+            clist.append(cseq("green/bold"))
+            clist.append(cseq("blue/bold"))
+            clist.append(cseq("magenta/bold"))
+            clist.append(cseq("magenta"))
+
+        else:
+            seq0 = colorSeq(colorName)
+            if (not seq0):
+                raise KeyError(colorName)
+            clist.append(seq0)
+    return clist
+
+def getCycleBytes(colorNames:list) -> tuple:
+    """Return the per-line (prefixes, suffix) for `--all`, as bytes.
+    """
+    reset = colorSeq("default")
+    bg_reset = colorSeq("/default")
+    prefixes = [ (esc + seq).encode("utf-8") for seq in getCycleSeqs(colorNames) ]
+    suffix = (esc + reset + esc + bg_reset + "\n").encode("utf-8")
+    return prefixes, suffix
+
+def colorizeBlock(lines:list, prefixes:list, suffix:bytes, n:int=0) -> tuple:
+    """Colorize a list of lines (bytes, without their newlines), cycling
+    through `prefixes` starting at index `n`. Like the old `readlines()` loop,
+    each line is stripped of leading and trailing whitespace.
+    @return (output bytes, index of the prefix for the next line).
+    """
+    if (len(prefixes) == 1):
+        if (not lines): return b"", 0
+        sep = suffix + prefixes[0]
+        return prefixes[0] + sep.join([ rec.strip() for rec in lines ]) + suffix, 0
+    buf = []
+    nPrefixes = len(prefixes)
+    for rec in lines:
+        buf.append(prefixes[n])
+        buf.append(rec.strip())
+        buf.append(suffix)
+        n += 1
+        if (n >= nPrefixes):
+            n = 0
+    return b"".join(buf), n
+
+def colorizeStream(ifd:int, ofh, colorizer, n:int=0,
+    chunkSize:int=1<<16, outBlock:int=1<<16, flushDelay:float=0.1) -> int:
+    """Copy raw input from file descriptor `ifd` to binary file `ofh`,
+    colorizing lines with `colorizer(lines, n)`, which takes a list of
+    complete lines (bytes, without newlines) and the cycle index `n`, and
+    returns (output bytes, next n) like `colorizeBlock()`.
+    Input is read in chunks (`os.read()`
+    returns whatever is available, so this keeps up with `tail -f`), lines
+    are assembled as they complete, and output is written in blocks of
+    about `outBlock` bytes. If output is pending and no more input arrives
+    within `flushDelay` seconds, it's flushed anyway. Memory use is bounded
+    by the block sizes (plus the longest line).
+    @return The cycle index `n` for the line after the last one.
+    """
+    import select
+    pending = []
+    pendingLen = 0
+    partial = []
+    while (True):
+        if (pending and flushDelay is not None):
+            try:
+                ready, _, _ = select.select([ ifd ], [], [], flushDelay)
+            except (OSError, ValueError):
+                ready = True  # Not selectable; just read.
+            if (not ready):
+                ofh.write(b"".join(pending))
+                ofh.flush()
+                pending = []
+                pendingLen = 0
+                continue
+        chunk = os.read(ifd, chunkSize)
+        if (not chunk): break
+        if (b"\n" not in chunk):
+            partial.append(chunk)
+            continue
+        if (partial):
+            partial.append(chunk)
+            chunk = b"".join(partial)
+            partial = []
+        lines = chunk.split(b"\n")
+        tail = lines.pop()
+        if (tail): partial.append(tail)
+        out, n = colorizer(lines, n)
+        pending.append(out)
+        pendingLen += len(out)
+        if (pendingLen >= outBlock):
+            ofh.write(b"".join(pending))
+            pending = []
+            pendingLen = 0
+
+    if (partial):  # Last line had no newline
+        out, n = colorizer([ b"".join(partial) ], n)
+        pending.append(out)
+    ofh.write(b"".join(pending))
+    ofh.flush()
+    return n
+
+chunkColorizer = None  # Set before forking workers for `--jobs`
+
+def colorizeChunk(task:tuple) -> bytes:
+    """Worker for `--jobs`: colorize lines `start` to `end` of a file,
+    starting the color cycle at `n`.
+    """
+    from parallelChunks import readChunk
+    path, start, end, n = task
+    lines = readChunk(path, start, end).split(b"\n")
+    if (not lines[-1]): lines.pop()
+    return chunkColorizer(lines, n)[0]
+
+def colorizeFile(path:str, ofh, colorizer, nCycle:int, n:int=0, jobs:int=1,
+    bufferSize:int=1<<16, flushDelay:float=0.1) -> int:
+    """Colorize a file, using `jobs` processes if it's a regular file.
+    The file is split into line-aligned chunks; each gets the cycle index its
+    first line would get in a serial run, so the output is the same.
+    @return The cycle index for the next line.
+    """
+    import parallelChunks as pc
+    if (jobs <= 1 or not pc.isChunkable(path)):
+        with open(path, "rb") as ifh:
+            return colorizeStream(ifh.fileno(), ofh, colorizer, n,
+                chunkSize=bufferSize, outBlock=bufferSize, flushDelay=flushDelay)
+
+    global chunkColorizer
+    chunkColorizer = colorizer
+    chunks = pc.findChunks(path)
+    if (nCycle > 1): counts = pc.countLines(path, chunks)
+    else: counts = [ 0 ] * len(chunks)
+    tasks = []
+    for (start, end), count in zip(chunks, counts):
+        tasks.append( (path, start, end, n) )
+        n = (n + count) % nCycle
+    for out in pc.mapChunks(colorizeChunk, tasks, jobs):
+        ofh.write(out)
+    ofh.flush()
+    size = chunks[-1][1] if chunks else 0
+    if (size and not pc.readChunk(path, size-1, size).endswith(b"\n")):
+        n = (n + 1) % nCycle  # Last line had no newline, but counts
+    return n
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+#
+# compressedIO.py: Read (and write) gzip, bzip2, and xz files transparently.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import io
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "compressedIO",
+    "description"  : "Read (and write) gzip, bzip2, and xz files transparently.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    import compressedIO as ci
+    with ci.openText("build.log.gz", encoding="utf-8") as ifh:
+        for rec in ifh: ...
+    with ci.openBinary(sys.stdin.buffer) as ifh:
+        data = ifh.read(1 << 20)
+    ofh = ci.openOutput(sys.stdout.buffer, "gz")
+
+Support for compressed input (and output) in `uncolorize` and
+`colorConvert.py`, so archived logs needn't be decompressed to disk or
+piped through `zcat` first.
+
+`openBinary()` and `openText()` take a path or an open binary file
+(such as `sys.stdin.buffer`), and look at the first few bytes: if they're
+the magic number for gzip (1f 8b), bzip2 ("BZh"), or xz (fd "7zXZ" 00),
+what you get back reads the decompressed data; otherwise, it reads the
+file as is. The file name doesn't matter. Concatenated gzip members (as
+from `cat a.gz b.gz`) are read as one stream.
+
+Decompression runs in a reader thread (`ReadAheadReader`), which keeps
+up to `depth` blocks of `bufferSize` bytes decompressed ahead of the
+reader. zlib, bz2, and lzma release the GIL while they work, so this
+overlaps decompressing with whatever the caller does with the data;
+and it reads the compressed file in big blocks. With just one CPU there's
+nothing to overlap with, and the thread only adds overhead, so then it's
+not used (unless `readAhead` is set). `openEach()` goes further
+for lists of files: it opens (and so starts decompressing) the next file
+while the caller is still working on the current one.
+
+`openOutput()` wraps a path or binary file so that what's written to it
+is compressed (or not, if the kind is None). It must be closed, to
+write the end of the compressed stream. `compressionOfName()` guesses
+the kind from a file name's extension (.gz, .bz2, or .xz).
+
+A truncated or damaged compressed file reads fine up to the damage, and
+then raises one of `readErrors()` (the caller has everything before it).
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+magics = [ (b"\x1f\x8b", "gz"), (b"BZh", "bz2"), (b"\xfd7zXZ\x00", "xz") ]
+magicLen = 6
+suffixes = { ".gz": "gz", ".bz2": "bz2", ".xz": "xz" }
+kinds = [ "gz", "bz2", "xz" ]
+
+defaultBufferSize = 1 << 20
+defaultDepth = 4
+
+
+###############################################################################
+#
+def sniff(head:bytes) -> str:
+    """Return "gz", "bz2", or "xz" if `head` starts like that kind of file, else None.
+    """
+    for magic, kind in magics:
+        if (head.startswith(magic)): return kind
+    return None
+
+def compressionOf(path:str) -> str:
+    """Return the kind of compression a file has (by its content), or None.
+    Only regular files are checked (reading a pipe would lose the data).
+    """
+    import os
+    import stat
+    try:
+        if (not stat.S_ISREG(os.stat(path).st_mode)): return None
+        with open(path, "rb") as fh:
+            return sniff(fh.read(magicLen))
+    except OSError:
+        return None
+
+def compressionOfName(path:str) -> str:
+    import os
+    return suffixes.get(os.path.splitext(path)[1].lower())
+
+def readErrors() -> tuple:
+    """The exceptions reading a damaged or truncated compressed file can
+    raise, for callers to catch, report, and go on to the next file.
+    """
+    import lzma
+    import zlib
+    return (OSError, EOFError, lzma.LZMAError, zlib.error)
+
+def decompressor(kind:str, fh):
+    """Wrap binary file `fh` to read it decompressed.
+    """
+    if (kind == "gz"):
+        import gzip
+        return gzip.GzipFile(fileobj=fh, mode="rb")
+    if (kind == "bz2"):
+        import bz2
+        return bz2.BZ2File(fh, mode="rb")
+    if (kind == "xz"):
+        import lzma
+        return lzma.LZMAFile(fh, mode="rb")
+    raise KeyError("Unknown compression '%s' (use one of %s)." % (kind, ", ".join(kinds)))
+
+def openBinary(src, bufferSize:int=defaultBufferSize, readAhead:bool=None,
+    depth:int=defaultDepth):
+    """Open a path (or wrap an open binary file) for reading, decompressing
+    it if it's compressed. Closing the result closes `src` if it's a path
+    (but not if it was a file). `readAhead` says whether to decompress in a
+    thread (by default, only if there's more than one CPU).
+    """
+    if (isinstance(src, str)):
+        fh = open(src, "rb", buffering=bufferSize)
+        owned = fh
+    else:
+        fh = src
+        owned = None
+        if (not hasattr(fh, "peek")):
+            fh = io.BufferedReader(fh, bufferSize)
+    kind = sniff(fh.peek(magicLen)[0:magicLen])
+    if (kind is None): return fh
+    dfh = PartialReader(decompressor(kind, fh))
+    if (readAhead is None):
+        import os
+        readAhead = (os.cpu_count() or 1) > 1
+    if (not readAhead):  # (Rewrapped, so read1() gives big blocks.)
+        return io.BufferedReader(dfh, bufferSize)
+    return io.BufferedReader(ReadAheadReader(dfh, bufferSize=bufferSize,
+        depth=depth, owned=owned), bufferSize)
+
+def openText(src, encoding:str="utf-8", errors:str="strict", newline:str=None,
+    bufferSize:int=defaultBufferSize, readAhead:bool=None):
+    """Like `openBinary()`, but decode to str.
+    """
+    return io.TextIOWrapper(openBinary(src, bufferSize=bufferSize,
+        readAhead=readAhead), encoding=encoding, errors=errors, newline=newline)
+
+def openOutput(dest, kind:str, level:int=None):
+    """Return a binary file that writes to `dest` (a path or open binary
+    file) compressed as `kind` ("gz", "bz2", "xz", or None for no compression).
+    """
+    if (kind is None):
+        return open(dest, "wb") if isinstance(dest, str) else dest
+    if (kind == "gz"):
+        import gzip
+        if (isinstance(dest, str)):
+            return gzip.open(dest, "wb", compresslevel=level or 6)
+        return gzip.GzipFile(fileobj=dest, mode="wb", compresslevel=level or 6)
+    if (kind == "bz2"):
+        import bz2
+        return bz2.BZ2File(dest, mode="wb", compresslevel=level or 9)
+    if (kind == "xz"):
+        import lzma
+        return lzma.LZMAFile(dest, mode="wb", preset=level)
+    raise KeyError("Unknown compression '%s' (use one of %s)." % (kind, ", ".join(kinds)))
+
+def openEach(paths:list, bufferSize:int=defaultBufferSize):
+    """Yield (path, reader) for each path, where reader decompresses the
+    file (see `openBinary()`), or is None if the file isn't compressed (or
+    can't be opened), for the caller to read as usual. Each compressed file
+    is opened, and so starts decompressing, while the caller is still on
+    the one before.
+    """
+    def opener(path):
+        if (compressionOf(path) is None): return None
+        try:
+            return openBinary(path, bufferSize=bufferSize)
+        except OSError as e:
+            lg.warning("Can't open '%s': %s", path, e)
+            return None
+    if (not paths): return
+    nextFh = opener(paths[0])
+    for i, path in enumerate(paths):
+        fh = nextFh
+        nextFh = opener(paths[i+1]) if (i + 1 < len(paths)) else None
+        yield path, fh
+
+
+###############################################################################
+#
+class PartialReader(io.RawIOBase):
+    """Fill each read from as many `read1()` calls to `src` (a decompressor)
+    as it takes. If one fails (say, the file is truncated), what was read
+    before it is returned, and the error is raised by the next read; a
+    plain `read()` of a big block would lose it.
+    """
+    def __init__(self, src):
+        super().__init__()
+        self.src = src
+        self.error = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if (self.error is not None): raise self.error
+        n = 0
+        with memoryview(b) as mv:
+            while (n < len(mv)):
+                try:
+                    piece = self.src.read1(len(mv) - n)
+                except Exception as e:
+                    if (n == 0): raise
+                    self.error = e
+                    break
+                if (not piece): break
+                mv[n:n+len(piece)] = piece
+                n += len(piece)
+        return n
+
+    def close(self) -> None:
+        if (not self.closed): self.src.close()
+        super().close()
+
+
+###############################################################################
+#
+class ReadAheadReader(io.RawIOBase):
+    """Read `src` in a thread, up to `depth` blocks ahead of the caller.
+    Usually wrapped in an `io.BufferedReader`.
+    """
+    def __init__(self, src, bufferSize:int=defaultBufferSize, depth:int=defaultDepth,
+        owned=None):
+        import queue
+        import threading
+        super().__init__()
+        self.src = src
+        self.owned = owned  # Something else to close along with `src`
+        self.bufferSize = bufferSize
+        self.queue = queue.Queue(depth)
+        self.block = b""
+        self.pos = 0
+        self.eof = False
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        try:
+            while (not self.stopping):
+                block = self.src.read(self.bufferSize)
+                self.queue.put(block)
+                if (not block): return
+        except BaseException as e:  # Hand it to the reader
+            self.queue.put(e)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while (self.pos >= len(self.block)):
+            if (self.eof): return 0
+            item = self.queue.get()
+            if (isinstance(item, BaseException)):
+                self.eof = True
+                raise item
+            if (not item):
+                self.eof = True
+                return 0
+            self.block = item
+            self.pos = 0
+        n = min(len(b), len(self.block) - self.pos)
+        b[0:n] = self.block[self.pos:self.pos+n]
+        self.pos += n
+        return n
+
+    def close(self) -> None:
+        import sys
+        import queue
+        if (sys.is_finalizing()):  # The thread may be stuck holding a lock.
+            self.stopping = True
+        elif (not self.closed):
+            self.stopping = True
+            while (self.thread.is_alive()):  # It may be waiting to put().
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self.thread.join(0.01)
+            self.src.close()
+            if (self.owned is not None): self.owned.close()
+        super().close()
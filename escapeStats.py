@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+#
+# escapeStats.py: Count the terminal escapes in (possibly huge) files.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import re
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "escapeStats",
+    "description"  : "Count the terminal escapes in (possibly huge) files.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from escapeStats import EscapeStats
+    es = EscapeStats()
+    es.addFile("build.log")
+    es.addStream(sys.stdin.buffer)
+    print(json.dumps(es.report(), indent=2))
+
+Support for `uncolorize --stats`: find out how much of a log is escapes,
+and of what kinds, to see which tools are bloating logs (and with what).
+The input is scanned once, as bytes, and nothing is written. The report
+(a dict, ready for JSON) has:
+
+* ''bytes'', ''textBytes'', ''escapeBytes'' -- total size, and how much of it
+is escapes (of any kind) versus everything else.
+
+* ''kinds'' -- for each kind of escape (as in `vtTokenizer.py`: sgr, csi,
+osc, dcs, string, charset, esc, invalid), how many there are and how many
+bytes they take up. An ESC that doesn't start a complete sequence counts as
+"invalid" (1 byte).
+
+* ''sgrCodes'' -- how many times each SGR code is used ("1", "31", "38;5;208",
+"38;2" for any 24-bit foreground, etc.). An empty SGR (`ESC[m`) counts as "0".
+
+* ''fgBg'' -- how many SGR escapes leave the colors at each foreground/background
+combination, such as "red/default" or "38;5;208/blue" (24-bit colors are
+all just "rgb"). Colors carry over from line to line, as they would
+in a terminal.
+
+To be fast enough for huge logs, the counting is done mostly in C:
+a regex `findall()` of the SGR escapes in each window of the input
+(memory-mapped, for regular files), with a `collections.Counter` over the
+(mostly repeated) matches. Other escapes are only looked for (by a second
+regex) if the window has more ESCs than SGRs. Only each ''distinct'' escape is then decoded in Python, into
+integer indexes, whose counts are added into flat integer arrays. Names
+are only made when the report is. The one loop over every SGR escape is for
+the running foreground/background, and it just looks up each escape's
+(precomputed) effect on them.
+
+Windows end at newlines, so a sequence is only split between windows if it
+contains a newline (which in practice none do).
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+kinds = [ "sgr", "csi", "osc", "dcs", "string", "charset", "esc", "invalid" ]
+kindIndex = { k: i for i, k in enumerate(kinds) }
+
+# SGR escapes (by far the most common), with the params as the group.
+sgrRegex = re.compile(rb"\x1b\[([0-9;:]*)m")
+
+# Every other kind of complete escape sequence. The groups say which kind
+# matched: CSI (params, intermediates, final); OSC (whole); DCS/SOS/PM/APC
+# (whole); ESC with intermediates (whole); plain ESC x.
+otherRegex = re.compile(
+    rb"\x1b(?!\[[0-9;:]*m)(?:"
+    rb"\[([\x30-\x3f]*)([\x20-\x2f]*)([\x40-\x7e])"
+    rb"|(\][^\x07\x18\x1a\x1b]*(?:\x07|\x1b\\))"
+    rb"|([PX^_][^\x18\x1a\x1b]*\x1b\\)"
+    rb"|([\x20-\x2f]+[\x30-\x7e])"
+    rb"|([\x30-\x4f\x51-\x57\x59\x5a\x5c\x60-\x7e]))")
+
+# SGR code indexes: 0-255 for plain codes; then 38;5;n, 48;5;n, 58;5;n;
+# then 38;2, 48;2, and 58;2 (24-bit fg, bg, underline).
+nCodes = 256 + 3 * 256 + 3
+ext256 = { 38: 256, 48: 512, 58: 768 }
+extRGB = { 38: 1024, 48: 1025, 58: 1026 }
+
+# Colors for fg/bg: 0 = default, 1-8 = basic, 9-16 = bright,
+# 17-272 = xterm-256, 273 = 24-bit.
+nColors = 274
+basicNames = [ "black", "red", "green", "yellow", "blue", "magenta", "cyan", "white" ]
+
+defaultWindow = 1 << 24
+
+
+###############################################################################
+#
+def codeName(index:int) -> str:
+    if (index < 256): return str(index)
+    if (index < 1024): return "%d;5;%d" % ((index >> 8) * 10 + 28, index & 255)
+    return "%d;2" % (38 + 10 * (index - 1024))
+
+def colorName(c:int) -> str:
+    if (c == 0): return "default"
+    if (c <= 8): return basicNames[c-1]
+    if (c <= 16): return "bright" + basicNames[c-9]
+    if (c < 273): return "38;5;%d" % (c - 17)
+    return "rgb"
+
+def parseSGR(params:bytes) -> tuple:
+    """Decode one SGR escape's params.
+    @return (list of code indexes, new fg or None, new bg or None).
+    """
+    ps = params.replace(b":", b";").split(b";")
+    codes = []
+    fg = bg = None
+    i = 0
+    while (i < len(ps)):
+        try:
+            p = int(ps[i] or 0)
+        except ValueError:
+            p = 255
+        if (p in ext256 and i + 1 < len(ps) and ps[i+1] in (b"5", b"2")):
+            if (ps[i+1] == b"5" and i + 2 < len(ps)):
+                try:
+                    n = int(ps[i+2] or 0) & 255
+                except ValueError:
+                    n = 0
+                codes.append(ext256[p] + n)
+                color = 17 + n
+                i += 3
+            else:
+                codes.append(extRGB[p])
+                color = 273
+                i += 5 if (len(ps) - i >= 5) else len(ps) - i
+            if (p == 38): fg = color
+            elif (p == 48): bg = color
+            continue
+        codes.append(min(p, 255))
+        if (p == 0): fg = bg = 0
+        elif (p == 39): fg = 0
+        elif (p == 49): bg = 0
+        elif (30 <= p <= 37): fg = p - 29
+        elif (90 <= p <= 97): fg = p - 81
+        elif (40 <= p <= 47): bg = p - 39
+        elif (100 <= p <= 107): bg = p - 91
+        i += 1
+    return codes, fg, bg
+
+
+###############################################################################
+#
+class EscapeStats:
+    """Accumulate escape counts over any number of files or buffers.
+    """
+    def __init__(self):
+        self.nBytes = 0
+        self.kindCounts = [ 0 ] * len(kinds)
+        self.kindBytes = [ 0 ] * len(kinds)
+        self.codeCounts = [ 0 ] * nCodes
+        self.comboCounts = [ 0 ] * (nColors * nColors)
+        self.fg = self.bg = 0
+        self.sgrEffects = {}  # params -> (fg, bg) change, for the running colors
+
+    def addBuffer(self, buf, start:int=0, end:int=None) -> None:
+        """Count the escapes in buf[start:end] (bytes or bytearray).
+        """
+        from collections import Counter
+        if (end is None): end = len(buf)
+        self.nBytes += end - start
+        kc = self.kindCounts
+        kb = self.kindBytes
+        sgrParams = sgrRegex.findall(buf, start, end)
+        nESC = buf.count(b"\x1b", start, end)
+        sgrs = Counter(sgrParams)
+        kc[0] += len(sgrParams)
+        kb[0] += sum(n * (3 + len(params)) for params, n in sgrs.items())
+
+        # Everything else (usually nothing, so this seldom costs a scan).
+        if (nESC > len(sgrParams)):
+            nMatched = nEmbedded = 0
+            for key, n in Counter(otherRegex.findall(buf, start, end)).items():
+                nMatched += n
+                params, inter, final, osc, strng, escInter, _ = key
+                if (final):
+                    k, size = 1, 3 + len(params) + len(inter)
+                elif (osc):
+                    k, size = 2, 1 + len(osc)
+                    nEmbedded += n * osc.count(b"\x1b")
+                elif (strng):
+                    k, size = (3 if strng[0:1] == b"P" else 4), 1 + len(strng)
+                    nEmbedded += n * strng.count(b"\x1b")
+                elif (escInter):
+                    k, size = (5 if escInter[0:1] in b"()*+-./" else 6), 1 + len(escInter)
+                else:
+                    k, size = 6, 2
+                kc[k] += n
+                kb[k] += n * size
+            # Any other ESC doesn't start a complete sequence (those in OSC
+            # and DCS etc. strings are the ESC of the terminator, "ESC \").
+            nInvalid = nESC - len(sgrParams) - nMatched - nEmbedded
+            if (nInvalid > 0):
+                kc[7] += nInvalid
+                kb[7] += nInvalid
+        if (not sgrParams): return
+
+        # SGR codes, from each distinct escape.
+        cc = self.codeCounts
+        effects = self.sgrEffects
+        if (len(effects) + len(sgrs) > 100000): effects.clear()
+        for params, n in sgrs.items():
+            eff = effects.get(params)
+            if (eff is None): eff = effects[params] = parseSGR(params)
+            for code in eff[0]:
+                cc[code] += n
+
+        # Running fg/bg, one SGR at a time (in order).
+        combos = self.comboCounts
+        fg, bg = self.fg, self.bg
+        for _, f, b in map(effects.__getitem__, sgrParams):
+            if (f is not None): fg = f
+            if (b is not None): bg = b
+            combos[fg * nColors + bg] += 1
+        self.fg, self.bg = fg, bg
+
+    def addStream(self, ifh, window:int=defaultWindow) -> None:
+        """Count the escapes in a binary stream, a window at a time.
+        """
+        carry = b""
+        read = getattr(ifh, "read1", ifh.read)  # (read() loses a partial block on error)
+        try:
+            while (True):
+                block = read(window)
+                if (not block): break
+                if (carry): block = carry + block
+                cut = block.rfind(b"\n") + 1
+                if (cut == 0 and len(block) < 4 * window):
+                    carry = block
+                    continue
+                if (cut == 0): cut = len(block)
+                self.addBuffer(block, 0, cut)
+                carry = block[cut:]
+        finally:  # Count what was read, even if the rest can't be.
+            if (carry): self.addBuffer(carry)
+
+    def addFile(self, path:str, window:int=defaultWindow) -> None:
+        """Count the escapes in a file (memory-mapped if it's a regular file,
+        or decompressed if it's compressed; see `compressedIO.py`).
+        """
+        import compressedIO as ci
+        from uncolorizeEngine import mapFile
+        with open(path, "rb") as ifh:
+            mm = mapFile(ifh)
+            if (mm is None):
+                self.addStream(ci.openBinary(ifh), window=window)
+                return
+        if (ci.sniff(mm[0:ci.magicLen])):
+            mm.close()
+            with ci.openBinary(path) as ifh:
+                self.addStream(ifh, window=window)
+            return
+        try:
+            size = len(mm)
+            start = 0
+            while (start < size):
+                end = min(size, start + window)
+                if (end < size):
+                    nl = mm.find(b"\n", end)
+                    end = size if (nl < 0) else nl + 1
+                self.addBuffer(mm[start:end])  # (mmap has no count())
+                start = end
+        finally:
+            mm.close()
+
+    def merge(self, other:'EscapeStats') -> None:
+        """Add in the counts from another EscapeStats (say, for another file).
+        """
+        self.nBytes += other.nBytes
+        for mine, theirs in ((self.kindCounts, other.kindCounts),
+            (self.kindBytes, other.kindBytes), (self.codeCounts, other.codeCounts),
+            (self.comboCounts, other.comboCounts)):
+            for i, n in enumerate(theirs):
+                if (n): mine[i] += n
+
+    def report(self) -> dict:
+        escapeBytes = sum(self.kindBytes)
+        return {
+            "bytes": self.nBytes,
+            "textBytes": self.nBytes - escapeBytes,
+            "escapeBytes": escapeBytes,
+            "kinds": { k: { "count": self.kindCounts[i], "bytes": self.kindBytes[i] }
+                for i, k in enumerate(kinds) if self.kindCounts[i] },
+            "sgrCodes": { codeName(i): n for i, n in enumerate(self.codeCounts) if n },
+            "fgBg": { "%s/%s" % (colorName(i // nColors), colorName(i % nColors)): n
+                for i, n in enumerate(self.comboCounts) if n },
+        }
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+#
+# findColorName.py: Find the nearest X11 color names for many colors at once.
+# 2026-10-17: Written by Steven J. DeRose (after findColorName, in Perl).
+#
+import sys
+import re
+import logging
+from itertools import islice
+
+import numpy as np
+
+import colorNameDB as cn
+import compressedIO as ci
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "findColorName",
+    "description"  : "Find the nearest X11 color names for many colors at once.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    findColorName.py [options] r g b
+    findColorName.py [options] [--queries file]  < colors.txt
+
+Searches the X Windows color-name file (rgb.txt) for the color closest to
+each given color. Like the Perl `findColorName`, but it can do any number
+of colors at once, reading them (one per line) from `--queries` files, or
+stdin if there are no `r g b` arguments:
+
+    #RRGGBB (or any other form `colorConvert.py` accepts)
+    RRGGBB
+    RR GG BB     (hex, like the `r g b` arguments)
+
+For each, it writes the query, a tab, the nearest color name, a tab, that
+color's r g b (in hex), a tab, and the distance:
+
+    #fa8072	salmon	fa 80 72	 0.00
+
+Given just `r g b`, it says "Best match is..." as the Perl version does.
+
+The X11 colors come from the compiled color-name table (see
+`colorNameDB.py`), memory-mapped, so there's nothing to parse; or with
+`--file`, from that rgb.txt file, read once. They go into arrays; colors are taken to 8 bits per
+channel (like rgb.txt), and each distinct query color is looked up
+only once. The nearest name is exact, and is found a block of queries at
+a time (`--blockLines`): by comparing each query to every color at once
+(vectorized, with a matrix product for Euclidean distance) for ordinary
+name tables, or with a grid index (see `paletteIndex.py`) for big ones. So
+a million colors take seconds, not a million processes.
+
+==Distance==
+
+`--metric` says how "closest" is measured:
+
+* ''euclidean'' (the default) -- Euclidean distance in RGB (0 to 255).
+* ''manhattan'' -- the sum of the R, G, and B differences (also `--manhattan`).
+* ''de76'', ''de2000'', ''oklab'' -- perceptual measures (see `colorDistance.py`),
+which pick what looks closest much better.
+
+=Related Commands=
+
+`findColorName` (the Perl original), `xcolors`, `colorConvert.py --palette`
+and `--oformat name`.
+
+=History=
+
+* 2010-09-05: `findColorName` written in Perl by Steven J. DeRose.
+* 2026-10-17: Python version, with batches of queries and --metric.
+Get the X11 names from colorNameDB.py unless --file is given.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+
+=Options=
+"""
+
+bruteLimit = 2048  # Name tables up to this size are searched by brute force
+
+metricNames = [ "euclidean", "manhattan", "de76", "de2000", "oklab" ]
+
+hexTripleRegex = re.compile(
+    r"^\s*([0-9a-fA-F]{1,2})\s+([0-9a-fA-F]{1,2})\s+([0-9a-fA-F]{1,2})\s*$")
+bareHexRegex = re.compile(r"^\s*([0-9a-fA-F]{6})\s*$")
+
+
+###############################################################################
+#
+class ColorNameTable:
+    """Color names and their r, g, b (0 to 255), in arrays, and an index to
+    find the nearest name by each metric (built when first needed).
+    """
+    def __init__(self, names:list, rgb:np.ndarray, path:str=""):
+        if (not names): raise ValueError("No colors found in '%s'." % (path))
+        self.path = path
+        self.names = list(names)
+        self.rgb = np.asarray(rgb, dtype=np.int64)
+        self.indexes = {}
+
+    @classmethod
+    def fromFile(cls, path:str) -> 'ColorNameTable':
+        """Read an X11 rgb.txt file.
+        """
+        entries = cn.readRgbTxt(path)
+        rgb = [ (x >> 16, (x >> 8) & 0xFF, x & 0xFF) for _, x in entries ]
+        return cls([ name for name, _ in entries ], np.array(rgb).reshape(-1, 3), path)
+
+    @classmethod
+    def fromDB(cls, source:str="x11") -> 'ColorNameTable':
+        """Use the names from `source` in the compiled database (see
+        `colorNameDB.py`), with no parsing.
+        """
+        db = cn.getDB()
+        names, rgb = db.arrays(source)
+        return cls(names, rgb, db.path or "colorNameDB")
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, rgb:np.ndarray, metric:str="euclidean") -> tuple:
+        """Find the nearest color to each row of `rgb` ((N, 3) ints, 0 to 255).
+        @return ((N,) array of row numbers, (N,) array of distances).
+        """
+        if (metric in ("euclidean", "manhattan")):
+            manhattan = (metric == "manhattan")
+            if (len(self) <= bruteLimit):
+                which = self.nearestBrute(rgb, manhattan)
+            else:
+                if ("grid" not in self.indexes):
+                    from paletteIndex import GridIndex
+                    self.indexes["grid"] = GridIndex(self.rgb)
+                which = self.indexes["grid"].nearest(rgb, manhattan=manhattan)[0]
+            diff = rgb - self.rgb[which]
+            if (manhattan): return which, np.abs(diff).sum(axis=1).astype(np.float64)
+            return which, np.sqrt((diff * diff).sum(axis=1))
+        if (metric not in self.indexes):
+            from paletteIndex import Palette
+            self.indexes[metric] = Palette(self.rgb / 255.0, self.names, metric=metric)
+        import colorDistance as cd
+        pal = self.indexes[metric]
+        coords = cd.convert(rgb / 255.0, metric)
+        if (pal.index is None):
+            return cd.nearestBrute(pal.coords, coords, metric)
+        which, dist2 = pal.index.nearest(coords)
+        return which, np.sqrt(dist2)
+
+    def nearestBrute(self, rgb:np.ndarray, manhattan:bool=False,
+        tile:int=1 << 22) -> np.ndarray:
+        """Compare each query to every color, a tile of queries at a time.
+        Euclidean uses |q|^2 - 2 q.p + |p|^2 (a matrix product), which is
+        exact here since the colors are small integers.
+        @return (N,) array of row numbers (ties go to the earlier color).
+        """
+        which = np.empty(len(rgb), dtype=np.intp)
+        step = max(1, tile // len(self))
+        if (manhattan):
+            p16 = self.rgb.astype(np.int16)
+            for s in range(0, len(rgb), step):
+                q16 = rgb[s:s+step].astype(np.int16)
+                d = np.abs(q16[:, None, 0] - p16[None, :, 0])
+                d += np.abs(q16[:, None, 1] - p16[None, :, 1])
+                d += np.abs(q16[:, None, 2] - p16[None, :, 2])
+                which[s:s+step] = d.argmin(axis=1)
+        else:
+            p = self.rgb.astype(np.float64)
+            pp = (p * p).sum(axis=1)
+            for s in range(0, len(rgb), step):
+                q = rgb[s:s+step].astype(np.float64)
+                which[s:s+step] = (pp[None, :] - 2.0 * (q @ p.T)).argmin(axis=1)
+        return which
+
+    def describe(self, which:np.ndarray, dist:np.ndarray) -> list:
+        """@return "name<TAB>rr gg bb<TAB>distance" for each match.
+        """
+        names = self.names
+        rgbs = self.rgb[which].tolist()
+        return [ "%s\t%02x %02x %02x\t%5.2f" % (names[i], r, g, b, d)
+            for i, (r, g, b), d in zip(which.tolist(), rgbs, dist.tolist()) ]
+
+
+###############################################################################
+#
+def parseQueries(lines:list) -> tuple:
+    """Parse a list of query colors (see above).
+    @return ((N, 3) int array, 0 to 255; (N,) bool array of unparseable lines).
+    """
+    import colorBatch
+    rgb, bad = colorBatch.parseColors(lines)
+    rgb = np.round(np.where(bad[:, None], 0.0, rgb) * 255.0)
+    for i in np.flatnonzero(bad).tolist():
+        mat = hexTripleRegex.match(lines[i])
+        if (mat):
+            rgb[i] = [ int(x, 16) for x in mat.groups() ]
+            bad[i] = False
+            continue
+        mat = bareHexRegex.match(lines[i])
+        if (mat):
+            h = mat.group(1)
+            rgb[i] = [ int(h[j:j+2], 16) for j in (0, 2, 4) ]
+            bad[i] = False
+    return np.clip(rgb, 0, 255).astype(np.int64), bad
+
+def findNames(table:ColorNameTable, lines:list, metric:str="euclidean") -> tuple:
+    """Find the nearest name for each of a block of query lines.
+    @return (output text, list of indexes of lines that couldn't be parsed).
+    """
+    rgb, bad = parseQueries(lines)
+    packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+    uniq, inverse = np.unique(packed, return_inverse=True)
+    uRGB = np.stack([ uniq >> 16, (uniq >> 8) & 0xFF, uniq & 0xFF ], axis=1)
+    which, dist = table.nearest(uRGB, metric)
+    results = table.describe(which, dist)
+    badSet = set(np.flatnonzero(bad).tolist())
+    out = [ "" if (i in badSet) else "%s\t%s" % (rec.strip(), results[j])
+        for i, (rec, j) in enumerate(zip(lines, inverse.tolist())) ]
+    return "\n".join(out) + "\n", sorted(badSet)
+
+def doOneFile(table:ColorNameTable, fh, path:str) -> int:
+    """Look up each line of `fh`, writing the results to stdout in blocks.
+    """
+    recnum = 0
+    while (True):
+        lines = list(islice(fh, args.blockLines))
+        if (not lines): break
+        text, badLines = findNames(table, lines, args.metric)
+        for i in badLines:
+            lg.warning("%s:%d: Can't parse color '%s'.", path, recnum + i + 1,
+                lines[i].strip())
+        sys.stdout.write(text)
+        recnum += len(lines)
+    return recnum
+
+
+###############################################################################
+# Main
+#
+def processOptions():
+    import argparse
+
+    try:
+        from BlockFormatter import BlockFormatter
+        parser = argparse.ArgumentParser(
+            description=descr, formatter_class=BlockFormatter)
+    except ImportError:
+        parser = argparse.ArgumentParser(description=descr)
+
+    parser.add_argument(
+        "--blockLines", "--block-lines", type=int, metavar="N", default=1 << 16,
+        help='How many query lines to look up at a time. Default: 65536.')
+    parser.add_argument(
+        "--file", type=str, metavar="PATH", default=None,
+        help='Read this rgb.txt, instead of the X11 names in colorNameDB.py.')
+    parser.add_argument(
+        "--iencoding", "--input-encoding", type=str, metavar="E", default="utf-8",
+        help='Assume this character set for query files. Default: utf-8.')
+    parser.add_argument(
+        "--manhattan", action="store_const", dest="metric", const="manhattan",
+        default="euclidean",
+        help='Same as --metric manhattan.')
+    parser.add_argument(
+        "--metric", type=str, default="euclidean", choices=metricNames,
+        help='How to measure "closest". Default: euclidean.')
+    parser.add_argument(
+        "--queries", type=str, metavar="PATH", action="append",
+        help='Read query colors from this file (repeatable; "-" for stdin).')
+    parser.add_argument(
+        "--quiet", "-q", action="store_true",
+        help='Suppress most messages.')
+    parser.add_argument(
+        "--verbose", "-v", action="count", default=0,
+        help='Add more messages (repeatable).')
+    parser.add_argument(
+        "--version", action="version", version=__version__,
+        help='Display version information, then exit.')
+
+    parser.add_argument(
+        "rgb", type=str, nargs="*",
+        help='r g b (in hex) of one color to find.')
+
+    args0 = parser.parse_args()
+    if (lg and args0.verbose):
+        logging.basicConfig(level=logging.INFO - args0.verbose,
+            format="%(message)s")
+    if (args0.rgb and len(args0.rgb) != 3):
+        parser.error("Wrong number of args (expected r g b).")
+    return(args0)
+
+
+if __name__ == "__main__":
+    args = processOptions()
+    rgbFile = args.file
+    if (rgbFile is None and not cn.getDB().hasSource("x11")):
+        rgbFile = cn.findRgbFile() or cn.defaultRgbFile
+    try:
+        if (rgbFile is None): nameTable = ColorNameTable.fromDB("x11")
+        else: nameTable = ColorNameTable.fromFile(rgbFile)
+    except (IOError, ValueError) as e0:
+        lg.error("Couldn't load color file at '%s': %s", rgbFile, e0)
+        sys.exit(1)
+    lg.info("%d colors from '%s'.", len(nameTable), nameTable.path)
+
+    if (args.rgb):
+        try:
+            target = np.array([ [ int(x, 16) for x in args.rgb ] ], dtype=np.int64)
+        except ValueError:
+            lg.error("Bad r g b (expected hex): %s.", " ".join(args.rgb))
+            sys.exit(1)
+        bestWhich, bestDist = nameTable.nearest(target, args.metric)
+        bestIndex = int(bestWhich[0])
+        print("Best match is '%s' (%02x %02x %02x) (diff %5.2f)" %
+            ((nameTable.names[bestIndex],) + tuple(nameTable.rgb[bestIndex].tolist())
+            + (float(bestDist[0]),)))
+    elif (not args.queries or args.queries == [ "-" ]):
+        if (not args.quiet and sys.stdin.isatty()): print("Waiting on STDIN...")
+        doOneFile(nameTable, ci.openText(sys.stdin.buffer, encoding=args.iencoding), "STDIN")
+    else:
+        for qpath in args.queries:
+            if (qpath == "-"):
+                doOneFile(nameTable, ci.openText(sys.stdin.buffer,
+                    encoding=args.iencoding), "STDIN")
+                continue
+            try:
+                fh0 = ci.openText(qpath, encoding=args.iencoding)
+            except IOError:
+                lg.error("Can't open '%s'.", qpath)
+                sys.exit(1)
+            doOneFile(nameTable, fh0, qpath)
+            fh0.close()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+#
+# lsColorsIndex.py: Fast lookup of what color `ls` would give a file name.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import os
+import re
+import stat
+import fnmatch
+import itertools
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "lsColorsIndex",
+    "description"  : "Fast lookup of what color `ls` would give a file name.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from lsColorsIndex import LSColorsIndex
+    lci = LSColorsIndex.fromEnv()
+    lci.classify(b"foo.tar.gz")         # -> b"01;31"
+    sys.stdout.buffer.write(lci.colorizeLines(listOfPathLines))
+
+Support for `colorstring --lsfilter` and `--lsget`. The entries of an
+`LS_COLORS` value (or `dircolors` output) are compiled once into:
+
+* a dict of the 2-letter file-type keys ("di", "ex", "ln", etc.);
+
+* a trie on the ''reversed'' suffixes of the "*SUFFIX" globs (nearly all of
+them, like "*.tar"), so a name is classified by walking back from its end
+only as far as the longest suffix that could match;
+
+* a fallback list of compiled regexes for any other globs.
+
+So classifying a name costs about the same no matter how many entries there
+are, instead of trying each entry in turn.
+
+As in GNU `ls`, if several entries match, the one that comes ''last'' in
+`LS_COLORS` wins; and matching is case-sensitive.
+
+Names and codes are bytes, since that's what file names really are (and
+the input is a stream of paths from `find`, `du`, `git ls-files`, etc.).
+
+`colorizeDirectory()` lists a whole directory, colored, for
+`colorstring --lsdir`. It uses `os.scandir()`, whose entries usually know
+their own type, and only stat()s entries whose color depends on mode bits
+(executable, setuid, sticky, other-writable, etc.) or, for symlinks, on
+the target. Those stat()s can be spread over several threads, since on
+network filesystems the time is nearly all waiting for the server.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+esc = b"\x1b"
+globChars = "*?["
+
+
+###############################################################################
+#
+class LSColorsIndex:
+    """Compiled form of a list of LS_COLORS "key=code" entries.
+    """
+    def __init__(self, entries:list):
+        self.typeCodes = {}      # "di" etc. -> code (bytes)
+        self.suffixTrie = {}     # byte -> subtrie; None key -> (index, code)
+        self.globs = []          # (index, compiled regex, code)
+        self.nEntries = 0
+        for i, entry in enumerate(entries):
+            if (isinstance(entry, bytes)): entry = entry.decode("utf-8", "surrogateescape")
+            key, eq, code = entry.partition("=")
+            if (not eq): continue
+            self.nEntries += 1
+            codeb = code.encode("utf-8")
+            if (len(key) == 2 and key.isalpha()):
+                self.typeCodes[key] = codeb
+            elif (key.startswith("*") and not any(c in key[1:] for c in globChars)):
+                self.addSuffix(key[1:].encode("utf-8", "surrogateescape"), i, codeb)
+            else:
+                rx = re.compile(fnmatch.translate(key).encode("utf-8", "surrogateescape"), re.S)
+                self.globs.append( (i, rx, codeb) )
+        self.reset = esc + b"[" + (self.typeCodes.get("rs") or b"0") + b"m"
+        self.fileCode = self.typeCodes.get("fi")
+        if (self.fileCode in (b"0", b"00")): self.fileCode = None
+
+        # Which kinds of directory entries need a stat() to pick a color
+        # (see `entryNeedsStat()`).
+        tc = self.typeCodes
+        self.fileNeedsStat = any(tc.get(k) not in (None, b"0", b"00")
+            for k in ("ex", "su", "sg", "mh"))
+        self.dirNeedsStat = any(tc.get(k) not in (None, b"0", b"00")
+            for k in ("st", "tw", "ow"))
+        self.linkNeedsStat = (tc.get("ln") == b"target" or
+            tc.get("or") not in (None, b"0", b"00"))
+        lg.info("LS_COLORS index: %d types, %d suffixes, %d other globs.",
+            len(self.typeCodes), self.nEntries - len(self.typeCodes) - len(self.globs),
+            len(self.globs))
+
+    @classmethod
+    def fromString(cls, lsColors:str):
+        return cls([ x for x in lsColors.split(":") if x ])
+
+    @classmethod
+    def fromEnv(cls, envVar:str="LS_COLORS"):
+        return cls.fromString(os.environ.get(envVar, ""))
+
+    def addSuffix(self, suffix:bytes, index:int, code:bytes) -> None:
+        node = self.suffixTrie
+        for c in reversed(suffix):
+            node = node.setdefault(c, {})
+        node[None] = (index, code)
+
+    def classify(self, name:bytes, isDir:bool=False) -> bytes:
+        """Return the color code (like b"01;31") for a file name (not
+        a whole path), or None if nothing applies.
+        """
+        if (isDir): return self.typeCodes.get("di")
+        best = None
+        node = self.suffixTrie
+        for i in range(len(name)-1, -1, -1):
+            node = node.get(name[i])
+            if (node is None): break
+            hit = node.get(None)
+            if (hit is not None and (best is None or hit[0] > best[0])):
+                best = hit
+        for index, rx, code in self.globs:
+            if ((best is None or index > best[0]) and rx.match(name)):
+                best = (index, code)
+        if (best is not None): return best[1]
+        return self.fileCode
+
+    def colorizePath(self, path:bytes) -> bytes:
+        """Color a path by its last component (a trailing "/" means a directory).
+        """
+        isDir = path.endswith(b"/")
+        name = path.rstrip(b"/")
+        name = name[name.rfind(b"/")+1:]
+        code = self.classify(name, isDir)
+        if (not code): return path
+        return esc + b"[" + code + b"m" + path + self.reset
+
+    def colorizeLines(self, lines:list) -> bytes:
+        """Colorize a list of lines (bytes, without newlines) that each end
+        with a path. If there's a tab (as in `du` output), only the part after
+        the last tab is taken as the path.
+        """
+        buf = []
+        for rec in lines:
+            tab = rec.rfind(b"\t") + 1
+            if (tab):
+                buf.append(rec[:tab])
+                rec = rec[tab:]
+            buf.append(self.colorizePath(rec))
+            buf.append(b"\n")
+        return b"".join(buf)
+
+    ###########################################################################
+    # Whole directories, via os.scandir(). A DirEntry knows (usually without
+    # a stat) whether it's a dir, regular file, or symlink, which is all
+    # that's needed unless a color depends on mode bits (`ex`, `su`, `st`,
+    # `ow`, ...), or on a symlink's target (`or`, "ln=target").
+    #
+    def entryNeedsStat(self, entry) -> bool:
+        if (entry.is_symlink()): return self.linkNeedsStat
+        if (entry.is_dir(follow_symlinks=False)): return self.dirNeedsStat
+        if (entry.is_file(follow_symlinks=False)): return self.fileNeedsStat
+        return True  # fifo, socket, or device: need st_mode to tell which
+
+    def statEntry(self, entry):
+        """Return the stat needed for an entry (of the target, for a
+        symlink), or False for a symlink whose target is missing.
+        """
+        try:
+            if (entry.is_symlink()): return os.stat(entry.path)
+            return entry.stat(follow_symlinks=False)
+        except OSError:
+            return False
+
+    def statEntries(self, entries:list) -> list:
+        return [ self.statEntry(e) for e in entries ]
+
+    def classifyEntry(self, entry, st=None) -> bytes:
+        """Pick the code for an entry the way GNU `ls` does: by type and mode
+        bits first, then (for regular files) by name. `st` is from
+        `statEntry()`, or None if it wasn't needed.
+        """
+        tc = self.typeCodes
+        if (entry.is_symlink()):
+            if (st is False): return tc.get("or") or tc.get("ln")
+            if (st and tc.get("ln") == b"target"):
+                if (stat.S_ISDIR(st.st_mode)): return tc.get("di")
+                return self.classify(os.fsencode(entry.name))
+            return tc.get("ln")
+        if (entry.is_dir(follow_symlinks=False)):
+            if (st):
+                mode = st.st_mode
+                if ((mode & stat.S_ISVTX) and (mode & stat.S_IWOTH) and tc.get("tw")):
+                    return tc["tw"]
+                if ((mode & stat.S_IWOTH) and tc.get("ow")): return tc["ow"]
+                if ((mode & stat.S_ISVTX) and tc.get("st")): return tc["st"]
+            return tc.get("di")
+        if (entry.is_file(follow_symlinks=False)):
+            if (st):
+                mode = st.st_mode
+                if ((mode & stat.S_ISUID) and tc.get("su")): return tc["su"]
+                if ((mode & stat.S_ISGID) and tc.get("sg")): return tc["sg"]
+                if ((mode & 0o111) and tc.get("ex")): return tc["ex"]
+                if (st.st_nlink > 1 and tc.get("mh")): return tc["mh"]
+            return self.classify(os.fsencode(entry.name))
+        if (not st): return None
+        mode = st.st_mode
+        if (stat.S_ISFIFO(mode)): return tc.get("pi")
+        if (stat.S_ISSOCK(mode)): return tc.get("so")
+        if (stat.S_ISBLK(mode)): return tc.get("bd")
+        if (stat.S_ISCHR(mode)): return tc.get("cd")
+        if (stat.S_ISDOOR(mode)): return tc.get("do")
+        return None
+
+    def colorizeDirectory(self, path, ofh, threads:int=1, batchSize:int=4096) -> int:
+        """Write the names in directory `path` to binary file `ofh`, one per
+        line, colored as by `ls --color`, in directory order (like `ls -U`).
+        Entries are taken in batches; any stat()s a batch needs are spread
+        over `threads` threads (which helps a lot on network filesystems,
+        where each stat is a round trip), and each batch is written at once.
+        @return The number of entries.
+        """
+        pool = None
+        if (threads > 1):
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(threads)
+        n = 0
+        try:
+            with os.scandir(os.fsencode(path)) as it:
+                while (True):
+                    batch = list(itertools.islice(it, batchSize))
+                    if (not batch): break
+                    n += len(batch)
+                    need = [ i for i, e in enumerate(batch) if self.entryNeedsStat(e) ]
+                    needEntries = [ batch[i] for i in need ]
+                    if (pool and len(need) > 1):
+                        step = len(need) // (threads * 4) + 1
+                        parts = [ needEntries[i:i+step] for i in range(0, len(need), step) ]
+                        stats = list(itertools.chain.from_iterable(
+                            pool.map(self.statEntries, parts)))
+                    else:
+                        stats = self.statEntries(needEntries)
+                    stList = [ None ] * len(batch)
+                    for i, st in zip(need, stats):
+                        stList[i] = st
+                    buf = []
+                    for entry, st in zip(batch, stList):
+                        code = self.classifyEntry(entry, st)
+                        if (code):
+                            buf.append(esc + b"[" + code + b"m" + entry.name + self.reset + b"\n")
+                        else:
+                            buf.append(entry.name + b"\n")
+                    ofh.write(b"".join(buf))
+        finally:
+            if (pool): pool.shutdown()
+        return n
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+#
+# paletteIndex.py: Find the nearest palette color, fast, for many colors at once.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import os
+import re
+import logging
+
+import numpy as np
+
+import colorDistance as cd
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "paletteIndex",
+    "description"  : "Find the nearest palette color, fast, for many colors at once.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from paletteIndex import Palette
+    pal = Palette.fromFile("brand.txt", useCache=True, metric="oklab")
+    which = pal.nearest(rgb)        # rgb is (N, 3), 0 to 1; -> (N,) row numbers
+    print(pal.labels[which[0]])
+
+Support for `colorConvert.py --palette`: for each color, find the nearest
+color in a palette, exactly, even for palettes of 100K+ colors and
+millions of queries.
+
+==Metrics==
+
+The `metric` (see `colorDistance.py`) says how "nearest" is measured:
+''rgb'' (Euclidean in sRGB, the default), ''de76'' (CIELAB),
+''de2000'' (CIEDE2000), or ''oklab''. The palette colors are converted
+to the metric's space once (and cached with the index), so queries only
+pay to convert themselves. For all but ''de2000'', that's Euclidean
+distance in that space, so the grid index below is used. CIEDE2000 is not a
+Euclidean distance, so there each query is compared to every palette color
+(still vectorized); that's fine for name tables and ordinary palettes,
+but use ''oklab'' (nearly as good) for huge ones.
+
+==Palette files==
+
+One color per line, in any form `colorConvert.py` accepts (say,
+`#RRGGBB`), optionally followed by whitespace and a label. Blank lines and
+lines starting with "#" and a space are skipped. The whole line (trimmed)
+is what's reported as the nearest color.
+
+==The index==
+
+`GridIndex` divides the box around the palette colors into a uniform 3D grid
+of about 2 colors per cell (at most 64 cells per side), with the colors
+sorted by cell, so each cell's colors are a slice. A query looks in its own
+cell, then in the shell of cells around that, and so on, until the nearest
+color found so far is closer than any unsearched cell could be; so the
+answer is exact (ties go to the earlier palette color). How close an
+unsearched cell could be is measured from the query to the faces of the
+searched box, counting how far the query is outside the whole grid, too.
+Usually that takes one shell (27 cells, and a few dozen distances), instead
+of a distance to every palette color.
+
+Queries are done a chunk at a time, all at once with NumPy: each shell's
+(query, palette color) pairs are made with array operations (at most
+`maxPairs` at a time), and the minimum for each query taken with
+`np.minimum.at()`; only the queries not yet settled go on to the next shell.
+
+That only pays when the palette colors fill their box fairly evenly. When
+they don't (say, a tight cluster with queries all around it, or a gray
+ramp, which is just the diagonal of its box), queries can need many
+shells, or shells with most of the palette in them. So the queries still
+not settled after `maxShells` shells (or sooner, if a shell would mean
+comparing more than half of all the pairs) are compared to every palette
+color instead, a tile at a time. That costs about what brute force
+always does, but no more.
+
+The index works on any 3-D coordinates (not just RGB), so it can serve
+other color spaces as well. It can also find the nearest by Manhattan
+distance (the sum of the differences), since an unsearched cell can't be
+closer by that measure either.
+
+==Caching==
+
+With `useCache`, the parsed palette and its index are saved next to
+the palette file (as PATH.idx.npz, or PATH.METRIC.idx.npz for metrics
+other than ''rgb''), and used instead of re-reading the
+palette as long as the palette file's size and modification time
+haven't changed. If it can't be written, there's just a warning.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose. Add metrics (colorDistance.py).
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+indexVersion = 2
+cacheSuffix = ".idx.npz"
+maxGrid = 64
+defaultChunk = 8192
+maxShells = 3         # Then the queries still open are done by brute force
+maxPairs = 1 << 20    # (query, point) pairs compared at once
+bruteTile = 1 << 22
+
+labelSplitRegex = re.compile(r"\s+(?![^()]*\))")  # Not at spaces inside "(...)"
+
+
+###############################################################################
+#
+def shellOffsets(r:int) -> np.ndarray:
+    """@return the (M, 3) cell offsets at Chebyshev distance exactly `r`.
+    """
+    side = np.arange(-r, r + 1)
+    cube = np.stack(np.meshgrid(side, side, side, indexing="ij"), axis=-1).reshape(-1, 3)
+    return cube[np.abs(cube).max(axis=1) == r]
+
+
+###############################################################################
+#
+class GridIndex:
+    """Exact nearest-neighbor search over a fixed set of 3-D points, with a
+    uniform grid (see above).
+    """
+    def __init__(self, points:np.ndarray, gridSize:int=None):
+        points = np.ascontiguousarray(points, dtype=np.float64)
+        n = len(points)
+        if (n == 0): raise ValueError("Can't index an empty palette.")
+        if (gridSize is None):
+            gridSize = int(max(1, min(maxGrid, round((n / 2.0) ** (1.0 / 3.0)))))
+        self.gridSize = gridSize
+        self.lo = points.min(axis=0)
+        extent = points.max(axis=0) - self.lo
+        self.cellSize = np.where(extent > 0, extent / gridSize, 1.0)
+        cells = self.cellsOf(points)
+        ids = (cells[:, 0] * gridSize + cells[:, 1]) * gridSize + cells[:, 2]
+        self.order = np.argsort(ids, kind="stable")
+        self.points = points[self.order]
+        self.cellStart = np.searchsorted(ids[self.order], np.arange(gridSize ** 3 + 1))
+        self.shells = {}
+        self.byNumber = None
+
+    @classmethod
+    def fromArrays(cls, arrays:dict) -> 'GridIndex':
+        """Rebuild from what `arrays()` returned (say, loaded from a cache).
+        """
+        self = cls.__new__(cls)
+        self.gridSize = int(arrays["gridSize"])
+        self.lo = arrays["lo"]
+        self.cellSize = arrays["cellSize"]
+        self.order = arrays["order"]
+        self.points = arrays["points"]
+        self.cellStart = arrays["cellStart"]
+        self.shells = {}
+        self.byNumber = None
+        return self
+
+    def arrays(self) -> dict:
+        return { "gridSize": np.array(self.gridSize), "lo": self.lo,
+            "cellSize": self.cellSize, "order": self.order,
+            "points": self.points, "cellStart": self.cellStart }
+
+    def cellsOf(self, points:np.ndarray) -> np.ndarray:
+        cells = np.floor((points - self.lo) / self.cellSize).astype(np.intp)
+        return np.clip(cells, 0, self.gridSize - 1)
+
+    def shell(self, r:int) -> np.ndarray:
+        if (r not in self.shells): self.shells[r] = shellOffsets(r)
+        return self.shells[r]
+
+    def nearest(self, queries:np.ndarray, chunk:int=defaultChunk,
+        manhattan:bool=False) -> tuple:
+        """Find the nearest point to each query (an (N, 3) array), by
+        Euclidean distance, or (with `manhattan`) by the sum of the differences.
+        @return (an (N,) array of point numbers (in the order given to the
+        constructor), an (N,) array of squared distances (or Manhattan ones)).
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float64)
+        n = len(queries)
+        which = np.empty(n, dtype=np.intp)
+        dist2 = np.empty(n, dtype=np.float64)
+        for s in range(0, n, chunk):
+            which[s:s+chunk], dist2[s:s+chunk] = self.nearestChunk(
+                queries[s:s+chunk], manhattan)
+        return which, dist2
+
+    def nearestChunk(self, q:np.ndarray, manhattan:bool=False) -> tuple:
+        g = self.gridSize
+        m = len(q)
+        home = self.cellsOf(q)
+        bestD = np.full(m, np.inf)
+        bestI = np.full(m, np.iinfo(np.intp).max, dtype=np.intp)
+        pending = np.arange(m)
+        r = 0
+        while (len(pending) and r < maxShells):
+            cells = home[pending, None, :] + self.shell(r)[None, :, :]
+            inGrid = ((cells >= 0) & (cells < g)).all(axis=2)
+            qn, sn = np.nonzero(inGrid)
+            cells = cells[qn, sn]
+            ids = (cells[:, 0] * g + cells[:, 1]) * g + cells[:, 2]
+            starts = self.cellStart[ids]
+            counts = self.cellStart[ids + 1] - starts
+            # The grid isn't helping (say, all the colors are in a few cells).
+            if (int(counts.sum()) * 2 > len(pending) * len(self.points)): break
+            # Every (query, point) pair in those cells, maxPairs at a time.
+            ends = np.cumsum(counts)
+            a = 0
+            while (a < len(ids)):
+                b = max(a + 1, int(np.searchsorted(ends, ends[a] - counts[a] + maxPairs, side="right")))
+                self.comparePairs(q, pending[qn[a:b]], starts[a:b], counts[a:b],
+                    bestD, bestI, manhattan)
+                a = b
+            # Settled: nothing unsearched can be closer (or nothing's unsearched).
+            reach = self.unsearchedReach(q[pending], home[pending], r, manhattan)
+            pending = pending[~(bestD[pending] < reach)]
+            r += 1
+        if (len(pending)):
+            bestI[pending], bestD[pending] = self.nearestBrute(q[pending], manhattan)
+        return bestI, bestD
+
+    def comparePairs(self, q:np.ndarray, qIds:np.ndarray, starts:np.ndarray,
+        counts:np.ndarray, bestD:np.ndarray, bestI:np.ndarray, manhattan:bool) -> None:
+        """Compare query `qIds[k]` to every point in the cell whose points
+        start at `starts[k]`, updating `bestD` and `bestI` in place.
+        """
+        total = int(counts.sum())
+        if (not total): return
+        pair = np.repeat(np.arange(len(starts)), counts)
+        pos = starts[pair] + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        qq = qIds[pair]
+        diff = self.points[pos] - q[qq]
+        if (manhattan): d2 = np.abs(diff).sum(axis=1)
+        else: d2 = np.einsum("ij,ij->i", diff, diff)
+        pid = self.order[pos]
+        touched = np.unique(qIds)
+        before = bestD[touched]
+        np.minimum.at(bestD, qq, d2)
+        improved = touched[bestD[touched] < before]
+        bestI[improved] = np.iinfo(np.intp).max
+        tied = (d2 == bestD[qq])
+        np.minimum.at(bestI, qq[tied], pid[tied])
+
+    def unsearchedReach(self, q:np.ndarray, home:np.ndarray, r:int,
+        manhattan:bool=False) -> np.ndarray:
+        """@return a lower bound on the distance (squared, unless `manhattan`)
+        from each query to any point in a cell not within `r` of its `home`
+        cell, or infinity if there are none. Past each face of the searched
+        box that isn't the edge of the grid, a point is at least that far
+        along that axis, plus however far the query is outside the grid box
+        along the others (all the points are inside it).
+        """
+        g = self.gridSize
+        below = np.where(home - r > 0, q - (self.lo + (home - r) * self.cellSize), np.inf)
+        above = np.where(home + r < g - 1, self.lo + (home + r + 1) * self.cellSize - q, np.inf)
+        slack = np.maximum(np.minimum(below, above), 0.0)
+        out = np.maximum(np.maximum(self.lo - q, q - (self.lo + g * self.cellSize)), 0.0)
+        if (manhattan): return (slack + out.sum(axis=1)[:, None] - out).min(axis=1)
+        out *= out
+        return (slack * slack + out.sum(axis=1)[:, None] - out).min(axis=1)
+
+    def nearestBrute(self, q:np.ndarray, manhattan:bool=False) -> tuple:
+        """Find the nearest point to each query by comparing every pair, a
+        tile at a time (as `colorDistance.nearestBrute()`, but on the index's
+        own coordinates and distances). For Euclidean distance the tile is
+        done with a matrix product; since that can round differently, the
+        few points within rounding of each minimum are then checked exactly.
+        """
+        if (self.byNumber is None):
+            self.byNumber = np.empty_like(self.points)
+            self.byNumber[self.order] = self.points
+            self.byNumberSq = np.einsum("ij,ij->i", self.byNumber, self.byNumber)
+            self.byNumberT2 = -2.0 * self.byNumber.T
+        pts = self.byNumber
+        n = len(q)
+        which = np.empty(n, dtype=np.intp)
+        dist2 = np.empty(n, dtype=np.float64)
+        if (manhattan):
+            step = max(1, maxPairs // len(pts))
+            for s in range(0, n, step):
+                d = np.abs(pts[None, :, :] - q[s:s+step, None, :]).sum(axis=2)
+                which[s:s+step] = d.argmin(axis=1)
+                dist2[s:s+step] = d[np.arange(len(d)), which[s:s+step]]
+            return which, dist2
+        step = max(1, bruteTile // len(pts))
+        qSq = np.einsum("ij,ij->i", q, q)
+        tol = 1e-9 * (1.0 + qSq.max() + self.byNumberSq.max())
+        for s in range(0, n, step):
+            qt = q[s:s+step]
+            # |q|^2 is the same all along the row, so it's left out.
+            approx = qt @ self.byNumberT2
+            approx += self.byNumberSq
+            near = np.flatnonzero(approx <= (approx.min(axis=1) + tol)[:, None])
+            rows, cols = np.divmod(near, len(pts))
+            diff = pts[cols] - qt[rows]
+            d2 = np.einsum("ij,ij->i", diff, diff)
+            bestD = np.full(len(qt), np.inf)
+            np.minimum.at(bestD, rows, d2)
+            bestI = np.full(len(qt), np.iinfo(np.intp).max, dtype=np.intp)
+            tied = (d2 == bestD[rows])
+            np.minimum.at(bestI, rows[tied], cols[tied])
+            which[s:s+step] = bestI
+            dist2[s:s+step] = bestD
+        return which, dist2
+
+
+###############################################################################
+#
+class Palette:
+    """A list of colors (with labels), and an index to find the nearest
+    by `metric` (see above).
+    """
+    def __init__(self, rgb:np.ndarray, labels:list, metric:str="rgb",
+        coords:np.ndarray=None, index:GridIndex=None):
+        self.rgb = np.asarray(rgb, dtype=np.float64)
+        self.labels = list(labels)
+        self.metric = metric
+        self.coords = cd.convert(self.rgb, metric) if (coords is None) else coords
+        self.index = index
+        if (index is None and cd.isEuclidean(metric)):
+            self.index = GridIndex(self.coords)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def nearest(self, rgb:np.ndarray) -> np.ndarray:
+        """@return the row number of the nearest palette color, for each
+        row of `rgb` (an (N, 3) array, 0 to 1).
+        """
+        queries = cd.convert(rgb, self.metric)
+        if (self.index is None):
+            return cd.nearestBrute(self.coords, queries, self.metric)[0]
+        return self.index.nearest(queries)[0]
+
+    def nearestLabel(self, rgb) -> str:
+        """Just one color (r, g, b), as for `colorConvert.findNearestPalColor()`.
+        """
+        return self.labels[int(self.nearest(np.array([ rgb ], dtype=np.float64))[0])]
+
+    @classmethod
+    def fromLines(cls, lines, path:str="", metric:str="rgb") -> 'Palette':
+        """Parse palette lines (see above).
+        @raise ValueError for a line that isn't a color.
+        """
+        import colorBatch
+        labels = []
+        specs = []
+        for rec in lines:
+            rec = rec.strip()
+            if (not rec or rec.startswith("# ")): continue
+            labels.append(rec)
+            specs.append(labelSplitRegex.split(rec, maxsplit=1)[0])
+        if (not labels): raise ValueError("%s: No colors in palette." % (path))
+        rgb, bad = colorBatch.parseColors(specs)
+        if (bad.any()):
+            raise ValueError("%s: Bad palette color '%s'." % (path, labels[int(np.flatnonzero(bad)[0])]))
+        return cls(rgb, labels, metric=metric)
+
+    @classmethod
+    def fromFile(cls, path:str, encoding:str="utf-8", useCache:bool=False,
+        metric:str="rgb") -> 'Palette':
+        """Load a palette file (which may be compressed; see `compressedIO.py`),
+        or (with `useCache`) its cached index if that's up to date.
+        """
+        import compressedIO as ci
+        cd.checkMetric(metric)
+        cachePath = cls.cachePathFor(path, metric)
+        stamp = cls.fileStamp(path)
+        if (useCache and os.path.isfile(cachePath)):
+            pal = cls.loadCache(cachePath, stamp, metric)
+            if (pal is not None): return pal
+        with ci.openText(path, encoding=encoding) as ifh:
+            pal = cls.fromLines(ifh, path=path, metric=metric)
+        if (useCache): pal.saveCache(cachePath, stamp)
+        return pal
+
+    @staticmethod
+    def cachePathFor(path:str, metric:str) -> str:
+        if (metric == "rgb"): return path + cacheSuffix
+        return "%s.%s%s" % (path, metric, cacheSuffix)
+
+    @staticmethod
+    def fileStamp(path:str) -> np.ndarray:
+        st = os.stat(path)
+        return np.array([ indexVersion, st.st_size, st.st_mtime_ns ], dtype=np.int64)
+
+    @classmethod
+    def loadCache(cls, cachePath:str, stamp:np.ndarray, metric:str="rgb") -> 'Palette':
+        """@return the cached Palette, or None if it's stale or unreadable.
+        """
+        try:
+            with np.load(cachePath, allow_pickle=False) as npz:
+                if (not np.array_equal(npz["stamp"], stamp)): return None
+                arrays = { k: npz[k] for k in npz.files }
+        except (OSError, ValueError, KeyError) as e:
+            lg.warning("Can't read palette cache '%s': %s", cachePath, e)
+            return None
+        index = GridIndex.fromArrays(arrays) if ("cellStart" in arrays) else None
+        return cls(arrays["rgb"], arrays["labels"].tolist(), metric=metric,
+            coords=arrays["coords"], index=index)
+
+    def saveCache(self, cachePath:str, stamp:np.ndarray) -> None:
+        tmpPath = "%s.%d.tmp.npz" % (cachePath, os.getpid())
+        try:
+            indexArrays = self.index.arrays() if (self.index is not None) else {}
+            np.savez(tmpPath, stamp=stamp, rgb=self.rgb, coords=self.coords,
+                labels=np.array(self.labels, dtype=str), **indexArrays)
+            os.replace(tmpPath, cachePath)
+        except OSError as e:
+            lg.warning("Can't write palette cache '%s': %s", cachePath, e)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+#
+# parallelChunks.py: Process big files in line-aligned chunks, in parallel.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import os
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "parallelChunks",
+    "description"  : "Process big files in line-aligned chunks, in parallel.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from parallelChunks import findChunks, countLines, mapChunks
+    chunks = findChunks(path)
+    for result in mapChunks(myWorker, [ (path, s, e) for s, e in chunks ], jobs=4):
+        sys.stdout.write(result)
+
+Support for the `--jobs` option of `colorstring.py` and `uncolorize`.
+A file is split into chunks of about `chunkSize` bytes, each ending just
+after a newline (or at EOF), so no line is split. The chunks are handed to a
+pool of processes, and the results come back in the original order (so
+the output is the same as doing the chunks one after another).
+
+`countLines()` gives the number of newlines in each chunk, for callers
+(like `colorstring --all`) whose output for a line depends on how many
+lines came before it.
+
+The worker pool uses the "fork" start method, so workers inherit the
+caller's globals (compiled regexes, escape tables, etc.) and the worker
+function can be defined in a script. This means it won't work on Windows.
+
+`mapChunks()` can also just run tasks that are whole files (as for
+`uncolorize --jobs` with `--outputDir`), with `ordered=False` so that
+results (such as progress reports) come back as soon as each is done.
+
+Only regular files can be chunked this way; use `isChunkable()` to check
+(and just process other things, like pipes, serially).
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+defaultChunkSize = 1 << 22
+
+
+###############################################################################
+#
+def isChunkable(path:str) -> bool:
+    import stat
+    try:
+        return stat.S_ISREG(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+def findChunks(path:str, chunkSize:int=defaultChunkSize) -> list:
+    """Split a file into (start, end) byte ranges of about `chunkSize`,
+    each ending just after a newline (except maybe the last).
+    """
+    size = os.path.getsize(path)
+    chunks = []
+    start = 0
+    with open(path, "rb") as ifh:
+        while (start < size):
+            end = start + chunkSize
+            if (end >= size):
+                end = size
+            else:
+                ifh.seek(end - 1)
+                end += len(ifh.readline()) - 1  # Through the next newline
+            chunks.append( (start, end) )
+            start = end
+    return chunks
+
+def readChunk(path:str, start:int, end:int) -> bytes:
+    with open(path, "rb") as ifh:
+        ifh.seek(start)
+        return ifh.read(end - start)
+
+def countLines(path:str, chunks:list, blockSize:int=1<<20) -> list:
+    """Return the number of newlines in each of the `chunks` of a file.
+    """
+    counts = []
+    with open(path, "rb") as ifh:
+        for start, end in chunks:
+            ifh.seek(start)
+            n = 0
+            left = end - start
+            while (left > 0):
+                block = ifh.read(min(blockSize, left))
+                if (not block): break
+                n += block.count(b"\n")
+                left -= len(block)
+            counts.append(n)
+    return counts
+
+def mapChunks(worker, tasks, jobs:int=None, ordered:bool=True):
+    """Run `worker(task)` for each of `tasks` in a process pool, yielding the
+    results in the same order as `tasks` (or, if not `ordered`, as soon as
+    each is done). `worker` must be a module-level function.
+    With `jobs` <= 1, just run them here.
+    """
+    if (jobs is not None and jobs <= 1):
+        for task in tasks:
+            yield worker(task)
+        return
+    import multiprocessing
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(jobs) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        for result in mapper(worker, tasks):
+            yield result
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+#
+# sgrRemap.py: Keep, drop, or change particular SGR color codes in a stream.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import re
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "sgrRemap",
+    "description"  : "Keep, drop, or change particular SGR color codes in a stream.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from sgrRemap import SGRRemapper
+    rm = SGRRemapper("31=31, 1=1, *=")     # Keep red and bold, drop the rest
+    print(rm.rewrite(text))
+    rm = SGRRemapper("light")              # Fix colors for a light background
+
+Support for `uncolorize --remap`. A translation table, compiled from a
+list of rules, says what to do with each SGR code (or combination of codes)
+in the input: keep it, drop it, or change it to other codes.
+
+==Rules==
+
+Rules are separated by commas (or newlines), and each is `FROM=TO`:
+
+* ''FROM'' is one SGR code (like `31`, `1`, or `38;5;208`), a whole
+escape's codes (like `1;31`), a class of extended colors (`38;5;*`,
+`48;5;*`, `38;2;*`, or `48;2;*`, for xterm-256 or 24-bit foreground or
+background), or `*` for anything no other rule matches.
+
+* ''TO'' is the SGR codes to use instead (say, `91` or `38;5;130`);
+or nothing, to drop it; or `*` to keep it as is.
+
+Codes in an escape are done one at a time, and the results joined, so
+`ESC[1;33m` with the rule `33=38;5;136` becomes `ESC[1;38;5;136m`; and if
+nothing is left, the escape is removed entirely. A rule for a whole escape
+(such as `1;31=91`) is tried first, and only matches an escape with
+exactly those codes. Resets (`0`, `39`, and `49`, and the empty `ESC[m`)
+are kept even with `*=`, unless a rule says otherwise, so dropped colors
+never leave others turned on.
+
+`@path` reads the rules from a file (one per line; "#" starts a comment).
+A preset name can also be given (see `presets`); `light` makes the
+colors that are hard to read on a light background (yellow, white, and
+the bright colors) darker.
+
+==Speed==
+
+The rules are compiled into dicts once. Each distinct escape (by its
+params) is rewritten once and cached, so repeated escapes (almost all of
+them, in a log) cost one regex match and one dict lookup. The cache is
+bounded (`maxCache`), so memory doesn't grow with the input.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+sgrRegex = re.compile(r"\x1b\[([0-9;:]*)m")
+sgrRegexBytes = re.compile(rb"\x1b\[([0-9;:]*)m")
+
+resetCodes = ( "0", "39", "49" )
+colorClasses = { "38;5": "38;5;*", "48;5": "48;5;*", "38;2": "38;2;*", "48;2": "48;2;*" }
+
+presets = {
+    "light": ("33=38;5;136, 93=38;5;136, 37=90, 97=30, 92=32, 96=36, "
+        "95=35, 43=48;5;186, 47=48;5;252, 107=48;5;252"),
+}
+
+maxCache = 100000
+
+
+###############################################################################
+#
+def splitCodes(params:str) -> list:
+    """Split SGR params into codes, keeping each extended color
+    (`38;5;n`, `38;2;r;g;b`, and the same for 48 and 58) together as one.
+    ITU forms with colons (like `38:2::r:g:b`) are changed to the ";" forms.
+    Numbers are normalized ("01" -> "1"), and an empty escape is "0".
+    """
+    if (not params): return [ "0" ]
+    ps = []
+    for sub in params.split(";"):
+        if (":" in sub):
+            fields = sub.split(":")
+            if (fields[0] in ("38", "48", "58") and fields[1:2] == [ "2" ]):
+                fields = fields[0:2] + fields[-3:]
+            ps.extend(fields)
+        else:
+            ps.append(sub)
+    ps = [ str(int(p)) if p else "0" for p in ps ]
+    codes = []
+    i = 0
+    n = len(ps)
+    while (i < n):
+        p = ps[i]
+        if (p in ("38", "48", "58") and i + 1 < n):
+            width = 3 if (ps[i+1] == "5") else 5 if (ps[i+1] == "2") else 2
+            codes.append(";".join(ps[i:i+width]))
+            i += width
+        else:
+            codes.append(p)
+            i += 1
+    return codes
+
+def parseRules(spec:str) -> list:
+    """Turn rules text (see above), "@path", or a preset name, into a list
+    of (FROM, TO) strings.
+    @raise ValueError for a rule without "=".
+    """
+    spec = spec.strip()
+    if (spec in presets):
+        spec = presets[spec]
+    elif (spec.startswith("@")):
+        with open(spec[1:], encoding="utf-8") as ifh:
+            spec = "\n".join(rec.split("#")[0] for rec in ifh)
+    rules = []
+    for rule in re.split(r"[,\n]", spec):
+        rule = rule.strip()
+        if (not rule): continue
+        if ("=" not in rule):
+            raise ValueError("Remap rule '%s' has no '='." % (rule))
+        frm, to = rule.split("=", 1)
+        rules.append( (frm.strip(), to.strip()) )
+    return rules
+
+
+###############################################################################
+#
+class SGRRemapper:
+    """Rewrite SGR escapes by a compiled table (see above).
+    """
+    def __init__(self, rules):
+        """`rules` is rules text (see `parseRules()`) or a list of (FROM, TO).
+        """
+        if (isinstance(rules, str)): rules = parseRules(rules)
+        self.codeMap = {}     # code or color class -> new codes (None to keep)
+        self.setMap = {}      # tuple of codes -> new codes (None to keep)
+        self.default = None   # new codes for anything else (None to keep)
+        self.cache = {}       # params -> whole new escape ("" to drop)
+        self.cacheBytes = {}
+        for frm, to in rules:
+            new = None if (to == "*") else tuple(splitCodes(to)) if to else ()
+            if (frm == "*"):
+                if (new not in (None, ())):
+                    raise ValueError("'*' can only be mapped to '*' or nothing.")
+                self.default = new
+            elif (frm in colorClasses.values()):
+                self.codeMap[frm] = new
+            else:
+                codes = splitCodes(frm)
+                if (len(codes) == 1): self.codeMap[codes[0]] = new
+                else: self.setMap[tuple(codes)] = new
+
+    def mapCode(self, code:str) -> tuple:
+        if (code in self.codeMap):
+            new = self.codeMap[code]
+        else:
+            new = self.codeMap.get(colorClasses.get(code[0:4], ""), self.default)
+            if (new == () and code in resetCodes): new = None
+        return (code,) if new is None else new
+
+    def rewriteParams(self, params:str) -> str:
+        """Return the whole escape to use in place of ESC [ `params` m
+        ("" to drop it).
+        """
+        codes = tuple(splitCodes(params))
+        if (codes in self.setMap):
+            new = self.setMap[codes]
+            if (new is None): new = codes
+        else:
+            new = []
+            for code in codes:
+                new.extend(self.mapCode(code))
+        return "\x1b[" + ";".join(new) + "m" if new else ""
+
+    def rewrite(self, s:str) -> str:
+        if ("\x1b" not in s): return s
+        cache = self.cache
+        if (len(cache) > maxCache): cache.clear()
+        def repl(mat):
+            out = cache.get(mat.group(1))
+            if (out is None):
+                out = cache[mat.group(1)] = self.rewriteParams(mat.group(1))
+            return out
+        return sgrRegex.sub(repl, s)
+
+    def rewriteBytes(self, s:bytes) -> bytes:
+        if (b"\x1b" not in s): return s
+        cache = self.cacheBytes
+        if (len(cache) > maxCache): cache.clear()
+        def repl(mat):
+            out = cache.get(mat.group(1))
+            if (out is None):
+                out = cache[mat.group(1)] = self.rewriteParams(
+                    mat.group(1).decode("ascii")).encode("ascii")
+            return out
+        return sgrRegexBytes.sub(repl, s)
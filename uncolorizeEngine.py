@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+#
+# uncolorizeEngine.py: Fast block-at-a-time removal of color escapes.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import os
+import re
+import stat
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "uncolorizeEngine",
+    "description"  : "Fast block-at-a-time removal of color escapes.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from uncolorizeEngine import BlockUncolorizer, uncolorizeStream
+    uncolorizeStream(sys.stdin.buffer, sys.stdout.buffer, unman=True)
+
+The fast path for `uncolorize`: works on raw bytes, a large block at a
+time, rather than decoding, cleaning, and printing each line. One compiled
+regex removes both SGR escapes (ESC [ params m) and, with `unman`,
+`man`-style overstrikes (any character followed by a backspace, which is
+how `man` does bold, "X\\bX", and underline, "_\\bX").
+
+Since blocks are cut at arbitrary places, an escape (or a character and the
+backspace after it) can be split between two blocks. `BlockUncolorizer.feed()`
+holds back any incomplete escape at the end of a block (and, with
+`unman`, the last character, in case the next block starts with a
+backspace), and puts it in front of the next block.
+
+Bytes work for any ASCII-compatible encoding, such as UTF-8 or Latin-1
+(see `isAsciiCompatible()`). For UTF-8, a character before a backspace is
+removed whole, even if it's several bytes. Other encodings (such as UTF-16)
+need the line-by-line path in `uncolorize`.
+
+Output is exactly the input minus what was removed (line ends are
+untouched), and is written with one `write()` per block.
+
+The same machinery can rewrite escapes instead of removing them: given a
+`rewrite` function (such as `SGRRemapper.rewriteBytes` from `sgrRemap.py`),
+each piece of stripped data is passed through it rather than having its
+SGR escapes removed. (`uncolorizeInPlace()` can't do this, since
+rewritten escapes can be longer.)
+
+==Big files==
+
+`uncolorizeMapped()` memory-maps a regular file instead of reading it.
+Blocks with nothing to remove are written straight from the map (via a
+`memoryview`, so they're never copied into Python objects at all); only
+blocks that have escapes are copied, to be stripped. For anything that
+isn't a regular file (pipes, devices, `/dev/stdin`), or can't be mapped,
+it just reads the file (`uncolorizeFile()`).
+
+`uncolorizeInPlace()` strips a regular file into itself. Since stripping
+only removes bytes, the stripped data never catches up with the data not
+yet read, so one forward pass can write each stripped block at a write
+cursor behind the read cursor, and the file is truncated to the new length
+at the end. This takes no extra disk space (unlike writing a temporary copy
+and renaming it), but the file is not consistent while it runs: if it's
+interrupted, the start of the file is stripped and the rest is whatever
+was there, and the end is not yet truncated. Don't use it on a file that
+something is still writing.
+
+==Following a growing file==
+
+`followFile()` works like `tail -F`: it strips the file so far, then keeps
+polling for more, and strips and writes (and flushes) each new piece as
+it comes. It's the same `BlockUncolorizer`, so an escape split between two
+writes to the log (say "ESC[3" and then "1m") is still removed: the partial
+escape is just held until the rest arrives. A complete line (ending in a
+newline) is never held back, so the output keeps up with the log line by
+line. If the file is replaced (as by log rotation) or truncated, it
+finishes the old file and starts on the new one from the beginning; if
+it's missing for a while, it waits for it to come back.
+
+Files (or pipes) compressed with gzip, bzip2, or xz are recognized by
+their first bytes and decompressed as they're read (see `compressedIO.py`),
+rather than mapped; they can't be stripped in place.
+
+`uncolorizeToPath()` writes the stripped copy of a file to another path,
+via a temporary file in the same directory that's renamed into place
+when done, so there's never a partial output file.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+defaultBlockSize = 1 << 20
+
+sgrExpr = rb"\x1b\[[0-9;:]*m"
+# A character (not a newline; UTF-8 sequences taken whole) and a backspace.
+overstrikeExpr = rb"(?:[\x00-\x09\x0b-\x7f\xc0-\xff][\x80-\xbf]*)\x08"
+
+# An escape that hasn't ended yet, at the very end of a block.
+partialEscapeRegex = re.compile(rb"\x1b(?:\[[0-9;:]*)?\Z")
+maxEscapeLen = 256
+
+
+###############################################################################
+#
+def isAsciiCompatible(encoding:str) -> bool:
+    """Whether `encoding` writes ASCII (newline, ESC, backspace, digits,
+    etc.) as the same single bytes, so the byte-level path can be used.
+    """
+    import codecs
+    try:
+        codecs.lookup(encoding)
+        return "\x1b[0;1m\x08_\n".encode(encoding) == b"\x1b[0;1m\x08_\n"
+    except (LookupError, UnicodeError):
+        return False
+
+
+###############################################################################
+#
+class BlockUncolorizer:
+    """Strip SGR escapes (and, with `unman`, overstrikes) from bytes, in
+    blocks that can split escapes anywhere. If `rewrite` is given, it's
+    called on pieces of data (that don't split escapes) instead of removing
+    the SGR escapes, and returns them rewritten (see `sgrRemap.py`).
+    """
+    def __init__(self, unman:bool=False, rewrite=None):
+        self.unman = unman
+        self.rewrite = rewrite
+        self.sgrRegex = re.compile(sgrExpr)
+        self.fusedRegex = re.compile(sgrExpr + b"|" + overstrikeExpr)
+        self.carry = b""
+
+    def strip(self, data:bytes) -> bytes:
+        """Strip a complete piece of data (nothing is held back).
+        The fused regex tries a match at every byte, so it's only used on
+        lines that have a backspace; the rest just get the SGR regex, which
+        the regex engine can skip through quickly to each ESC.
+        """
+        if (self.unman and b"\x08" in data):
+            buf = []
+            pos = 0
+            while (True):
+                bs = data.find(b"\x08", pos)
+                if (bs < 0): break
+                start = data.rfind(b"\n", pos, bs) + 1 or pos
+                end = data.find(b"\n", bs)
+                if (end < 0): end = len(data)
+                if (start > pos): buf.append(self.stripSGR(data[pos:start]))
+                if (self.rewrite is None):
+                    buf.append(self.fusedRegex.sub(b"", data[start:end]))
+                else:
+                    buf.append(self.fusedRegex.sub(lambda mat: self.rewrite(mat.group())
+                        if (mat.group()[0] == 0x1B) else b"", data[start:end]))
+                pos = end
+            buf.append(self.stripSGR(data[pos:]))
+            return b"".join(buf)
+        return self.stripSGR(data)
+
+    def stripSGR(self, data:bytes) -> bytes:
+        if (b"\x1b" not in data): return data
+        if (self.rewrite is not None): return self.rewrite(data)
+        return self.sgrRegex.sub(b"", data)
+
+    def holdBack(self, data:bytes) -> int:
+        """Return the offset in `data` from which to hold back to the next
+        block: the start of an incomplete final escape, and with `unman`,
+        at least the last character (and any match that includes it).
+        """
+        cut = len(data)
+        esc = data.rfind(b"\x1b", max(0, cut - maxEscapeLen))
+        if (esc >= 0 and partialEscapeRegex.match(data, esc)):
+            cut = esc
+        if (self.unman and cut > 0 and data[cut-1] != 0x0A):  # "\n" can't pair
+            i = cut - 1
+            while (i > 0 and 0x80 <= data[i] < 0xC0 and cut - i < 4):
+                i -= 1
+            cut = i
+            # No match spans a newline, so scanning can start after the
+            # last one and still see the same matches as a scan of the block.
+            start = data.rfind(b"\n", 0, cut) + 1
+            for mat in self.fusedRegex.finditer(data, start, len(data)):
+                if (mat.start() >= cut): break
+                if (mat.end() > cut):
+                    cut = mat.start()
+                    break
+        return cut
+
+    def canCopy(self, data, start:int, end:int) -> bool:
+        """Whether data[start:end] can be passed through as is: nothing
+        is held back, and it has nothing to remove (including, with `unman`,
+        a backspace just after it, which could remove its last character).
+        `data` can be bytes or an mmap.
+        """
+        if (self.carry): return False
+        if (data.find(b"\x1b", start, end) >= 0): return False
+        if (self.unman and data.find(b"\x08", start, end + 4) >= 0): return False
+        return True
+
+    def feed(self, block:bytes) -> bytes:
+        """Strip the next block of a stream; part of it may be held back
+        until the next call (or `finish()`).
+        """
+        if (self.carry):
+            block = self.carry + block
+        cut = self.holdBack(block)
+        self.carry = block[cut:]
+        return self.strip(block[0:cut])
+
+    def finish(self) -> bytes:
+        data = self.carry
+        self.carry = b""
+        return self.strip(data)
+
+
+###############################################################################
+#
+def uncolorizeStream(ifh, ofh, unman:bool=False, blockSize:int=defaultBlockSize,
+    rewrite=None) -> tuple:
+    """Copy binary file `ifh` to binary file `ofh`, stripping escapes.
+    @return (bytes read, bytes written).
+    """
+    bu = BlockUncolorizer(unman=unman, rewrite=rewrite)
+    nIn = nOut = 0
+    read = getattr(ifh, "read1", ifh.read)
+    try:
+        while (True):
+            block = read(blockSize)
+            if (not block): break
+            nIn += len(block)
+            out = bu.feed(block)
+            if (out):
+                ofh.write(out)
+                nOut += len(out)
+    finally:  # Even if reading fails (say, a truncated .gz), write what we got.
+        out = bu.finish()
+        ofh.write(out)
+        nOut += len(out)
+        ofh.flush()
+    return nIn, nOut
+
+def uncolorizeFile(path:str, ofh, unman:bool=False, blockSize:int=defaultBlockSize) -> tuple:
+    with open(path, "rb", buffering=0) as ifh:
+        return uncolorizeStream(ifh, ofh, unman=unman, blockSize=blockSize)
+
+def mapFile(fh, writable:bool=False):
+    """Memory-map open file `fh`, or return None if it's empty, not a
+    regular file, or can't be mapped.
+    """
+    import mmap
+    try:
+        st = os.fstat(fh.fileno())
+        if (not stat.S_ISREG(st.st_mode) or st.st_size == 0): return None
+        return mmap.mmap(fh.fileno(), 0,
+            access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        lg.info("Can't map '%s': %s", getattr(fh, "name", "?"), e)
+        return None
+
+def uncolorizeMapped(path:str, ofh, unman:bool=False,
+    blockSize:int=defaultBlockSize, rewrite=None) -> tuple:
+    """Like `uncolorizeFile()`, but memory-map the file if possible, and
+    write blocks that need no change straight from the map.
+    @return (bytes read, bytes written).
+    """
+    import compressedIO as ci
+    with open(path, "rb", buffering=0) as ifh:
+        mm = mapFile(ifh)
+        if (mm is None):
+            return uncolorizeStream(ci.openBinary(ifh, bufferSize=blockSize), ofh,
+                unman=unman, blockSize=blockSize, rewrite=rewrite)
+    if (ci.sniff(mm[0:ci.magicLen])):
+        mm.close()
+        with ci.openBinary(path, bufferSize=blockSize) as ifh:
+            return uncolorizeStream(ifh, ofh, unman=unman, blockSize=blockSize,
+                rewrite=rewrite)
+    bu = BlockUncolorizer(unman=unman, rewrite=rewrite)
+    size = len(mm)
+    nOut = 0
+    try:
+        with memoryview(mm) as mv:
+            for start in range(0, size, blockSize):
+                end = min(size, start + blockSize)
+                if (bu.canCopy(mm, start, end)):
+                    ofh.write(mv[start:end])
+                    nOut += end - start
+                    continue
+                out = bu.feed(mm[start:end])
+                ofh.write(out)
+                nOut += len(out)
+        out = bu.finish()
+        ofh.write(out)
+        nOut += len(out)
+        ofh.flush()
+    finally:
+        mm.close()
+    return size, nOut
+
+def uncolorizeInPlace(path:str, unman:bool=False, blockSize:int=defaultBlockSize) -> tuple:
+    """Strip a regular file into itself, in one forward pass, and truncate it.
+    @return (old size, new size).
+    @raise ValueError if `path` isn't a regular file (or can't be mapped),
+    or is compressed.
+    """
+    from compressedIO import compressionOf
+    if (compressionOf(path)):
+        raise ValueError("Can't rewrite compressed file '%s' in place." % (path))
+    with open(path, "r+b", buffering=0) as fh:
+        st = os.fstat(fh.fileno())
+        if (stat.S_ISREG(st.st_mode) and st.st_size == 0): return 0, 0
+        mm = mapFile(fh, writable=True)
+        if (mm is None):
+            raise ValueError("Can't rewrite '%s' in place (not a regular file?)." % (path))
+        bu = BlockUncolorizer(unman=unman)
+        size = len(mm)
+        w = 0  # Everything before w is done. w never passes the read position.
+        try:
+            for start in range(0, size, blockSize):
+                end = min(size, start + blockSize)
+                if (bu.canCopy(mm, start, end)):
+                    if (w != start): mm.move(w, start, end - start)
+                    w += end - start
+                    continue
+                out = bu.feed(mm[start:end])
+                mm[w:w+len(out)] = out
+                w += len(out)
+            out = bu.finish()
+            mm[w:w+len(out)] = out
+            w += len(out)
+            mm.flush()
+        finally:
+            mm.close()
+        fh.truncate(w)
+    return size, w
+
+def uncolorizeToPath(path:str, outPath:str, unman:bool=False,
+    blockSize:int=defaultBlockSize, compress:str=None, rewrite=None) -> tuple:
+    """Write a stripped copy of `path` to `outPath`, atomically; compressed
+    if `compress` is "gz", "bz2", or "xz".
+    @return (bytes read, bytes written). If compressed, the latter is the
+    size of the compressed file.
+    """
+    from compressedIO import openOutput
+    tmpPath = "%s.%d.tmp" % (outPath, os.getpid())
+    try:
+        with openOutput(tmpPath, compress) as ofh:
+            result = uncolorizeMapped(path, ofh, unman=unman, blockSize=blockSize,
+                rewrite=rewrite)
+        if (compress): result = (result[0], os.path.getsize(tmpPath))
+        os.replace(tmpPath, outPath)
+    except BaseException:
+        if (os.path.exists(tmpPath)): os.remove(tmpPath)
+        raise
+    return result
+
+def followFile(path:str, ofh, unman:bool=False, interval:float=0.5,
+    blockSize:int=defaultBlockSize, maxPolls:int=None, rewrite=None) -> int:
+    """Strip `path` to binary file `ofh`, then keep following it as it
+    grows (through rotation and truncation), until interrupted or
+    `maxPolls` polls with no new data (None: forever).
+    @return Total bytes read.
+    """
+    import time
+    bu = BlockUncolorizer(unman=unman, rewrite=rewrite)
+    nIn = 0
+    ifh = None
+    idlePolls = 0
+    try:
+        while (True):
+            if (ifh is None):
+                try:
+                    ifh = open(path, "rb", buffering=0)
+                except FileNotFoundError:
+                    ifh = None
+            gotAny = False
+            while (ifh is not None):
+                block = ifh.read(blockSize)
+                if (not block): break
+                gotAny = True
+                nIn += len(block)
+                ofh.write(bu.feed(block))
+            if (gotAny):
+                ofh.flush()
+                idlePolls = 0
+                continue
+            # Nothing new: has the file been replaced, truncated, or removed?
+            if (ifh is not None):
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    st = None
+                fst = os.fstat(ifh.fileno())
+                if (st is None or (st.st_ino, st.st_dev) != (fst.st_ino, fst.st_dev)):
+                    lg.info("'%s' was replaced; reopening.", path)
+                    ofh.write(bu.finish())
+                    ofh.flush()
+                    ifh.close()
+                    ifh = None
+                    continue
+                if (st.st_size < ifh.tell()):
+                    lg.info("'%s' was truncated; starting over.", path)
+                    ofh.write(bu.finish())
+                    ofh.flush()
+                    ifh.seek(0)
+                    continue
+            idlePolls += 1
+            if (maxPolls is not None and idlePolls >= maxPolls): break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if (ifh is not None): ifh.close()
+    ofh.write(bu.finish())
+    ofh.flush()
+    return nIn
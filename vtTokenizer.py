@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+#
+# vtTokenizer.py: Split text into plain text and VT/ANSI terminal escapes.
+# 2026-10-17: Written by Steven J. DeRose.
+#
+import re
+import logging
+
+lg = logging.getLogger()
+
+__metadata__ = {
+    "title"        : "vtTokenizer",
+    "description"  : "Split text into plain text and VT/ANSI terminal escapes.",
+    "rightsHolder" : "Steven J. DeRose",
+    "creator"      : "http://viaf.org/viaf/50334488",
+    "type"         : "http://purl.org/dc/dcmitype/Software",
+    "language"     : "Python 3.7",
+    "created"      : "2026-10-17",
+    "modified"     : "2026-10-17",
+    "publisher"    : "http://github.com/sderose",
+    "license"      : "https://creativecommons.org/licenses/by-sa/3.0/"
+}
+__version__ = __metadata__['modified']
+
+descr = """
+=Usage=
+
+    from vtTokenizer import VTTokenizer, stripEscapes
+    for kind, params, text in VTTokenizer().tokenize(s):
+        ...
+    clean = stripEscapes(s)                          # All escapes
+    clean = stripEscapes(s, drop=[ "sgr", "osc" ])   # Just these kinds
+
+Support for `uncolorize --drop` and `colorstring --strip`. Color escapes
+are only one kind of terminal escape; saved console sessions also have
+window titles and hyperlinks (OSC), cursor movement and erasing (other
+CSI), DCS strings, character set switches, and so on. This finds them all,
+in one pass, with a state machine modelled on Paul Williams' parser for
+the DEC VT500 series
+([https://vt100.net/emu/dec_ansi_parser]): a table gives the action and next
+state for each state and character, so any sequence ends (or is abandoned)
+exactly as a real terminal would end it.
+
+Each token is a tuple (kind, params, text). `text` is exactly the input it
+covers, so joining the `text` of all the tokens gives back the input. The
+kinds are:
+
+* ''text'' -- ordinary characters, including tab, newline, and return.
+* ''c0'' -- any other control character (backspace, bell, etc.), alone.
+* ''sgr'' -- a color or effect escape: CSI params "m" (`ESC[1;31m`).
+`params` is "1;31".
+* ''csi'' -- any other CSI sequence (cursor movement, erasing, modes, ...).
+`params` is what's between the "[" and the final character, including
+any private marker or intermediates: "2" for `ESC[2J`, "?25" for `ESC[?25h`.
+* ''osc'' -- an operating system command, such as a window title
+(`ESC]0;title BEL`) or a hyperlink (`ESC]8;;URL ESC\\`).
+`params` is the string between "]" and the terminator (BEL or ST).
+* ''dcs'' -- a device control string (`ESC P ... ESC\\`); `params` is the string.
+* ''string'' -- an SOS, PM, or APC string (`ESC X`, `ESC ^`, `ESC _`).
+* ''charset'' -- a character set switch (`ESC ( B`, `ESC ) 0`, ...).
+`params` is what follows the ESC.
+* ''esc'' -- any other escape sequence (`ESC 7`, `ESC =`, `ESC c`, ...).
+* ''invalid'' -- a sequence that was cut off (by CAN, SUB, another ESC, an
+unexpected character, or the end of the input), or that a terminal would
+ignore as malformed.
+
+A terminal acts on control characters in the middle of an escape
+sequence without ending the sequence; here they're just kept as part of
+it (except CAN, SUB, and ESC, which cut it off), so that the tokens stay
+in the same order as the input.
+
+`VTTokenizer` is resumable: `tokenize()` can be called on successive
+pieces of a stream, and a sequence split between them comes out whole
+(call `finish()` at the end, to get any incomplete sequence left over).
+
+With `c1=True`, the 8-bit C1 controls (U+0080 to U+009F: CSI, OSC, DCS,
+ST, etc.) are recognized too. That's off by default, since it's rare, and
+since for bytes (see `stripEscapes()`) those are UTF-8 continuation bytes.
+
+Runs of plain text, and the most common complete CSI and OSC sequences,
+are found with a regex rather than a character at a time (giving the same
+tokens the table would, except that text comes in runs rather than a
+character at a time); everything else goes through the table. The
+''tokenizer'' benchmark in `colorBenchmarks.py` checks that on random input,
+with `shortcuts=False` to get the table alone.
+
+=History=
+
+* 2026-10-17: Written by Steven J. DeRose.
+
+=Rights=
+
+Copyright 2026-10-17 by Steven J. DeRose. This work is licensed under a
+Creative Commons Attribution-Share-alike 3.0 unported license.
+For further information on this license, see
+[https://creativecommons.org/licenses/by-sa/3.0].
+
+For the most recent version, see [http://www.derose.net/steve/utilities]
+or [https://github.com/sderose].
+"""
+
+escapeKinds = ( "sgr", "csi", "osc", "dcs", "string", "charset", "esc", "invalid" )
+allKinds = ( "text", "c0" ) + escapeKinds
+
+# Parser states (as in the VT500 parser; STR_ESC is an ESC seen in a string,
+# which may be the start of ST, "ESC \").
+(GROUND, ESCAPE, ESC_INTER, CSI_ENTRY, CSI_PARAM, CSI_INTER, CSI_IGNORE,
+    DCS_ENTRY, DCS_PARAM, DCS_INTER, DCS_PASS, DCS_IGNORE, OSC_STRING,
+    SOS_STRING, STR_ESC) = range(15)
+stringStates = ( DCS_PASS, DCS_IGNORE, OSC_STRING, SOS_STRING )
+
+# Actions.
+(PRINT, EXECUTE, COLLECT, START, DISPATCH, ABORT, REPROCESS,
+    STR_START, STR_END, STR_BREAK) = range(10)
+
+# Table columns: code points 0-0x9F, and one for everything above.
+OTHER = 0xA0
+
+_tables = {}
+
+
+###############################################################################
+#
+def buildTable(c1:bool=False) -> list:
+    """Make the transition table: table[state][column] = (action, next state),
+    where column is the code point (or OTHER for anything from U+00A0 up,
+    or from U+0080 up unless `c1`).
+    """
+    C0 = [ c for c in range(0x20) if c not in (0x18, 0x1A, 0x1B) ]
+    INTER = range(0x20, 0x30)
+    PARAM = range(0x30, 0x3C)
+    PRIVATE = range(0x3C, 0x40)
+    FINAL = range(0x40, 0x7F)
+
+    table = [ [ None ] * (OTHER + 1) for _ in range(15) ]
+    def fill(state, codes, action, nxt=None):
+        for c in codes:
+            table[state][c] = (action, state if nxt is None else nxt)
+
+    for st in range(15):
+        fill(st, range(OTHER + 1), COLLECT)
+
+    fill(GROUND, range(OTHER + 1), PRINT)
+    fill(GROUND, C0, EXECUTE)
+    fill(GROUND, [ 0x09, 0x0A, 0x0D ], PRINT)
+    fill(GROUND, [ 0x7F ], EXECUTE)
+
+    fill(ESCAPE, INTER, COLLECT, ESC_INTER)
+    fill(ESCAPE, range(0x30, 0x7F), DISPATCH, GROUND)
+    fill(ESCAPE, [ 0x5B ], COLLECT, CSI_ENTRY)
+    fill(ESCAPE, [ 0x5D ], COLLECT, OSC_STRING)
+    fill(ESCAPE, [ 0x50 ], COLLECT, DCS_ENTRY)
+    fill(ESCAPE, [ 0x58, 0x5E, 0x5F ], COLLECT, SOS_STRING)
+    fill(ESCAPE, [ OTHER ], REPROCESS, GROUND)
+
+    fill(ESC_INTER, range(0x30, 0x7F), DISPATCH, GROUND)
+    fill(ESC_INTER, [ OTHER ], REPROCESS, GROUND)
+
+    for st in (CSI_ENTRY, CSI_PARAM, CSI_INTER, CSI_IGNORE):
+        fill(st, FINAL, DISPATCH, GROUND)
+        fill(st, [ OTHER ], REPROCESS, GROUND)
+    fill(CSI_ENTRY, INTER, COLLECT, CSI_INTER)
+    fill(CSI_ENTRY, PARAM, COLLECT, CSI_PARAM)
+    fill(CSI_ENTRY, PRIVATE, COLLECT, CSI_PARAM)
+    fill(CSI_PARAM, INTER, COLLECT, CSI_INTER)
+    fill(CSI_PARAM, PRIVATE, COLLECT, CSI_IGNORE)
+    fill(CSI_INTER, range(0x30, 0x40), COLLECT, CSI_IGNORE)
+
+    fill(DCS_ENTRY, INTER, COLLECT, DCS_INTER)
+    fill(DCS_ENTRY, PARAM, COLLECT, DCS_PARAM)
+    fill(DCS_ENTRY, PRIVATE, COLLECT, DCS_PARAM)
+    fill(DCS_PARAM, INTER, COLLECT, DCS_INTER)
+    fill(DCS_PARAM, PRIVATE, COLLECT, DCS_IGNORE)
+    fill(DCS_INTER, range(0x30, 0x40), COLLECT, DCS_IGNORE)
+    for st in (DCS_ENTRY, DCS_PARAM, DCS_INTER):
+        fill(st, FINAL, COLLECT, DCS_PASS)
+        fill(st, [ OTHER ], COLLECT, DCS_IGNORE)
+
+    fill(OSC_STRING, [ 0x07 ], STR_END, GROUND)  # xterm allows BEL for ST
+
+    fill(STR_ESC, range(OTHER + 1), STR_BREAK, ESCAPE)
+    fill(STR_ESC, [ 0x5C ], STR_END, GROUND)
+
+    # "Anywhere" transitions.
+    for st in range(15):
+        fill(st, [ 0x18, 0x1A ], ABORT, GROUND)
+        if (st == STR_ESC): continue
+        if (st in stringStates): fill(st, [ 0x1B ], COLLECT, STR_ESC)
+        else: fill(st, [ 0x1B ], START, ESCAPE)
+        if (not c1): continue
+        if (st in stringStates): fill(st, [ 0x9C ], STR_END, GROUND)
+        elif (st == GROUND): fill(st, range(0x80, 0xA0), EXECUTE)
+        fill(st, [ 0x9B ], STR_START if st in stringStates else START, CSI_ENTRY)
+        fill(st, [ 0x9D ], STR_START if st in stringStates else START, OSC_STRING)
+        fill(st, [ 0x90 ], STR_START if st in stringStates else START, DCS_ENTRY)
+        fill(st, [ 0x98, 0x9E, 0x9F ],
+            STR_START if st in stringStates else START, SOS_STRING)
+    if (not c1):
+        for st in range(15):
+            for c in range(0x80, 0xA0):
+                table[st][c] = table[st][OTHER]
+    return table
+
+def getTable(c1:bool=False) -> list:
+    if (c1 not in _tables): _tables[c1] = buildTable(c1)
+    return _tables[c1]
+
+
+###############################################################################
+#
+class VTTokenizer:
+    """Split text into (kind, params, text) tokens; see the module doc.
+    """
+    def __init__(self, c1:bool=False, shortcuts:bool=True):
+        self.c1 = c1
+        self.shortcuts = shortcuts  # Use the regexes (False is just for testing)
+        self.table = getTable(c1)
+        self.limit = 0xA0 if c1 else 0x80
+        c1Chars = "\x80-\x9f" if c1 else ""
+        self.textRegex = re.compile(r"[^\x00-\x08\x0b\x0c\x0e-\x1f\x7f%s]+" % (c1Chars))
+        self.csiRegex = re.compile(r"\x1b\[([\x3c-\x3f]?[\x30-\x3b]*)([\x20-\x2f]*)[\x40-\x7e]")
+        self.oscRegex = re.compile(r"\x1b\]([^\x07\x18\x1a\x1b%s]*)(?:\x07|\x1b\\)" % (
+            c1Chars))
+        self.stringRuns = {
+            OSC_STRING: re.compile(r"[^\x07\x18\x1a\x1b%s]+" % (c1Chars)),
+            DCS_PASS:   re.compile(r"[^\x18\x1a\x1b%s]+" % (c1Chars)),
+        }
+        self.stringRuns[DCS_IGNORE] = self.stringRuns[SOS_STRING] = self.stringRuns[DCS_PASS]
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = GROUND
+        self.seq = []           # Pieces of the sequence so far
+        self.strState = None    # For STR_ESC: what kind of string it's in
+
+    def classify(self, state:int, text:str) -> tuple:
+        """(kind, params) for a sequence that ended normally, from `state`.
+        """
+        intro = 1 if (text[0] != "\x1b") else 2
+        if (state in (ESCAPE, ESC_INTER)):
+            kind = "charset" if (text[1] in "()*+-./") else "esc"
+            return kind, text[1:]
+        if (state in (CSI_ENTRY, CSI_PARAM, CSI_INTER)):
+            params = text[intro:-1]
+            if (text[-1] == "m" and state != CSI_INTER and
+                (not params or params[0] not in "<=>?")):
+                return "sgr", params
+            return "csi", params
+        if (state == CSI_IGNORE): return "invalid", text[intro:-1]
+        if (text.endswith("\x1b\\")): params = text[intro:-2]
+        else: params = text[intro:-1]
+        if (state == OSC_STRING): return "osc", params
+        if (state == DCS_PASS): return "dcs", params
+        if (state == SOS_STRING): return "string", params
+        return "invalid", params
+
+    def tokenize(self, s:str):
+        """Generate the tokens for the next piece of input. A sequence not
+        finished by the end of `s` is held until the next call (or `finish()`).
+        """
+        table = self.table
+        limit = self.limit
+        textMatch = self.textRegex.match
+        csiMatch = self.csiRegex.match
+        oscMatch = self.oscRegex.match
+        shortcuts = self.shortcuts
+        i = 0
+        n = len(s)
+        while (i < n):
+            state = self.state
+            if (not shortcuts):
+                pass
+            elif (state == GROUND):
+                mat = textMatch(s, i)
+                if (mat):
+                    yield ("text", "", mat.group())
+                    i = mat.end()
+                    continue
+                if (s[i] == "\x1b"):
+                    mat = csiMatch(s, i) or oscMatch(s, i)
+                    if (mat):
+                        text = mat.group()
+                        if (text[1] == "["):
+                            final = text[-1]
+                            if (final == "m" and not mat.group(2) and
+                                (not mat.group(1) or mat.group(1)[0] not in "<=>?")):
+                                yield ("sgr", mat.group(1), text)
+                            else:
+                                yield ("csi", text[2:-1], text)
+                        else:
+                            yield ("osc", mat.group(1), text)
+                        i = mat.end()
+                        continue
+            elif (state in self.stringRuns):
+                mat = self.stringRuns[state].match(s, i)
+                if (mat):
+                    self.seq.append(mat.group())
+                    i = mat.end()
+                    continue
+
+            c = s[i]
+            code = ord(c)
+            action, nxt = table[state][code if code < limit else OTHER]
+            if (action == COLLECT):
+                self.seq.append(c)
+            elif (action == PRINT):
+                yield ("text", "", c)
+            elif (action == EXECUTE):
+                yield ("c0", "", c)
+            elif (action == DISPATCH):
+                self.seq.append(c)
+                text = "".join(self.seq)
+                kind, params = self.classify(state, text)
+                yield (kind, params, text)
+                self.seq = []
+            elif (action == START or action == STR_START):
+                if (self.seq): yield ("invalid", "", "".join(self.seq))
+                self.seq = [ c ]
+            elif (action == ABORT):
+                if (self.seq): yield ("invalid", "", "".join(self.seq))
+                self.seq = []
+                yield ("c0", "", c)
+            elif (action == REPROCESS):
+                if (self.seq): yield ("invalid", "", "".join(self.seq))
+                self.seq = []
+                self.state = nxt
+                continue  # Same character, from GROUND
+            elif (action == STR_END):
+                self.seq.append(c)
+                text = "".join(self.seq)
+                kind, params = self.classify(
+                    self.strState if state == STR_ESC else state, text)
+                yield (kind, params, text)
+                self.seq = []
+            elif (action == STR_BREAK):
+                # The ESC ended the string (without a proper ST), and
+                # starts a new sequence, whose next character is `c`.
+                yield ("invalid", "", "".join(self.seq[:-1]))
+                self.seq = [ "\x1b" ]
+                self.state = nxt
+                continue
+            if (nxt == STR_ESC): self.strState = state
+            self.state = nxt
+            i += 1
+
+    def finish(self) -> list:
+        """Return any incomplete sequence left at the end, as an "invalid"
+        token (in a list, or an empty list), and reset.
+        """
+        tokens = []
+        if (self.seq): tokens.append( ("invalid", "", "".join(self.seq)) )
+        self.reset()
+        return tokens
+
+
+###############################################################################
+#
+def tokenize(s:str, c1:bool=False):
+    """Tokenize a complete string.
+    """
+    tk = VTTokenizer(c1=c1)
+    yield from tk.tokenize(s)
+    yield from tk.finish()
+
+def stripEscapes(s, drop=escapeKinds, c1:bool=False):
+    """Remove the tokens of the kinds in `drop` (by default, all escape
+    sequences) from a complete string. `s` can also be bytes in any
+    ASCII-compatible encoding (they're treated as Latin-1, which works since
+    escapes are all ASCII; so `c1` should be off for UTF-8).
+    """
+    isBytes = isinstance(s, (bytes, bytearray))
+    if (isBytes): s = s.decode("latin-1")
+    if ("\x1b" not in s and not c1 and ("c0" not in drop)):
+        out = s
+    else:
+        out = "".join(text for kind, _, text in tokenize(s, c1) if kind not in drop)
+    return out.encode("latin-1") if isBytes else out
+
+def parseKinds(spec:str) -> tuple:
+    """Turn a comma-separated list of kinds (or "all" for all the escape
+    kinds) into a tuple. @raise KeyError for an unknown kind.
+    """
+    kinds = []
+    for kind in spec.split(","):
+        kind = kind.strip()
+        if (kind == "all"): kinds.extend(escapeKinds)
+        elif (kind in allKinds): kinds.append(kind)
+        elif (kind): raise KeyError(kind)
+    return tuple(kinds)